@@ -1 +1,37 @@
-from .config import REDIS_URL
\ No newline at end of file
+from .config import (
+    REDIS_URL,
+    ML_SERVICE_URL,
+    METADATA_SERVICE_URL,
+    TRANSACTIONS_SERVICE_URL,
+    WORKER_BATCH_SIZE,
+    WORKER_BATCH_LINGER_MS,
+    WORKER_RPC_TIMEOUT,
+    QUEUE_RELIABLE,
+    QUEUE_CONSUMER_ID,
+    QUEUE_VISIBILITY_TIMEOUT,
+    QUEUE_REAPER_INTERVAL,
+    QUEUE_BACKEND,
+    QUEUE_NAME,
+    QUEUE_STREAM_GROUP,
+    QUEUE_STREAM_MAXLEN,
+    QUEUE_CODEC,
+    MAX_INGEST_BATCH_SIZE,
+    MAX_INGEST_BATCH_BYTES,
+    INGEST_QUEUE_HIGH_WATERMARK,
+    INGEST_QUEUE_LOW_WATERMARK,
+    INGEST_DEPTH_REFRESH_INTERVAL,
+    INGEST_BUFFER_SIZE,
+    INGEST_FLUSH_BATCH_SIZE,
+    INGEST_RETRY_AFTER,
+    ML_CHANNEL_POOL_SIZE,
+    SCORE_DEFAULT_DEADLINE_MS,
+    SCORE_FALLBACK_DECISION,
+    FEATURE_WINDOW_SECONDS,
+    FEATURE_WINDOW_BUCKETS,
+    FEATURE_STATE_TTL,
+    FEATURE_SEEN_TTL,
+    FEATURE_CACHE_SIZE,
+    FEATURE_CACHE_TTL,
+    WORKER_METRICS_INTERVAL,
+    RULES_POLL_INTERVAL,
+)
@@ -3,4 +3,46 @@ import os
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
 MODEL_PATH = os.getenv("MODEL_PATH", "/app/models/fraud_detection_model.txt")
 FEATURE_LIST_PATH = os.getenv("FEATURE_LIST_PATH", "/app/models/feature_names.json")
-DEFAULT_THRESHOLD = float(os.getenv("DEFAULT_THRESHOLD", "0.5"))
\ No newline at end of file
+DEFAULT_THRESHOLD = float(os.getenv("DEFAULT_THRESHOLD", "0.5"))
+
+ML_SERVICE_URL = os.getenv("ML_SERVICE_URL", "ml-service:50051")
+METADATA_SERVICE_URL = os.getenv("METADATA_SERVICE_URL", "metadata-service:50052")
+TRANSACTIONS_SERVICE_URL = os.getenv("TRANSACTIONS_SERVICE_URL", "transactions-service:50053")
+
+WORKER_BATCH_SIZE = int(os.getenv("WORKER_BATCH_SIZE", "256"))
+WORKER_BATCH_LINGER_MS = int(os.getenv("WORKER_BATCH_LINGER_MS", "20"))
+WORKER_RPC_TIMEOUT = float(os.getenv("WORKER_RPC_TIMEOUT", "5.0"))
+
+QUEUE_RELIABLE = os.getenv("QUEUE_RELIABLE", "false").lower() == "true"
+QUEUE_CONSUMER_ID = os.getenv("QUEUE_CONSUMER_ID") or None
+QUEUE_VISIBILITY_TIMEOUT = float(os.getenv("QUEUE_VISIBILITY_TIMEOUT", "30"))
+QUEUE_REAPER_INTERVAL = float(os.getenv("QUEUE_REAPER_INTERVAL", "5"))
+
+QUEUE_BACKEND = os.getenv("QUEUE_BACKEND", "list")
+QUEUE_NAME = os.getenv("QUEUE_NAME") or None
+QUEUE_STREAM_GROUP = os.getenv("QUEUE_STREAM_GROUP", "scoring")
+QUEUE_STREAM_MAXLEN = int(os.getenv("QUEUE_STREAM_MAXLEN", "1000000"))
+QUEUE_CODEC = os.getenv("QUEUE_CODEC", "json")
+
+MAX_INGEST_BATCH_SIZE = int(os.getenv("MAX_INGEST_BATCH_SIZE", "10000"))
+MAX_INGEST_BATCH_BYTES = int(os.getenv("MAX_INGEST_BATCH_BYTES", str(16 * 1024 * 1024)))
+
+INGEST_QUEUE_HIGH_WATERMARK = int(os.getenv("INGEST_QUEUE_HIGH_WATERMARK", "100000"))
+INGEST_QUEUE_LOW_WATERMARK = int(os.getenv("INGEST_QUEUE_LOW_WATERMARK", "80000"))
+INGEST_DEPTH_REFRESH_INTERVAL = float(os.getenv("INGEST_DEPTH_REFRESH_INTERVAL", "0.5"))
+INGEST_BUFFER_SIZE = int(os.getenv("INGEST_BUFFER_SIZE", "10000"))
+INGEST_FLUSH_BATCH_SIZE = int(os.getenv("INGEST_FLUSH_BATCH_SIZE", "500"))
+INGEST_RETRY_AFTER = int(os.getenv("INGEST_RETRY_AFTER", "1"))
+
+ML_CHANNEL_POOL_SIZE = int(os.getenv("ML_CHANNEL_POOL_SIZE", "2"))
+SCORE_DEFAULT_DEADLINE_MS = float(os.getenv("SCORE_DEFAULT_DEADLINE_MS", "15"))
+SCORE_FALLBACK_DECISION = os.getenv("SCORE_FALLBACK_DECISION", "approve")
+
+FEATURE_WINDOW_SECONDS = float(os.getenv("FEATURE_WINDOW_SECONDS", "3600"))
+FEATURE_WINDOW_BUCKETS = int(os.getenv("FEATURE_WINDOW_BUCKETS", "12"))
+FEATURE_STATE_TTL = int(os.getenv("FEATURE_STATE_TTL", "2592000"))
+FEATURE_SEEN_TTL = int(os.getenv("FEATURE_SEEN_TTL", "86400"))
+FEATURE_CACHE_SIZE = int(os.getenv("FEATURE_CACHE_SIZE", "100000"))
+FEATURE_CACHE_TTL = float(os.getenv("FEATURE_CACHE_TTL", "5"))
+WORKER_METRICS_INTERVAL = float(os.getenv("WORKER_METRICS_INTERVAL", "60"))
+RULES_POLL_INTERVAL = float(os.getenv("RULES_POLL_INTERVAL", "5"))
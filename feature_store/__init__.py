@@ -0,0 +1,4 @@
+from .online_features import MODEL_FEATURES, OnlineFeatureStore
+from .state_cache import AccountStateCache
+
+__all__ = ["MODEL_FEATURES", "OnlineFeatureStore", "AccountStateCache"]
\ No newline at end of file
@@ -0,0 +1,517 @@
+import asyncio
+import logging
+import math
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set, Tuple
+
+from redis import asyncio as aioredis
+
+from .state_cache import AccountStateCache
+
+logger = logging.getLogger(__name__)
+
+# Признаки PredictRequest, которые вычисляет хранилище
+MODEL_FEATURES = (
+    "time_since_last_transaction",
+    "spending_deviation_score",
+    "velocity_score",
+    "geo_anomaly_score",
+)
+
+# KEYS: по два ключа на транзакцию - хэш состояния счёта (могут повторяться)
+#       и ключ учтённой транзакции ('' - транзакция без transaction_id)
+# ARGV: окно (сек), число корзин окна, TTL состояния (сек), TTL учтённых
+#       транзакций (сек), затем по 5 значений на транзакцию: timestamp,
+#       amount, location, device и ожидаемая версия состояния
+#       ('' - не нужна, '*' - нужно состояние)
+# Возвращает по каждой транзакции MODEL_FEATURES, сумму за окно, новую версию
+# и флаг '1', за которым следует состояние после обновления (STATE_FIELDS и
+# корзины), если версия не совпала с ожидаемой; иначе флаг '0'.
+# Уже учтённая транзакция (повторная доставка) состояние не меняет:
+# возвращаются признаки, сохранённые при первом учёте
+UPDATE_SCRIPT = """
+local window = tonumber(ARGV[1])
+local buckets = tonumber(ARGV[2])
+local ttl = tonumber(ARGV[3])
+local seen_ttl = tonumber(ARGV[4])
+local width = window / buckets
+
+local fields = {'last_ts', 'n', 'mean', 'm2', 'location', 'device', 'ver'}
+for slot = 0, buckets - 1 do
+    fields[#fields + 1] = 'e:' .. slot
+    fields[#fields + 1] = 'c:' .. slot
+    fields[#fields + 1] = 's:' .. slot
+end
+
+local function fmt(x)
+    return string.format('%.17g', x)
+end
+
+local out = {}
+for i = 1, #KEYS / 2 do
+    local key = KEYS[i * 2 - 1]
+    local seen_key = KEYS[i * 2]
+    local base = 4 + (i - 1) * 5
+    local ts = tonumber(ARGV[base + 1])
+    local amount = tonumber(ARGV[base + 2])
+    local location = ARGV[base + 3]
+    local device = ARGV[base + 4]
+    local expect = ARGV[base + 5]
+
+    local state = redis.call('HMGET', key, unpack(fields))
+    local last_ts = tonumber(state[1])
+    local n = tonumber(state[2]) or 0
+    local mean = tonumber(state[3]) or 0
+    local m2 = tonumber(state[4]) or 0
+    local last_location = state[5]
+    local last_device = state[6]
+    local ver = tonumber(state[7]) or 0
+    local seen = seen_key ~= '' and redis.call('GET', seen_key)
+
+    local stale = expect ~= '' and expect ~= tostring(ver)
+    local bucket_state = {}
+    local features
+
+    if seen then
+        -- Повторная доставка: состояние не меняется, а кэш процесса,
+        -- уже применивший транзакцию локально, нужно сбросить
+        features = seen
+        stale = expect ~= ''
+        for k = 0, buckets - 1 do
+            local e = tonumber(state[8 + k * 3])
+            bucket_state[#bucket_state + 1] = e and fmt(e) or ''
+            bucket_state[#bucket_state + 1] = tostring(tonumber(state[9 + k * 3]) or 0)
+            bucket_state[#bucket_state + 1] = fmt(tonumber(state[10 + k * 3]) or 0)
+        end
+    else
+        local since = 0
+        local geo = 0
+        local latest = true
+        if last_ts then
+            if ts >= last_ts then
+                since = ts - last_ts
+            else
+                latest = false
+            end
+            if latest and last_location and last_location ~= location then
+                geo = 1 / (1 + since / 3600)
+            end
+        end
+
+        local deviation = 0
+        if n >= 2 and m2 > 0 then
+            deviation = (amount - mean) / math.sqrt(m2 / (n - 1))
+        end
+
+        n = n + 1
+        local delta = amount - mean
+        mean = mean + delta / n
+        m2 = m2 + delta * (amount - mean)
+        ver = ver + 1
+
+        if latest then
+            last_ts, last_location, last_device = ts, location, device
+        end
+
+        local epoch = math.floor(ts / width)
+        local slot = epoch % buckets
+        local count, total = 0, 0
+        local updates = {
+            'n', n, 'mean', fmt(mean), 'm2', fmt(m2), 'ver', ver,
+            'last_ts', fmt(last_ts), 'location', last_location, 'device', last_device
+        }
+
+        for k = 0, buckets - 1 do
+            local e = tonumber(state[8 + k * 3])
+            local c = tonumber(state[9 + k * 3]) or 0
+            local s = tonumber(state[10 + k * 3]) or 0
+            if k == slot then
+                if e == epoch then
+                    c, s = c + 1, s + amount
+                elseif e == nil or e < epoch then
+                    e, c, s = epoch, 1, amount
+                end
+                if e == epoch then
+                    updates[#updates + 1] = 'e:' .. k
+                    updates[#updates + 1] = fmt(e)
+                    updates[#updates + 1] = 'c:' .. k
+                    updates[#updates + 1] = c
+                    updates[#updates + 1] = 's:' .. k
+                    updates[#updates + 1] = fmt(s)
+                end
+            end
+            if e and e > epoch - buckets and e <= epoch then
+                count, total = count + c, total + s
+            end
+            bucket_state[#bucket_state + 1] = e and fmt(e) or ''
+            bucket_state[#bucket_state + 1] = tostring(c)
+            bucket_state[#bucket_state + 1] = fmt(s)
+        end
+
+        redis.call('HSET', key, unpack(updates))
+        redis.call('EXPIRE', key, ttl)
+
+        features = table.concat({fmt(since), fmt(deviation), tostring(count), fmt(geo), fmt(total)}, ' ')
+        if seen_key ~= '' then
+            redis.call('SET', seen_key, features, 'EX', seen_ttl)
+        end
+    end
+
+    for value in string.gmatch(features, '%S+') do
+        out[#out + 1] = value
+    end
+    out[#out + 1] = tostring(ver)
+    if stale then
+        out[#out + 1] = '1'
+        out[#out + 1] = last_ts and fmt(last_ts) or ''
+        out[#out + 1] = tostring(n)
+        out[#out + 1] = fmt(mean)
+        out[#out + 1] = fmt(m2)
+        out[#out + 1] = last_location or ''
+        out[#out + 1] = last_device or ''
+        for _, value in ipairs(bucket_state) do
+            out[#out + 1] = value
+        end
+    else
+        out[#out + 1] = '0'
+    end
+end
+return out
+"""
+
+# Поля состояния, которые скрипт возвращает перед корзинами окна
+STATE_FIELDS = ("last_ts", "n", "mean", "m2", "location", "device")
+
+
+def _epoch(timestamp: Optional[str]) -> float:
+    """Unix-время транзакции; без часового пояса считается UTC"""
+    try:
+        ts = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+    except (AttributeError, ValueError):
+        return time.time()
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts.timestamp()
+
+
+def _optional_float(value: str) -> Optional[float]:
+    return float(value) if value != "" else None
+
+
+def parse_state(values: List[str], version: int) -> dict:
+    """Состояние счёта из ответа UPDATE_SCRIPT (STATE_FIELDS и корзины окна)"""
+    last_ts, n, mean, m2, location, device = values[:len(STATE_FIELDS)]
+    bucket_values = values[len(STATE_FIELDS):]
+    return {
+        "last_ts": _optional_float(last_ts),
+        "n": int(n),
+        "mean": float(mean),
+        "m2": float(m2),
+        "location": location or None,
+        "device": device or None,
+        "ver": version,
+        "buckets": [
+            [_optional_float(bucket_values[i]), int(bucket_values[i + 1]), float(bucket_values[i + 2])]
+            for i in range(0, len(bucket_values), 3)
+        ],
+    }
+
+
+def apply_transaction(
+    state: dict,
+    ts: float,
+    amount: float,
+    location: str,
+    device: str,
+    window_seconds: float,
+    window_buckets: int
+) -> Dict[str, float]:
+    """
+    Признаки транзакции по состоянию счёта и обновление состояния на месте
+
+    Повторяет расчёт UPDATE_SCRIPT теми же операциями над double,
+    поэтому результат совпадает со скриптом бит в бит.
+    """
+    last_ts = state["last_ts"]
+    since = geo = 0.0
+    latest = True
+    if last_ts is not None:
+        if ts >= last_ts:
+            since = ts - last_ts
+        else:
+            latest = False
+        if latest and state["location"] is not None and state["location"] != location:
+            geo = 1 / (1 + since / 3600)
+
+    n, mean, m2 = state["n"], state["mean"], state["m2"]
+    deviation = 0.0
+    if n >= 2 and m2 > 0:
+        deviation = (amount - mean) / math.sqrt(m2 / (n - 1))
+
+    n += 1
+    delta = amount - mean
+    mean += delta / n
+    m2 += delta * (amount - mean)
+    state.update(n=n, mean=mean, m2=m2, ver=state["ver"] + 1)
+    if latest:
+        state.update(last_ts=ts, location=location, device=device)
+
+    epoch = math.floor(ts / (window_seconds / window_buckets))
+    slot = epoch % window_buckets
+    count, total = 0, 0.0
+    for k, bucket in enumerate(state["buckets"]):
+        e, c, s = bucket
+        if k == slot:
+            if e == epoch:
+                c, s = c + 1, s + amount
+            elif e is None or e < epoch:
+                e, c, s = epoch, 1, amount
+            bucket[:] = (e, c, s)
+        if e is not None and epoch - window_buckets < e <= epoch:
+            count, total = count + c, total + s
+
+    return {
+        "time_since_last_transaction": since,
+        "spending_deviation_score": deviation,
+        "velocity_score": float(count),
+        "geo_anomaly_score": geo,
+        "window_amount": total,
+    }
+
+
+class OnlineFeatureStore:
+    """
+    Онлайн-признаки по счёту отправителя
+
+    Состояние счёта - один хэш в Redis: время и локация/устройство
+    последней транзакции, число, среднее и M2 сумм (Welford), счётчики
+    и суммы по корзинам скользящего окна, версия. Чтение, расчёт признаков
+    и обновление выполняются одним Lua-скриптом на пачку транзакций:
+    один round trip на батч и атомарность между воркерами.
+
+    Признаки:
+    - time_since_last_transaction: секунды с прошлой транзакции счёта
+    - spending_deviation_score: z-score суммы относительно истории счёта
+    - velocity_score: число транзакций счёта за окно, включая текущую
+    - geo_anomaly_score: смена локации, 1 / (1 + часы с прошлой транзакции)
+
+    Время берётся из timestamp транзакции; опоздавшая транзакция
+    учитывается в статистике, но не сдвигает "последнюю" транзакцию.
+    Транзакция учитывается один раз по transaction_id: повторная доставка
+    (например, после падения воркера до подтверждения) получает признаки
+    первого учёта и не меняет состояние. Учтённые id хранятся seen_ttl
+    секунд; транзакции без transaction_id учитываются при каждом вызове.
+
+    С cache (AccountStateCache) состояние горячих счетов держится в памяти:
+    если все счета пачки в кэше, признаки считаются локально, а обновление
+    пишется в Redis тем же скриптом без ожидания (write-through). Скрипт
+    сверяет версию состояния; если счёт успел обновить другой процесс,
+    запись кэша инвалидируется (признаки, уже посчитанные по ней, могли
+    не учесть чужие транзакции). Пачки с промахами ждут скрипт и кладут
+    в кэш возвращённое им состояние. Записи процесса выполняются по
+    очереди; больше max_pending_writes записей без ожидания не держится -
+    следующая пачка ждёт свою запись. Признаки повторно доставленной
+    транзакции по кэшу считаются заново, но скрипт состояние не меняет
+    и запись кэша инвалидируется.
+    """
+
+    def __init__(
+        self,
+        redis_url: str,
+        key_prefix: str = "features:account",
+        window_seconds: float = 3600.0,
+        window_buckets: int = 12,
+        state_ttl: int = 30 * 24 * 3600,
+        seen_ttl: int = 24 * 3600,
+        chunk_size: int = 500,
+        cache: Optional[AccountStateCache] = None,
+        max_pending_writes: int = 64
+    ):
+        self.redis_url = redis_url
+        self.key_prefix = key_prefix
+        self.window_seconds = window_seconds
+        self.window_buckets = window_buckets
+        self.state_ttl = state_ttl
+        self.seen_ttl = seen_ttl
+        self.chunk_size = chunk_size
+        self.cache = cache
+        self.max_pending_writes = max_pending_writes
+        self._redis: Optional[aioredis.Redis] = None
+        self._pending: Set[asyncio.Task] = set()
+        self._last_write: Optional[asyncio.Task] = None
+
+    def state_key(self, account: str) -> str:
+        return f"{self.key_prefix}:{account}"
+
+    def seen_key(self, transaction_id: Optional[str]) -> str:
+        """Ключ учтённой транзакции; без transaction_id - пустой (без проверки)"""
+        return f"{self.key_prefix}:seen:{transaction_id}" if transaction_id else ""
+
+    async def connect(self):
+        """Подключение к Redis"""
+        if not self._redis:
+            self._redis = await aioredis.from_url(self.redis_url, decode_responses=True)
+            await self._redis.ping()
+            self._update_script = self._redis.register_script(UPDATE_SCRIPT)
+            logger.info(f"Feature store connected to Redis: {self.redis_url}")
+
+    async def close(self):
+        """Дожидается отложенных записей и закрывает соединение"""
+        await self.flush()
+        if self._redis:
+            await self._redis.aclose()
+            self._redis = None
+        if self.cache is not None:
+            self.cache.clear()
+
+    async def flush(self):
+        """Ожидание записей в Redis, отправленных без ожидания"""
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+
+    def metrics(self) -> Dict[str, float]:
+        metrics = {"feature_store.pending_writes": float(len(self._pending))}
+        if self.cache is not None:
+            metrics.update(self.cache.metrics())
+        return metrics
+
+    async def compute(self, transactions: List[dict]) -> List[Dict[str, float]]:
+        """
+        Вычисляет признаки и обновляет состояние счетов
+
+        Транзакции одного счёта внутри пачки применяются по порядку.
+        Большие пачки делятся на куски по chunk_size, чтобы не блокировать
+        Redis одним долгим скриптом.
+
+        Returns:
+            Признаки MODEL_FEATURES и window_amount (сумма за окно)
+            по каждой транзакции в порядке входа
+        """
+        if not self._redis:
+            await self.connect()
+
+        features = []
+        for start in range(0, len(transactions), self.chunk_size):
+            features.extend(await self._compute_chunk(transactions[start:start + self.chunk_size]))
+        return features
+
+    async def _compute_chunk(self, chunk: List[dict]) -> List[Dict[str, float]]:
+        accounts = [tx["sender_account"] for tx in chunk]
+        updates = [
+            (
+                _epoch(tx.get("timestamp")),
+                float(tx["amount"]),
+                tx.get("location", ""),
+                tx.get("device_hash") or tx.get("device_used", ""),
+            )
+            for tx in chunk
+        ]
+
+        expected = [""] * len(chunk)
+        local = []
+        if self.cache is not None:
+            for i, (account, update) in enumerate(zip(accounts, updates)):
+                state = self.cache.get(account)
+                if state is None:
+                    expected[i] = "*"
+                    continue
+                expected[i] = str(state["ver"])
+                local.append(apply_transaction(
+                    state, *update, self.window_seconds, self.window_buckets
+                ))
+
+        keys = []
+        for account, tx in zip(accounts, chunk):
+            keys.extend((self.state_key(account), self.seen_key(tx.get("transaction_id"))))
+        args = [self.window_seconds, self.window_buckets, self.state_ttl, self.seen_ttl]
+        for update, expect in zip(updates, expected):
+            args.extend((*update, expect))
+
+        if self.cache is None:
+            values = await self._update_script(keys=keys, args=args)
+            return [item for item, _ in self._parse(values, len(chunk))]
+
+        write = self._write_through(keys, args, accounts, expected)
+        if len(local) < len(chunk) or len(self._pending) > self.max_pending_writes:
+            # Отмена вызывающего (дедлайн скоринга) не прерывает запись
+            features = await asyncio.shield(write)
+            if len(local) < len(chunk):
+                return features
+        return local
+
+    def _write_through(
+        self,
+        keys: List[str],
+        args: list,
+        accounts: List[str],
+        expected: List[str]
+    ) -> asyncio.Task:
+        """
+        Запись обновления в Redis следом за предыдущей записью процесса,
+        чтобы скрипты по одному счёту выполнялись в порядке расчёта
+        """
+        task = asyncio.create_task(self._write(keys, args, accounts, expected, self._last_write))
+        self._last_write = task
+        self._pending.add(task)
+        task.add_done_callback(self._write_done)
+        return task
+
+    def _write_done(self, task: asyncio.Task):
+        self._pending.discard(task)
+        if self._last_write is task:
+            self._last_write = None
+        if not task.cancelled():
+            task.exception()
+
+    async def _write(
+        self,
+        keys: List[str],
+        args: list,
+        accounts: List[str],
+        expected: List[str],
+        previous: Optional[asyncio.Task]
+    ) -> List[Dict[str, float]]:
+        if previous is not None:
+            await asyncio.wait([previous])
+
+        try:
+            values = await self._update_script(keys=keys, args=args)
+        except Exception as e:
+            logger.error(f"Feature state write failed: {e}")
+            for account in set(accounts):
+                self.cache.invalidate(account)
+            raise
+
+        features = []
+        for account, expect, (item, state) in zip(accounts, expected, self._parse(values, len(accounts))):
+            features.append(item)
+            if state is None:
+                continue
+            if expect == "*":
+                self.cache.put(account, state)
+            else:
+                self.cache.invalidate(account)
+        return features
+
+    def _parse(self, values: List[str], count: int) -> List[Tuple[dict, Optional[dict]]]:
+        """Признаки и (при расхождении версии) состояние по каждой транзакции ответа"""
+        state_size = len(STATE_FIELDS) + 3 * self.window_buckets
+        results, i = [], 0
+        for _ in range(count):
+            features = {
+                "time_since_last_transaction": float(values[i]),
+                "spending_deviation_score": float(values[i + 1]),
+                "velocity_score": float(values[i + 2]),
+                "geo_anomaly_score": float(values[i + 3]),
+                "window_amount": float(values[i + 4]),
+            }
+            version, stale = int(values[i + 5]), values[i + 6] == "1"
+            i += 7
+
+            state = None
+            if stale:
+                state = parse_state(values[i:i + state_size], version)
+                i += state_size
+            results.append((features, state))
+        return results
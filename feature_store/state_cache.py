@@ -0,0 +1,74 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+class AccountStateCache:
+    """
+    Ограниченный кэш состояния счетов в памяти процесса (LRU + TTL)
+
+    При переполнении вытесняется давно не использованный счёт; запись
+    старше ttl секунд считается промахом. Счётчики hits/misses/evictions
+    показывают, хватает ли размера под горячие счета.
+    """
+
+    def __init__(self, max_entries: int = 100000, ttl: float = 5.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Значение по ключу или None (нет, истёк TTL)"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: Any):
+        """Запись значения с новым TTL (write-through вызывающего кода)"""
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable):
+        if self._entries.pop(key, None) is not None:
+            self.invalidations += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def metrics(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "feature_cache.size": float(len(self._entries)),
+            "feature_cache.max_entries": float(self.max_entries),
+            "feature_cache.hits": float(self.hits),
+            "feature_cache.misses": float(self.misses),
+            "feature_cache.hit_ratio": self.hits / lookups if lookups else 0.0,
+            "feature_cache.evictions": float(self.evictions),
+            "feature_cache.expirations": float(self.expirations),
+            "feature_cache.invalidations": float(self.invalidations),
+        }
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# NO CHECKED-IN PROTOBUF GENCODE
+# source: metadata.proto
+# Protobuf Python Version: 7.35.1
+"""Generated protocol buffer code."""
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import runtime_version as _runtime_version
+from google.protobuf import symbol_database as _symbol_database
+from google.protobuf.internal import builder as _builder
+_runtime_version.ValidateProtobufRuntimeVersion(
+    _runtime_version.Domain.PUBLIC,
+    7,
+    35,
+    1,
+    '',
+    'metadata.proto'
+)
+# @@protoc_insertion_point(imports)
+
+_sym_db = _symbol_database.Default()
+
+
+
+
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x0emetadata.proto\x12\x08metadata\"(\n\x12GetMLConfigRequest\x12\x12\n\nif_version\x18\x01 \x01(\x03\"\x16\n\x14WatchMLConfigRequest\"\xb6\x01\n\x08MLConfig\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x17\n\x0fpayment_channel\x18\x02 \x01(\t\x12\x18\n\x10transaction_type\x18\x03 \x01(\t\x12\x19\n\x11merchant_category\x18\x04 \x01(\t\x12\x15\n\rmodel_version\x18\x05 \x01(\t\x12\x11\n\tthreshold\x18\x06 \x01(\x01\x12\x16\n\x0etraffic_weight\x18\x07 \x01(\x01\x12\x0c\n\x04mode\x18\x08 \x01(\t\"q\n\x10MLConfigResponse\x12\x11\n\tthreshold\x18\x01 \x01(\x01\x12\x0f\n\x07version\x18\x02 \x01(\x03\x12\x14\n\x0cnot_modified\x18\x03 \x01(\x08\x12#\n\x07\x63onfigs\x18\x04 \x03(\x0b\x32\x12.metadata.MLConfig\"\x89\x01\n\x0cModelVersion\x12\x0f\n\x07version\x18\x01 \x01(\t\x12\x15\n\rartifact_path\x18\x02 \x01(\t\x12\x19\n\x11\x66\x65\x61ture_list_path\x18\x03 \x01(\t\x12\x11\n\tthreshold\x18\x04 \x01(\x01\x12\x10\n\x08\x63hecksum\x18\x05 \x01(\t\x12\x11\n\tis_active\x18\x06 \x01(\x08\"V\n\x1bRegisterModelVersionRequest\x12%\n\x05model\x18\x01 \x01(\x0b\x32\x16.metadata.ModelVersion\x12\x10\n\x08\x61\x63tivate\x18\x02 \x01(\x08\".\n\x1b\x41\x63tivateModelVersionRequest\x12\x0f\n\x07version\x18\x01 \x01(\t\"\x1e\n\x1cGetActiveModelVersionRequest\")\n\x16GetModelVersionRequest\x12\x0f\n\x07version\x18\x01 \x01(\t\"L\n\x14ModelVersionResponse\x12\r\n\x05\x66ound\x18\x01 \x01(\x08\x12%\n\x05model\x18\x02 \x01(\x0b\x32\x16.metadata.ModelVersion\"%\n\x0fGetRulesRequest\x12\x12\n\nif_version\x18\x01 \x01(\x03\"^\n\tFraudRule\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x11\n\trule_type\x18\x02 \x01(\t\x12\x0e\n\x06params\x18\x03 \x01(\t\x12\x0e\n\x06\x61\x63tion\x18\x04 \x01(\t\x12\x10\n\x08priority\x18\x05 \x01(\x05\"Z\n\rRulesResponse\x12\x0f\n\x07version\x18\x01 \x01(\x03\x12\x14\n\x0cnot_modified\x18\x02 \x01(\x08\x12\"\n\x05rules\x18\x03 \x03(\x0b\x32\x13.metadata.FraudRule\"\x10\n\x0eMetricsRequest\"z\n\x0fMetricsResponse\x12\x37\n\x07metrics\x18\x01 \x03(\x0b\x32&.metadata.MetricsResponse.MetricsEntry\x1a.\n\x0cMetricsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\x01:\x02\x38\x01\"\x14\n\x12HealthCheckRequest\"%\n\x13HealthCheckResponse\x12\x0e\n\x06status\x18\x01 \x01(\t2\xe7\x05\n\nMetadataDB\x12G\n\x0bGetMLConfig\x12\x1c.metadata.GetMLConfigRequest\x1a\x1a.metadata.MLConfigResponse\x12M\n\rWatchMLConfig\x12\x1e.metadata.WatchMLConfigRequest\x1a\x1a.metadata.MLConfigResponse0\x01\x12\x41\n\nGetMetrics\x12\x18.metadata.MetricsRequest\x1a\x19.metadata.MetricsResponse\x12]\n\x14RegisterModelVersion\x12%.metadata.RegisterModelVersionRequest\x1a\x1e.metadata.ModelVersionResponse\x12]\n\x14\x41\x63tivateModelVersion\x12%.metadata.ActivateModelVersionRequest\x1a\x1e.metadata.ModelVersionResponse\x12_\n\x15GetActiveModelVersion\x12&.metadata.GetActiveModelVersionRequest\x1a\x1e.metadata.ModelVersionResponse\x12S\n\x0fGetModelVersion\x12 .metadata.GetModelVersionRequest\x1a\x1e.metadata.ModelVersionResponse\x12>\n\x08GetRules\x12\x19.metadata.GetRulesRequest\x1a\x17.metadata.RulesResponse\x12J\n\x0bHealthCheck\x12\x1c.metadata.HealthCheckRequest\x1a\x1d.metadata.HealthCheckResponseb\x06proto3')
+
+_globals = globals()
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'metadata_pb2', _globals)
+if not _descriptor._USE_C_DESCRIPTORS:
+  DESCRIPTOR._loaded_options = None
+  _globals['_METRICSRESPONSE_METRICSENTRY']._loaded_options = None
+  _globals['_METRICSRESPONSE_METRICSENTRY']._serialized_options = b'8\001'
+  _globals['_GETMLCONFIGREQUEST']._serialized_start=28
+  _globals['_GETMLCONFIGREQUEST']._serialized_end=68
+  _globals['_WATCHMLCONFIGREQUEST']._serialized_start=70
+  _globals['_WATCHMLCONFIGREQUEST']._serialized_end=92
+  _globals['_MLCONFIG']._serialized_start=95
+  _globals['_MLCONFIG']._serialized_end=277
+  _globals['_MLCONFIGRESPONSE']._serialized_start=279
+  _globals['_MLCONFIGRESPONSE']._serialized_end=392
+  _globals['_MODELVERSION']._serialized_start=395
+  _globals['_MODELVERSION']._serialized_end=532
+  _globals['_REGISTERMODELVERSIONREQUEST']._serialized_start=534
+  _globals['_REGISTERMODELVERSIONREQUEST']._serialized_end=620
+  _globals['_ACTIVATEMODELVERSIONREQUEST']._serialized_start=622
+  _globals['_ACTIVATEMODELVERSIONREQUEST']._serialized_end=668
+  _globals['_GETACTIVEMODELVERSIONREQUEST']._serialized_start=670
+  _globals['_GETACTIVEMODELVERSIONREQUEST']._serialized_end=700
+  _globals['_GETMODELVERSIONREQUEST']._serialized_start=702
+  _globals['_GETMODELVERSIONREQUEST']._serialized_end=743
+  _globals['_MODELVERSIONRESPONSE']._serialized_start=745
+  _globals['_MODELVERSIONRESPONSE']._serialized_end=821
+  _globals['_GETRULESREQUEST']._serialized_start=823
+  _globals['_GETRULESREQUEST']._serialized_end=860
+  _globals['_FRAUDRULE']._serialized_start=862
+  _globals['_FRAUDRULE']._serialized_end=956
+  _globals['_RULESRESPONSE']._serialized_start=958
+  _globals['_RULESRESPONSE']._serialized_end=1048
+  _globals['_METRICSREQUEST']._serialized_start=1050
+  _globals['_METRICSREQUEST']._serialized_end=1066
+  _globals['_METRICSRESPONSE']._serialized_start=1068
+  _globals['_METRICSRESPONSE']._serialized_end=1190
+  _globals['_METRICSRESPONSE_METRICSENTRY']._serialized_start=1144
+  _globals['_METRICSRESPONSE_METRICSENTRY']._serialized_end=1190
+  _globals['_HEALTHCHECKREQUEST']._serialized_start=1192
+  _globals['_HEALTHCHECKREQUEST']._serialized_end=1212
+  _globals['_HEALTHCHECKRESPONSE']._serialized_start=1214
+  _globals['_HEALTHCHECKRESPONSE']._serialized_end=1251
+  _globals['_METADATADB']._serialized_start=1254
+  _globals['_METADATADB']._serialized_end=1997
+# @@protoc_insertion_point(module_scope)
@@ -0,0 +1,441 @@
+# Generated by the gRPC Python protocol compiler plugin. DO NOT EDIT!
+"""Client and server classes corresponding to protobuf-defined services."""
+import grpc
+import warnings
+
+from generated_proto import metadata_pb2 as metadata__pb2
+
+GRPC_GENERATED_VERSION = '1.84.0'
+GRPC_VERSION = grpc.__version__
+_version_not_supported = False
+
+try:
+    from grpc._utilities import first_version_is_lower
+    _version_not_supported = first_version_is_lower(GRPC_VERSION, GRPC_GENERATED_VERSION)
+except ImportError:
+    _version_not_supported = True
+
+if _version_not_supported:
+    raise RuntimeError(
+        f'The grpc package installed is at version {GRPC_VERSION},'
+        + ' but the generated code in metadata_pb2_grpc.py depends on'
+        + f' grpcio>={GRPC_GENERATED_VERSION}.'
+        + f' Please upgrade your grpc module to grpcio>={GRPC_GENERATED_VERSION}'
+        + f' or downgrade your generated code using grpcio-tools<={GRPC_VERSION}.'
+    )
+
+
+class MetadataDBStub:
+    """Missing associated documentation comment in .proto file."""
+
+    def __init__(self, channel):
+        """Constructor.
+
+        Args:
+            channel: A grpc.Channel.
+        """
+        self.GetMLConfig = channel.unary_unary(
+                '/metadata.MetadataDB/GetMLConfig',
+                request_serializer=metadata__pb2.GetMLConfigRequest.SerializeToString,
+                response_deserializer=metadata__pb2.MLConfigResponse.FromString,
+                _registered_method=True)
+        self.WatchMLConfig = channel.unary_stream(
+                '/metadata.MetadataDB/WatchMLConfig',
+                request_serializer=metadata__pb2.WatchMLConfigRequest.SerializeToString,
+                response_deserializer=metadata__pb2.MLConfigResponse.FromString,
+                _registered_method=True)
+        self.GetMetrics = channel.unary_unary(
+                '/metadata.MetadataDB/GetMetrics',
+                request_serializer=metadata__pb2.MetricsRequest.SerializeToString,
+                response_deserializer=metadata__pb2.MetricsResponse.FromString,
+                _registered_method=True)
+        self.RegisterModelVersion = channel.unary_unary(
+                '/metadata.MetadataDB/RegisterModelVersion',
+                request_serializer=metadata__pb2.RegisterModelVersionRequest.SerializeToString,
+                response_deserializer=metadata__pb2.ModelVersionResponse.FromString,
+                _registered_method=True)
+        self.ActivateModelVersion = channel.unary_unary(
+                '/metadata.MetadataDB/ActivateModelVersion',
+                request_serializer=metadata__pb2.ActivateModelVersionRequest.SerializeToString,
+                response_deserializer=metadata__pb2.ModelVersionResponse.FromString,
+                _registered_method=True)
+        self.GetActiveModelVersion = channel.unary_unary(
+                '/metadata.MetadataDB/GetActiveModelVersion',
+                request_serializer=metadata__pb2.GetActiveModelVersionRequest.SerializeToString,
+                response_deserializer=metadata__pb2.ModelVersionResponse.FromString,
+                _registered_method=True)
+        self.GetModelVersion = channel.unary_unary(
+                '/metadata.MetadataDB/GetModelVersion',
+                request_serializer=metadata__pb2.GetModelVersionRequest.SerializeToString,
+                response_deserializer=metadata__pb2.ModelVersionResponse.FromString,
+                _registered_method=True)
+        self.GetRules = channel.unary_unary(
+                '/metadata.MetadataDB/GetRules',
+                request_serializer=metadata__pb2.GetRulesRequest.SerializeToString,
+                response_deserializer=metadata__pb2.RulesResponse.FromString,
+                _registered_method=True)
+        self.HealthCheck = channel.unary_unary(
+                '/metadata.MetadataDB/HealthCheck',
+                request_serializer=metadata__pb2.HealthCheckRequest.SerializeToString,
+                response_deserializer=metadata__pb2.HealthCheckResponse.FromString,
+                _registered_method=True)
+
+
+class MetadataDBServicer:
+    """Missing associated documentation comment in .proto file."""
+
+    def GetMLConfig(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def WatchMLConfig(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetMetrics(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def RegisterModelVersion(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def ActivateModelVersion(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetActiveModelVersion(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetModelVersion(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetRules(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def HealthCheck(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+
+def add_MetadataDBServicer_to_server(servicer, server):
+    rpc_method_handlers = {
+            'GetMLConfig': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetMLConfig,
+                    request_deserializer=metadata__pb2.GetMLConfigRequest.FromString,
+                    response_serializer=metadata__pb2.MLConfigResponse.SerializeToString,
+            ),
+            'WatchMLConfig': grpc.unary_stream_rpc_method_handler(
+                    servicer.WatchMLConfig,
+                    request_deserializer=metadata__pb2.WatchMLConfigRequest.FromString,
+                    response_serializer=metadata__pb2.MLConfigResponse.SerializeToString,
+            ),
+            'GetMetrics': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetMetrics,
+                    request_deserializer=metadata__pb2.MetricsRequest.FromString,
+                    response_serializer=metadata__pb2.MetricsResponse.SerializeToString,
+            ),
+            'RegisterModelVersion': grpc.unary_unary_rpc_method_handler(
+                    servicer.RegisterModelVersion,
+                    request_deserializer=metadata__pb2.RegisterModelVersionRequest.FromString,
+                    response_serializer=metadata__pb2.ModelVersionResponse.SerializeToString,
+            ),
+            'ActivateModelVersion': grpc.unary_unary_rpc_method_handler(
+                    servicer.ActivateModelVersion,
+                    request_deserializer=metadata__pb2.ActivateModelVersionRequest.FromString,
+                    response_serializer=metadata__pb2.ModelVersionResponse.SerializeToString,
+            ),
+            'GetActiveModelVersion': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetActiveModelVersion,
+                    request_deserializer=metadata__pb2.GetActiveModelVersionRequest.FromString,
+                    response_serializer=metadata__pb2.ModelVersionResponse.SerializeToString,
+            ),
+            'GetModelVersion': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetModelVersion,
+                    request_deserializer=metadata__pb2.GetModelVersionRequest.FromString,
+                    response_serializer=metadata__pb2.ModelVersionResponse.SerializeToString,
+            ),
+            'GetRules': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetRules,
+                    request_deserializer=metadata__pb2.GetRulesRequest.FromString,
+                    response_serializer=metadata__pb2.RulesResponse.SerializeToString,
+            ),
+            'HealthCheck': grpc.unary_unary_rpc_method_handler(
+                    servicer.HealthCheck,
+                    request_deserializer=metadata__pb2.HealthCheckRequest.FromString,
+                    response_serializer=metadata__pb2.HealthCheckResponse.SerializeToString,
+            ),
+    }
+    generic_handler = grpc.method_handlers_generic_handler(
+            'metadata.MetadataDB', rpc_method_handlers)
+    server.add_generic_rpc_handlers((generic_handler,))
+    server.add_registered_method_handlers('metadata.MetadataDB', rpc_method_handlers)
+
+
+ # This class is part of an EXPERIMENTAL API.
+class MetadataDB:
+    """Missing associated documentation comment in .proto file."""
+
+    @staticmethod
+    def GetMLConfig(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/metadata.MetadataDB/GetMLConfig',
+            metadata__pb2.GetMLConfigRequest.SerializeToString,
+            metadata__pb2.MLConfigResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def WatchMLConfig(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/metadata.MetadataDB/WatchMLConfig',
+            metadata__pb2.WatchMLConfigRequest.SerializeToString,
+            metadata__pb2.MLConfigResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def GetMetrics(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/metadata.MetadataDB/GetMetrics',
+            metadata__pb2.MetricsRequest.SerializeToString,
+            metadata__pb2.MetricsResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def RegisterModelVersion(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/metadata.MetadataDB/RegisterModelVersion',
+            metadata__pb2.RegisterModelVersionRequest.SerializeToString,
+            metadata__pb2.ModelVersionResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def ActivateModelVersion(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/metadata.MetadataDB/ActivateModelVersion',
+            metadata__pb2.ActivateModelVersionRequest.SerializeToString,
+            metadata__pb2.ModelVersionResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def GetActiveModelVersion(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/metadata.MetadataDB/GetActiveModelVersion',
+            metadata__pb2.GetActiveModelVersionRequest.SerializeToString,
+            metadata__pb2.ModelVersionResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def GetModelVersion(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/metadata.MetadataDB/GetModelVersion',
+            metadata__pb2.GetModelVersionRequest.SerializeToString,
+            metadata__pb2.ModelVersionResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def GetRules(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/metadata.MetadataDB/GetRules',
+            metadata__pb2.GetRulesRequest.SerializeToString,
+            metadata__pb2.RulesResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def HealthCheck(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/metadata.MetadataDB/HealthCheck',
+            metadata__pb2.HealthCheckRequest.SerializeToString,
+            metadata__pb2.HealthCheckResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# NO CHECKED-IN PROTOBUF GENCODE
+# source: ml.proto
+# Protobuf Python Version: 7.35.1
+"""Generated protocol buffer code."""
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import runtime_version as _runtime_version
+from google.protobuf import symbol_database as _symbol_database
+from google.protobuf.internal import builder as _builder
+_runtime_version.ValidateProtobufRuntimeVersion(
+    _runtime_version.Domain.PUBLIC,
+    7,
+    35,
+    1,
+    '',
+    'ml.proto'
+)
+# @@protoc_insertion_point(imports)
+
+_sym_db = _symbol_database.Default()
+
+
+
+
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x08ml.proto\x12\x0f\x66raud_detection\"\xad\x03\n\x0ePredictRequest\x12\x16\n\x0etransaction_id\x18\x01 \x01(\t\x12\x11\n\ttimestamp\x18\x02 \x01(\t\x12\x16\n\x0esender_account\x18\x03 \x01(\t\x12\x18\n\x10receiver_account\x18\x04 \x01(\t\x12\x0e\n\x06\x61mount\x18\x05 \x01(\x01\x12\x18\n\x10transaction_type\x18\x06 \x01(\t\x12\x19\n\x11merchant_category\x18\x07 \x01(\t\x12\x10\n\x08location\x18\x08 \x01(\t\x12\x13\n\x0b\x64\x65vice_used\x18\t \x01(\t\x12\x17\n\x0fpayment_channel\x18\n \x01(\t\x12\x12\n\nip_address\x18\x0b \x01(\t\x12\x13\n\x0b\x64\x65vice_hash\x18\x0c \x01(\t\x12#\n\x1btime_since_last_transaction\x18\r \x01(\x01\x12 \n\x18spending_deviation_score\x18\x0e \x01(\x01\x12\x16\n\x0evelocity_score\x18\x0f \x01(\x01\x12\x19\n\x11geo_anomaly_score\x18\x10 \x01(\x01\x12\x16\n\x0e\x63orrelation_id\x18\x11 \x01(\t\"_\n\x0fPredictResponse\x12\x16\n\x0e\x63orrelation_id\x18\x01 \x01(\t\x12\x10\n\x08is_fraud\x18\x02 \x01(\x08\x12\x13\n\x0bprobability\x18\x03 \x01(\x01\x12\r\n\x05\x65rror\x18\x04 \x01(\t\"H\n\x13PredictBatchRequest\x12\x31\n\x08requests\x18\x01 \x03(\x0b\x32\x1f.fraud_detection.PredictRequest\"K\n\x14PredictBatchResponse\x12\x33\n\tresponses\x18\x01 \x03(\x0b\x32 .fraud_detection.PredictResponse\"\x10\n\x0eMetricsRequest\"\x81\x01\n\x0fMetricsResponse\x12>\n\x07metrics\x18\x01 \x03(\x0b\x32-.fraud_detection.MetricsResponse.MetricsEntry\x1a.\n\x0cMetricsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\x01:\x02\x38\x01\"\x14\n\x12HealthCheckRequest\"%\n\x13HealthCheckResponse\x12\x0e\n\x06status\x18\x01 \x01(\t2\xb9\x03\n\tMLService\x12L\n\x07Predict\x12\x1f.fraud_detection.PredictRequest\x1a .fraud_detection.PredictResponse\x12[\n\x0cPredictBatch\x12$.fraud_detection.PredictBatchRequest\x1a%.fraud_detection.PredictBatchResponse\x12V\n\rPredictStream\x12\x1f.fraud_detection.PredictRequest\x1a .fraud_detection.PredictResponse(\x01\x30\x01\x12O\n\nGetMetrics\x12\x1f.fraud_detection.MetricsRequest\x1a .fraud_detection.MetricsResponse\x12X\n\x0bHealthCheck\x12#.fraud_detection.HealthCheckRequest\x1a$.fraud_detection.HealthCheckResponseb\x06proto3')
+
+_globals = globals()
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'ml_pb2', _globals)
+if not _descriptor._USE_C_DESCRIPTORS:
+  DESCRIPTOR._loaded_options = None
+  _globals['_METRICSRESPONSE_METRICSENTRY']._loaded_options = None
+  _globals['_METRICSRESPONSE_METRICSENTRY']._serialized_options = b'8\001'
+  _globals['_PREDICTREQUEST']._serialized_start=30
+  _globals['_PREDICTREQUEST']._serialized_end=459
+  _globals['_PREDICTRESPONSE']._serialized_start=461
+  _globals['_PREDICTRESPONSE']._serialized_end=556
+  _globals['_PREDICTBATCHREQUEST']._serialized_start=558
+  _globals['_PREDICTBATCHREQUEST']._serialized_end=630
+  _globals['_PREDICTBATCHRESPONSE']._serialized_start=632
+  _globals['_PREDICTBATCHRESPONSE']._serialized_end=707
+  _globals['_METRICSREQUEST']._serialized_start=709
+  _globals['_METRICSREQUEST']._serialized_end=725
+  _globals['_METRICSRESPONSE']._serialized_start=728
+  _globals['_METRICSRESPONSE']._serialized_end=857
+  _globals['_METRICSRESPONSE_METRICSENTRY']._serialized_start=811
+  _globals['_METRICSRESPONSE_METRICSENTRY']._serialized_end=857
+  _globals['_HEALTHCHECKREQUEST']._serialized_start=859
+  _globals['_HEALTHCHECKREQUEST']._serialized_end=879
+  _globals['_HEALTHCHECKRESPONSE']._serialized_start=881
+  _globals['_HEALTHCHECKRESPONSE']._serialized_end=918
+  _globals['_MLSERVICE']._serialized_start=921
+  _globals['_MLSERVICE']._serialized_end=1362
+# @@protoc_insertion_point(module_scope)
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# NO CHECKED-IN PROTOBUF GENCODE
+# source: transactions.proto
+# Protobuf Python Version: 7.35.1
+"""Generated protocol buffer code."""
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import runtime_version as _runtime_version
+from google.protobuf import symbol_database as _symbol_database
+from google.protobuf.internal import builder as _builder
+_runtime_version.ValidateProtobufRuntimeVersion(
+    _runtime_version.Domain.PUBLIC,
+    7,
+    35,
+    1,
+    '',
+    'transactions.proto'
+)
+# @@protoc_insertion_point(imports)
+
+_sym_db = _symbol_database.Default()
+
+
+
+
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x12transactions.proto\x12\x0ctransactions\"\xbd\x02\n\x18InsertTransactionRequest\x12\x16\n\x0etransaction_id\x18\x01 \x01(\t\x12\x11\n\ttimestamp\x18\x02 \x01(\t\x12\x16\n\x0esender_account\x18\x03 \x01(\t\x12\x18\n\x10receiver_account\x18\x04 \x01(\t\x12\x0e\n\x06\x61mount\x18\x05 \x01(\x01\x12\x18\n\x10transaction_type\x18\x06 \x01(\t\x12\x19\n\x11merchant_category\x18\x07 \x01(\t\x12\x10\n\x08location\x18\x08 \x01(\t\x12\x13\n\x0b\x64\x65vice_used\x18\t \x01(\t\x12\x17\n\x0fpayment_channel\x18\n \x01(\t\x12\x12\n\nip_address\x18\x0b \x01(\t\x12\x13\n\x0b\x64\x65vice_hash\x18\x0c \x01(\t\x12\x16\n\x0e\x63orrelation_id\x18\r \x01(\t\"+\n\x19InsertTransactionResponse\x12\x0e\n\x06status\x18\x01 \x01(\t\"Y\n\x19InsertTransactionsRequest\x12<\n\x0ctransactions\x18\x01 \x03(\x0b\x32&.transactions.InsertTransactionRequest\"]\n\x0cInsertResult\x12\x16\n\x0etransaction_id\x18\x01 \x01(\t\x12\x16\n\x0e\x63orrelation_id\x18\x02 \x01(\t\x12\x0e\n\x06status\x18\x03 \x01(\t\x12\r\n\x05\x65rror\x18\x04 \x01(\t\"\x90\x01\n\x1aInsertTransactionsResponse\x12+\n\x07results\x18\x01 \x03(\x0b\x32\x1a.transactions.InsertResult\x12\x10\n\x08inserted\x18\x02 \x01(\x05\x12\x12\n\nduplicates\x18\x03 \x01(\x05\x12\x0f\n\x07invalid\x18\x04 \x01(\x05\x12\x0e\n\x06\x66\x61iled\x18\x05 \x01(\x05\"\xc1\x01\n\x11TransactionsQuery\x12\x16\n\x0esender_account\x18\x01 \x01(\t\x12\x18\n\x10receiver_account\x18\x02 \x01(\t\x12\x16\n\x0e\x63orrelation_id\x18\x03 \x01(\t\x12\x16\n\x0e\x66rom_timestamp\x18\x04 \x01(\t\x12\x14\n\x0cto_timestamp\x18\x05 \x01(\t\x12\r\n\x05limit\x18\x06 \x01(\x05\x12\x12\n\npage_token\x18\x07 \x01(\t\x12\x11\n\tascending\x18\x08 \x01(\x08\"\xc3\x02\n\x12HistoryTransaction\x12\x16\n\x0etransaction_id\x18\x01 \x01(\t\x12\x11\n\ttimestamp\x18\x02 \x01(\t\x12\x16\n\x0esender_account\x18\x03 \x01(\t\x12\x18\n\x10receiver_account\x18\x04 \x01(\t\x12\x0e\n\x06\x61mount\x18\x05 \x01(\x01\x12\x18\n\x10transaction_type\x18\x06 \x01(\t\x12\x19\n\x11merchant_category\x18\x07 \x01(\t\x12\x10\n\x08location\x18\x08 \x01(\t\x12\x13\n\x0b\x64\x65vice_used\x18\t \x01(\t\x12\x17\n\x0fpayment_channel\x18\n \x01(\t\x12\x12\n\nip_address\x18\x0b \x01(\t\x12\x13\n\x0b\x64\x65vice_hash\x18\x0c \x01(\t\x12\x16\n\x0e\x63orrelation_id\x18\r \x01(\t\x12\n\n\x02id\x18\x0e \x01(\x03\"c\n\x10TransactionsPage\x12\x36\n\x0ctransactions\x18\x01 \x03(\x0b\x32 .transactions.HistoryTransaction\x12\x17\n\x0fnext_page_token\x18\x02 \x01(\t\"i\n\x13\x41\x63\x63ountStatsRequest\x12\x0f\n\x07\x61\x63\x63ount\x18\x01 \x01(\t\x12\x13\n\x0bgranularity\x18\x02 \x01(\t\x12\x16\n\x0e\x66rom_timestamp\x18\x03 \x01(\t\x12\x14\n\x0cto_timestamp\x18\x04 \x01(\t\"\x8c\x01\n\x12\x41\x63\x63ountStatsBucket\x12\x0e\n\x06\x62ucket\x18\x01 \x01(\t\x12\r\n\x05\x63ount\x18\x02 \x01(\x03\x12\x12\n\namount_sum\x18\x03 \x01(\x01\x12\x15\n\ramount_sum_sq\x18\x04 \x01(\x01\x12\x12\n\nmax_amount\x18\x05 \x01(\x01\x12\x18\n\x10\x64istinct_devices\x18\x06 \x01(\x05\"\xd7\x01\n\x14\x41\x63\x63ountStatsResponse\x12\x0f\n\x07\x61\x63\x63ount\x18\x01 \x01(\t\x12\r\n\x05\x63ount\x18\x02 \x01(\x03\x12\x12\n\namount_sum\x18\x03 \x01(\x01\x12\x13\n\x0bmean_amount\x18\x04 \x01(\x01\x12\x15\n\rstddev_amount\x18\x05 \x01(\x01\x12\x12\n\nmax_amount\x18\x06 \x01(\x01\x12\x18\n\x10\x64istinct_devices\x18\x07 \x01(\x05\x12\x31\n\x07\x62uckets\x18\x08 \x03(\x0b\x32 .transactions.AccountStatsBucket\"\x14\n\x12HealthCheckRequest\"%\n\x13HealthCheckResponse\x12\x0e\n\x06status\x18\x01 \x01(\t2\xac\x05\n\x0eTransactionsDB\x12\x64\n\x11InsertTransaction\x12&.transactions.InsertTransactionRequest\x1a\'.transactions.InsertTransactionResponse\x12g\n\x12InsertTransactions\x12\'.transactions.InsertTransactionsRequest\x1a(.transactions.InsertTransactionsResponse\x12n\n\x18InsertTransactionsStream\x12&.transactions.InsertTransactionRequest\x1a(.transactions.InsertTransactionsResponse(\x01\x12R\n\x0fGetTransactions\x12\x1f.transactions.TransactionsQuery\x1a\x1e.transactions.TransactionsPage\x12Y\n\x12StreamTransactions\x12\x1f.transactions.TransactionsQuery\x1a .transactions.HistoryTransaction0\x01\x12X\n\x0fGetAccountStats\x12!.transactions.AccountStatsRequest\x1a\".transactions.AccountStatsResponse\x12R\n\x0bHealthCheck\x12 .transactions.HealthCheckRequest\x1a!.transactions.HealthCheckResponseb\x06proto3')
+
+_globals = globals()
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'transactions_pb2', _globals)
+if not _descriptor._USE_C_DESCRIPTORS:
+  DESCRIPTOR._loaded_options = None
+  _globals['_INSERTTRANSACTIONREQUEST']._serialized_start=37
+  _globals['_INSERTTRANSACTIONREQUEST']._serialized_end=354
+  _globals['_INSERTTRANSACTIONRESPONSE']._serialized_start=356
+  _globals['_INSERTTRANSACTIONRESPONSE']._serialized_end=399
+  _globals['_INSERTTRANSACTIONSREQUEST']._serialized_start=401
+  _globals['_INSERTTRANSACTIONSREQUEST']._serialized_end=490
+  _globals['_INSERTRESULT']._serialized_start=492
+  _globals['_INSERTRESULT']._serialized_end=585
+  _globals['_INSERTTRANSACTIONSRESPONSE']._serialized_start=588
+  _globals['_INSERTTRANSACTIONSRESPONSE']._serialized_end=732
+  _globals['_TRANSACTIONSQUERY']._serialized_start=735
+  _globals['_TRANSACTIONSQUERY']._serialized_end=928
+  _globals['_HISTORYTRANSACTION']._serialized_start=931
+  _globals['_HISTORYTRANSACTION']._serialized_end=1254
+  _globals['_TRANSACTIONSPAGE']._serialized_start=1256
+  _globals['_TRANSACTIONSPAGE']._serialized_end=1355
+  _globals['_ACCOUNTSTATSREQUEST']._serialized_start=1357
+  _globals['_ACCOUNTSTATSREQUEST']._serialized_end=1462
+  _globals['_ACCOUNTSTATSBUCKET']._serialized_start=1465
+  _globals['_ACCOUNTSTATSBUCKET']._serialized_end=1605
+  _globals['_ACCOUNTSTATSRESPONSE']._serialized_start=1608
+  _globals['_ACCOUNTSTATSRESPONSE']._serialized_end=1823
+  _globals['_HEALTHCHECKREQUEST']._serialized_start=1825
+  _globals['_HEALTHCHECKREQUEST']._serialized_end=1845
+  _globals['_HEALTHCHECKRESPONSE']._serialized_start=1847
+  _globals['_HEALTHCHECKRESPONSE']._serialized_end=1884
+  _globals['_TRANSACTIONSDB']._serialized_start=1887
+  _globals['_TRANSACTIONSDB']._serialized_end=2571
+# @@protoc_insertion_point(module_scope)
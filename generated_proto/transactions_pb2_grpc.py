@@ -0,0 +1,355 @@
+# Generated by the gRPC Python protocol compiler plugin. DO NOT EDIT!
+"""Client and server classes corresponding to protobuf-defined services."""
+import grpc
+import warnings
+
+from generated_proto import transactions_pb2 as transactions__pb2
+
+GRPC_GENERATED_VERSION = '1.84.0'
+GRPC_VERSION = grpc.__version__
+_version_not_supported = False
+
+try:
+    from grpc._utilities import first_version_is_lower
+    _version_not_supported = first_version_is_lower(GRPC_VERSION, GRPC_GENERATED_VERSION)
+except ImportError:
+    _version_not_supported = True
+
+if _version_not_supported:
+    raise RuntimeError(
+        f'The grpc package installed is at version {GRPC_VERSION},'
+        + ' but the generated code in transactions_pb2_grpc.py depends on'
+        + f' grpcio>={GRPC_GENERATED_VERSION}.'
+        + f' Please upgrade your grpc module to grpcio>={GRPC_GENERATED_VERSION}'
+        + f' or downgrade your generated code using grpcio-tools<={GRPC_VERSION}.'
+    )
+
+
+class TransactionsDBStub:
+    """Missing associated documentation comment in .proto file."""
+
+    def __init__(self, channel):
+        """Constructor.
+
+        Args:
+            channel: A grpc.Channel.
+        """
+        self.InsertTransaction = channel.unary_unary(
+                '/transactions.TransactionsDB/InsertTransaction',
+                request_serializer=transactions__pb2.InsertTransactionRequest.SerializeToString,
+                response_deserializer=transactions__pb2.InsertTransactionResponse.FromString,
+                _registered_method=True)
+        self.InsertTransactions = channel.unary_unary(
+                '/transactions.TransactionsDB/InsertTransactions',
+                request_serializer=transactions__pb2.InsertTransactionsRequest.SerializeToString,
+                response_deserializer=transactions__pb2.InsertTransactionsResponse.FromString,
+                _registered_method=True)
+        self.InsertTransactionsStream = channel.stream_unary(
+                '/transactions.TransactionsDB/InsertTransactionsStream',
+                request_serializer=transactions__pb2.InsertTransactionRequest.SerializeToString,
+                response_deserializer=transactions__pb2.InsertTransactionsResponse.FromString,
+                _registered_method=True)
+        self.GetTransactions = channel.unary_unary(
+                '/transactions.TransactionsDB/GetTransactions',
+                request_serializer=transactions__pb2.TransactionsQuery.SerializeToString,
+                response_deserializer=transactions__pb2.TransactionsPage.FromString,
+                _registered_method=True)
+        self.StreamTransactions = channel.unary_stream(
+                '/transactions.TransactionsDB/StreamTransactions',
+                request_serializer=transactions__pb2.TransactionsQuery.SerializeToString,
+                response_deserializer=transactions__pb2.HistoryTransaction.FromString,
+                _registered_method=True)
+        self.GetAccountStats = channel.unary_unary(
+                '/transactions.TransactionsDB/GetAccountStats',
+                request_serializer=transactions__pb2.AccountStatsRequest.SerializeToString,
+                response_deserializer=transactions__pb2.AccountStatsResponse.FromString,
+                _registered_method=True)
+        self.HealthCheck = channel.unary_unary(
+                '/transactions.TransactionsDB/HealthCheck',
+                request_serializer=transactions__pb2.HealthCheckRequest.SerializeToString,
+                response_deserializer=transactions__pb2.HealthCheckResponse.FromString,
+                _registered_method=True)
+
+
+class TransactionsDBServicer:
+    """Missing associated documentation comment in .proto file."""
+
+    def InsertTransaction(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def InsertTransactions(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def InsertTransactionsStream(self, request_iterator, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetTransactions(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def StreamTransactions(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetAccountStats(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def HealthCheck(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+
+def add_TransactionsDBServicer_to_server(servicer, server):
+    rpc_method_handlers = {
+            'InsertTransaction': grpc.unary_unary_rpc_method_handler(
+                    servicer.InsertTransaction,
+                    request_deserializer=transactions__pb2.InsertTransactionRequest.FromString,
+                    response_serializer=transactions__pb2.InsertTransactionResponse.SerializeToString,
+            ),
+            'InsertTransactions': grpc.unary_unary_rpc_method_handler(
+                    servicer.InsertTransactions,
+                    request_deserializer=transactions__pb2.InsertTransactionsRequest.FromString,
+                    response_serializer=transactions__pb2.InsertTransactionsResponse.SerializeToString,
+            ),
+            'InsertTransactionsStream': grpc.stream_unary_rpc_method_handler(
+                    servicer.InsertTransactionsStream,
+                    request_deserializer=transactions__pb2.InsertTransactionRequest.FromString,
+                    response_serializer=transactions__pb2.InsertTransactionsResponse.SerializeToString,
+            ),
+            'GetTransactions': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetTransactions,
+                    request_deserializer=transactions__pb2.TransactionsQuery.FromString,
+                    response_serializer=transactions__pb2.TransactionsPage.SerializeToString,
+            ),
+            'StreamTransactions': grpc.unary_stream_rpc_method_handler(
+                    servicer.StreamTransactions,
+                    request_deserializer=transactions__pb2.TransactionsQuery.FromString,
+                    response_serializer=transactions__pb2.HistoryTransaction.SerializeToString,
+            ),
+            'GetAccountStats': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetAccountStats,
+                    request_deserializer=transactions__pb2.AccountStatsRequest.FromString,
+                    response_serializer=transactions__pb2.AccountStatsResponse.SerializeToString,
+            ),
+            'HealthCheck': grpc.unary_unary_rpc_method_handler(
+                    servicer.HealthCheck,
+                    request_deserializer=transactions__pb2.HealthCheckRequest.FromString,
+                    response_serializer=transactions__pb2.HealthCheckResponse.SerializeToString,
+            ),
+    }
+    generic_handler = grpc.method_handlers_generic_handler(
+            'transactions.TransactionsDB', rpc_method_handlers)
+    server.add_generic_rpc_handlers((generic_handler,))
+    server.add_registered_method_handlers('transactions.TransactionsDB', rpc_method_handlers)
+
+
+ # This class is part of an EXPERIMENTAL API.
+class TransactionsDB:
+    """Missing associated documentation comment in .proto file."""
+
+    @staticmethod
+    def InsertTransaction(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/transactions.TransactionsDB/InsertTransaction',
+            transactions__pb2.InsertTransactionRequest.SerializeToString,
+            transactions__pb2.InsertTransactionResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def InsertTransactions(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/transactions.TransactionsDB/InsertTransactions',
+            transactions__pb2.InsertTransactionsRequest.SerializeToString,
+            transactions__pb2.InsertTransactionsResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def InsertTransactionsStream(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_unary(
+            request_iterator,
+            target,
+            '/transactions.TransactionsDB/InsertTransactionsStream',
+            transactions__pb2.InsertTransactionRequest.SerializeToString,
+            transactions__pb2.InsertTransactionsResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def GetTransactions(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/transactions.TransactionsDB/GetTransactions',
+            transactions__pb2.TransactionsQuery.SerializeToString,
+            transactions__pb2.TransactionsPage.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def StreamTransactions(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/transactions.TransactionsDB/StreamTransactions',
+            transactions__pb2.TransactionsQuery.SerializeToString,
+            transactions__pb2.HistoryTransaction.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def GetAccountStats(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/transactions.TransactionsDB/GetAccountStats',
+            transactions__pb2.AccountStatsRequest.SerializeToString,
+            transactions__pb2.AccountStatsResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def HealthCheck(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/transactions.TransactionsDB/HealthCheck',
+            transactions__pb2.HealthCheckRequest.SerializeToString,
+            transactions__pb2.HealthCheckResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
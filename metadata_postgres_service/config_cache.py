@@ -0,0 +1,116 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Generic, Optional, TypeVar
+
+from database import MLConfigSnapshot, RulesSnapshot
+
+logger = logging.getLogger(__name__)
+
+Snapshot = TypeVar("Snapshot", MLConfigSnapshot, RulesSnapshot)
+
+
+class SnapshotCache(Generic[Snapshot]):
+    """
+    Версионированный снимок из БД в памяти сервиса
+
+    Запросы обслуживаются из памяти; в БД идёт только промах по TTL
+    или принудительный refresh. Параллельные промахи ждут один запрос к БД.
+    """
+
+    name = "cache"
+
+    def __init__(self, load: Callable[[], Awaitable[Snapshot]], ttl: float = 30.0):
+        self.load = load
+        self.ttl = ttl
+
+        self._snapshot: Optional[Snapshot] = None
+        self._expires_at = 0.0
+        self._lock = asyncio.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.db_queries = 0
+        self.not_modified = 0
+
+    async def get(self) -> Snapshot:
+        """Снимок из кэша; перечитывается из БД, если истёк TTL"""
+        if self._fresh():
+            self.hits += 1
+            return self._snapshot
+
+        self.misses += 1
+        async with self._lock:
+            if self._fresh():
+                return self._snapshot
+            return await self._load()
+
+    async def refresh(self) -> Snapshot:
+        """Принудительно перечитывает снимок"""
+        async with self._lock:
+            return await self._load()
+
+    def metrics(self) -> Dict[str, float]:
+        requests = self.hits + self.misses
+        return {
+            f"{self.name}.hits": float(self.hits),
+            f"{self.name}.misses": float(self.misses),
+            f"{self.name}.hit_ratio": self.hits / requests if requests else 0.0,
+            f"{self.name}.db_queries": float(self.db_queries),
+            f"{self.name}.not_modified": float(self.not_modified),
+            f"{self.name}.version": float(self._snapshot.version) if self._snapshot else 0.0,
+        }
+
+    def _fresh(self) -> bool:
+        return (
+            self._snapshot is not None
+            and asyncio.get_running_loop().time() < self._expires_at
+        )
+
+    async def _load(self) -> Snapshot:
+        self.db_queries += 1
+        snapshot = await self.load()
+
+        if self._snapshot is None or snapshot.version != self._snapshot.version:
+            self._log_version(snapshot)
+
+        self._snapshot = snapshot
+        self._expires_at = asyncio.get_running_loop().time() + self.ttl
+        return snapshot
+
+    def _log_version(self, snapshot: Snapshot):
+        logger.info(f"{self.name} version {snapshot.version}")
+
+
+class MLConfigCache(SnapshotCache[MLConfigSnapshot]):
+    """
+    Кэш ML конфига для GetMLConfig
+
+    Помимо TTL конфиг перечитывается по NOTIFY (refresh из MLConfigWatcher).
+    """
+
+    name = "config_cache"
+
+    @property
+    def config(self) -> Optional[MLConfigSnapshot]:
+        return self._snapshot
+
+    def _log_version(self, config: MLConfigSnapshot):
+        logger.info(f"ML config version {config.version}: threshold={config.threshold}")
+
+
+class RulesCache(SnapshotCache[RulesSnapshot]):
+    """
+    Кэш набора правил антифрода для GetRules
+
+    Шлюзы опрашивают GetRules с if_version каждые несколько секунд:
+    пока TTL не истёк, ответ not_modified обходится без БД.
+    """
+
+    name = "rules_cache"
+
+    @property
+    def rules(self) -> Optional[RulesSnapshot]:
+        return self._snapshot
+
+    def _log_version(self, snapshot: RulesSnapshot):
+        logger.info(f"Fraud rules version {snapshot.version}: {len(snapshot.rules)} rules")
@@ -0,0 +1,117 @@
+import asyncio
+import logging
+from typing import Optional, Set
+
+from config_cache import MLConfigCache
+from database import ML_CONFIGS_CHANNEL, MLConfigSnapshot, listen_connection
+
+logger = logging.getLogger(__name__)
+
+
+class MLConfigWatcher:
+    """
+    Рассылка изменений ml_configs подписчикам WatchMLConfig
+
+    Держит LISTEN на отдельном соединении; по уведомлению триггера
+    обновляет MLConfigCache и кладёт новую версию конфига в очередь каждого
+    подписчика (в очереди хранится только последнее значение). При обрыве соединения
+    переподключается и перечитывает конфиг: уведомления, пришедшие
+    без соединения, потеряны.
+    """
+
+    def __init__(
+        self,
+        cache: MLConfigCache,
+        ping_interval: float = 5.0,
+        reconnect_delay: float = 1.0,
+        max_reconnect_delay: float = 30.0
+    ):
+        self.cache = cache
+        self.ping_interval = ping_interval
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+
+        self.config: Optional[MLConfigSnapshot] = None
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._changed = asyncio.Event()
+        self._tasks = []
+
+    def subscribe(self) -> asyncio.Queue:
+        """Очередь обновлений; текущее значение кладётся в неё сразу"""
+        queue = asyncio.Queue(maxsize=1)
+        if self.config is not None:
+            queue.put_nowait(self.config)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+
+    def start(self):
+        if not self._tasks:
+            self._tasks = [
+                asyncio.create_task(self._listen()),
+                asyncio.create_task(self._reload_on_change()),
+            ]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def _on_notify(self, connection, pid, channel, payload):
+        self._changed.set()
+
+    async def _listen(self):
+        delay = self.reconnect_delay
+        while True:
+            connection = None
+            try:
+                connection = await listen_connection()
+                await connection.add_listener(ML_CONFIGS_CHANNEL, self._on_notify)
+                logger.info(f"Listening on {ML_CONFIGS_CHANNEL}")
+
+                self._changed.set()
+                delay = self.reconnect_delay
+
+                # Обрыв соединения обнаруживается по ошибке ping'а
+                while True:
+                    await asyncio.sleep(self.ping_interval)
+                    await connection.execute("SELECT 1")
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Config listener failed, reconnecting in {delay}s: {e}")
+            finally:
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    async def _reload_on_change(self):
+        while True:
+            await self._changed.wait()
+            self._changed.clear()
+
+            try:
+                config = await self.cache.refresh()
+            except Exception as e:
+                logger.error(f"Failed to reload ml config: {e}")
+                await asyncio.sleep(self.reconnect_delay)
+                self._changed.set()
+                continue
+
+            if self.config is not None and config.version == self.config.version:
+                continue
+
+            self.config = config
+            self._publish(config)
+
+    def _publish(self, config: MLConfigSnapshot):
+        for queue in self._subscribers:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(config)
@@ -0,0 +1,14 @@
+CREATE TABLE IF NOT EXISTS model_versions (
+    id SERIAL PRIMARY KEY,
+    version VARCHAR(64) NOT NULL UNIQUE,
+    artifact_path TEXT NOT NULL,
+    feature_list_path TEXT NOT NULL,
+    threshold DECIMAL(5, 3) NOT NULL DEFAULT 0.5,
+    checksum VARCHAR(64) NOT NULL,
+    is_active BOOLEAN NOT NULL DEFAULT FALSE,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+-- Активной может быть только одна версия
+CREATE UNIQUE INDEX IF NOT EXISTS model_versions_single_active
+    ON model_versions (is_active) WHERE is_active;
@@ -0,0 +1,13 @@
+-- Уведомление подписчиков WatchMLConfig при любом изменении ml_configs
+CREATE OR REPLACE FUNCTION notify_ml_configs_changed() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('ml_configs_changed', TG_OP);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS ml_configs_changed ON ml_configs;
+
+CREATE TRIGGER ml_configs_changed
+    AFTER INSERT OR UPDATE OR DELETE ON ml_configs
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_ml_configs_changed();
@@ -0,0 +1,26 @@
+-- Версия ML конфига: растёт при каждом изменении ml_configs.
+-- Хранится в строке таблицы, а не только в sequence, чтобы читаться
+-- в одном снимке с самим конфигом.
+CREATE SEQUENCE IF NOT EXISTS ml_configs_version_seq;
+
+CREATE TABLE IF NOT EXISTS ml_configs_state (
+    id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+    version BIGINT NOT NULL
+);
+
+INSERT INTO ml_configs_state (id, version)
+VALUES (TRUE, nextval('ml_configs_version_seq'))
+ON CONFLICT (id) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION notify_ml_configs_changed() RETURNS trigger AS $$
+DECLARE
+    new_version BIGINT;
+BEGIN
+    UPDATE ml_configs_state
+    SET version = nextval('ml_configs_version_seq')
+    RETURNING version INTO new_version;
+
+    PERFORM pg_notify('ml_configs_changed', new_version::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
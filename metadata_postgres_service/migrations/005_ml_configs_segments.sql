@@ -0,0 +1,34 @@
+-- Именованные конфиги по сегментам трафика. NULL в колонке сегмента
+-- означает "любое значение"; model_version NULL - активная версия из реестра.
+ALTER TABLE ml_configs ADD COLUMN IF NOT EXISTS name VARCHAR(64);
+ALTER TABLE ml_configs ADD COLUMN IF NOT EXISTS payment_channel VARCHAR(50);
+ALTER TABLE ml_configs ADD COLUMN IF NOT EXISTS transaction_type VARCHAR(50);
+ALTER TABLE ml_configs ADD COLUMN IF NOT EXISTS merchant_category VARCHAR(50);
+ALTER TABLE ml_configs ADD COLUMN IF NOT EXISTS model_version VARCHAR(64);
+ALTER TABLE ml_configs ADD COLUMN IF NOT EXISTS traffic_weight DOUBLE PRECISION NOT NULL DEFAULT 1;
+ALTER TABLE ml_configs ADD COLUMN IF NOT EXISTS mode VARCHAR(10) NOT NULL DEFAULT 'live';
+
+DO $$
+BEGIN
+    -- UPDATE без условия запустил бы триггер и поднял версию конфига на каждом старте
+    IF EXISTS (SELECT 1 FROM ml_configs WHERE name IS NULL) THEN
+        UPDATE ml_configs
+        SET name = CASE WHEN id = (SELECT MIN(id) FROM ml_configs) THEN 'default' ELSE 'config-' || id END
+        WHERE name IS NULL;
+    END IF;
+
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'ml_configs_mode_check') THEN
+        ALTER TABLE ml_configs
+            ADD CONSTRAINT ml_configs_mode_check CHECK (mode IN ('live', 'shadow'));
+    END IF;
+
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'ml_configs_traffic_weight_check') THEN
+        ALTER TABLE ml_configs
+            ADD CONSTRAINT ml_configs_traffic_weight_check CHECK (traffic_weight >= 0);
+    END IF;
+END
+$$;
+
+ALTER TABLE ml_configs ALTER COLUMN name SET NOT NULL;
+
+CREATE UNIQUE INDEX IF NOT EXISTS ml_configs_name ON ml_configs (name);
@@ -0,0 +1,40 @@
+-- Декларативные правила антифрода. params - JSON с параметрами правила
+-- своего rule_type; правила применяются по возрастанию priority.
+CREATE TABLE IF NOT EXISTS fraud_rules (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(64) NOT NULL UNIQUE,
+    rule_type VARCHAR(32) NOT NULL CHECK (
+        rule_type IN ('amount_limit', 'blocked_device', 'blocked_ip_range', 'type_channel', 'velocity_cap')
+    ),
+    params JSONB NOT NULL DEFAULT '{}',
+    action VARCHAR(10) NOT NULL DEFAULT 'decline' CHECK (action IN ('decline', 'review')),
+    priority INTEGER NOT NULL DEFAULT 100,
+    enabled BOOLEAN NOT NULL DEFAULT TRUE,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+-- Версия набора правил, как у ml_configs: клиенты опрашивают GetRules
+-- с if_version и перекомпилируют правила только при изменении
+CREATE SEQUENCE IF NOT EXISTS fraud_rules_version_seq;
+
+CREATE TABLE IF NOT EXISTS fraud_rules_state (
+    id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+    version BIGINT NOT NULL
+);
+
+INSERT INTO fraud_rules_state (id, version)
+VALUES (TRUE, nextval('fraud_rules_version_seq'))
+ON CONFLICT (id) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION bump_fraud_rules_version() RETURNS trigger AS $$
+BEGIN
+    UPDATE fraud_rules_state SET version = nextval('fraud_rules_version_seq');
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS fraud_rules_changed ON fraud_rules;
+
+CREATE TRIGGER fraud_rules_changed
+    AFTER INSERT OR UPDATE OR DELETE ON fraud_rules
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_fraud_rules_version();
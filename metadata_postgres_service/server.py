@@ -4,11 +4,22 @@ import logging
 import os
 import sys
 from pathlib import Path
-from sqlalchemy import select
+from typing import Optional
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
 from grpc_reflection.v1alpha import reflection
 
 from generated_proto import metadata_pb2, metadata_pb2_grpc
-from database import async_session_maker, init_db, MLConfig
+from config_cache import MLConfigCache, RulesCache
+from config_watch import MLConfigWatcher
+from database import (
+    async_session_maker,
+    init_db,
+    load_fraud_rules,
+    load_ml_config,
+    MLConfigSnapshot,
+    ModelVersion,
+)
 
 logging.basicConfig(
     level=logging.INFO,
@@ -17,32 +28,214 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 GRPC_PORT = os.getenv("GRPC_PORT", "50052")
+CONFIG_CACHE_TTL = float(os.getenv("CONFIG_CACHE_TTL", "30"))
+RULES_CACHE_TTL = float(os.getenv("RULES_CACHE_TTL", "5"))
 
 class MetadataDBServicer(metadata_pb2_grpc.MetadataDBServicer):
     """Async реализация MetadataDB сервиса"""
+
+    def __init__(
+        self,
+        config_cache: MLConfigCache,
+        config_watcher: MLConfigWatcher,
+        rules_cache: Optional[RulesCache] = None
+    ):
+        self.config_cache = config_cache
+        self.config_watcher = config_watcher
+        self.rules_cache = rules_cache or RulesCache(load_fraud_rules, ttl=RULES_CACHE_TTL)
     
     async def GetMLConfig(self, request, context):
-        """Получить ML конфиг (threshold)"""
+        """
+        Получить ML конфиг (threshold) из кэша
+
+        Если if_version совпадает с текущей версией, возвращается
+        not_modified=True без самого конфига.
+        """
+        try:
+            config = await self.config_cache.get()
+
+            if request.if_version and request.if_version == config.version:
+                self.config_cache.not_modified += 1
+                return metadata_pb2.MLConfigResponse(
+                    version=config.version,
+                    not_modified=True
+                )
+
+            logger.info(
+                f"GetMLConfig: threshold={config.threshold}, version={config.version}, "
+                f"configs={len(config.configs)}"
+            )
+
+            return self._config_to_proto(config)
+
+        except Exception as e:
+            logger.error(f"GetMLConfig failed: {e}")
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(str(e))
+            return metadata_pb2.MLConfigResponse(threshold=0.5)
+
+    async def WatchMLConfig(self, request, context):
+        """Стрим ML конфига: текущее значение, затем каждое изменение ml_configs"""
+        updates = self.config_watcher.subscribe()
+        try:
+            while True:
+                config = await updates.get()
+                yield self._config_to_proto(config)
+        finally:
+            self.config_watcher.unsubscribe(updates)
+
+    async def GetMetrics(self, request, context):
+        """Метрики кэшей конфига и правил"""
+        return metadata_pb2.MetricsResponse(
+            metrics={**self.config_cache.metrics(), **self.rules_cache.metrics()}
+        )
+
+    async def RegisterModelVersion(self, request, context):
+        """Регистрирует версию модели, при activate=True сразу делает её активной"""
+        async with async_session_maker() as db:
+            try:
+                model = ModelVersion(
+                    version=request.model.version,
+                    artifact_path=request.model.artifact_path,
+                    feature_list_path=request.model.feature_list_path,
+                    threshold=request.model.threshold,
+                    checksum=request.model.checksum,
+                    is_active=False
+                )
+                db.add(model)
+                await db.flush()
+
+                if request.activate:
+                    await self._activate(db, model.version)
+                    model.is_active = True
+
+                await db.commit()
+                logger.info(
+                    f"RegisterModelVersion: version={model.version}, active={model.is_active}"
+                )
+
+                return metadata_pb2.ModelVersionResponse(
+                    found=True,
+                    model=self._model_version_to_proto(model)
+                )
+
+            except IntegrityError:
+                await db.rollback()
+                context.set_code(grpc.StatusCode.ALREADY_EXISTS)
+                context.set_details(f"Model version {request.model.version} already exists")
+                return metadata_pb2.ModelVersionResponse(found=False)
+
+            except Exception as e:
+                logger.error(f"RegisterModelVersion failed: {e}")
+                context.set_code(grpc.StatusCode.INTERNAL)
+                context.set_details(str(e))
+                return metadata_pb2.ModelVersionResponse(found=False)
+
+    async def ActivateModelVersion(self, request, context):
+        """Делает версию активной; ML сервисы подхватят её при следующем опросе"""
         async with async_session_maker() as db:
             try:
-                result = await db.execute(select(MLConfig))
-                config = result.scalars().first()
-                
-                if config:
-                    threshold = float(config.threshold)
-                else:
-                    threshold = 0.5
-                
-                logger.info(f"GetMLConfig: threshold={threshold}")
-                
-                return metadata_pb2.MLConfigResponse(threshold=threshold)
-                
+                result = await db.execute(
+                    select(ModelVersion).where(ModelVersion.version == request.version)
+                )
+                model = result.scalars().first()
+
+                if not model:
+                    context.set_code(grpc.StatusCode.NOT_FOUND)
+                    context.set_details(f"Model version {request.version} not found")
+                    return metadata_pb2.ModelVersionResponse(found=False)
+
+                await self._activate(db, model.version)
+                await db.commit()
+                await db.refresh(model)
+                logger.info(f"ActivateModelVersion: version={model.version}")
+
+                return metadata_pb2.ModelVersionResponse(
+                    found=True,
+                    model=self._model_version_to_proto(model)
+                )
+
             except Exception as e:
-                logger.error(f"GetMLConfig failed: {e}")
+                logger.error(f"ActivateModelVersion failed: {e}")
                 context.set_code(grpc.StatusCode.INTERNAL)
                 context.set_details(str(e))
-                return metadata_pb2.MLConfigResponse(threshold=0.5)
-    
+                return metadata_pb2.ModelVersionResponse(found=False)
+
+    async def GetActiveModelVersion(self, request, context):
+        """Текущая активная версия модели (found=False, если не назначена)"""
+        async with async_session_maker() as db:
+            try:
+                result = await db.execute(
+                    select(ModelVersion).where(ModelVersion.is_active.is_(True))
+                )
+                model = result.scalars().first()
+
+                if not model:
+                    return metadata_pb2.ModelVersionResponse(found=False)
+
+                return metadata_pb2.ModelVersionResponse(
+                    found=True,
+                    model=self._model_version_to_proto(model)
+                )
+
+            except Exception as e:
+                logger.error(f"GetActiveModelVersion failed: {e}")
+                context.set_code(grpc.StatusCode.INTERNAL)
+                context.set_details(str(e))
+                return metadata_pb2.ModelVersionResponse(found=False)
+
+    async def GetModelVersion(self, request, context):
+        """Версия модели по имени (для конфигов, ссылающихся на неактивную версию)"""
+        async with async_session_maker() as db:
+            try:
+                result = await db.execute(
+                    select(ModelVersion).where(ModelVersion.version == request.version)
+                )
+                model = result.scalars().first()
+
+                if not model:
+                    context.set_code(grpc.StatusCode.NOT_FOUND)
+                    context.set_details(f"Model version {request.version} not found")
+                    return metadata_pb2.ModelVersionResponse(found=False)
+
+                return metadata_pb2.ModelVersionResponse(
+                    found=True,
+                    model=self._model_version_to_proto(model)
+                )
+
+            except Exception as e:
+                logger.error(f"GetModelVersion failed: {e}")
+                context.set_code(grpc.StatusCode.INTERNAL)
+                context.set_details(str(e))
+                return metadata_pb2.ModelVersionResponse(found=False)
+
+    async def GetRules(self, request, context):
+        """
+        Включённые правила антифрода в порядке применения из кэша
+
+        Если if_version совпадает с текущей версией набора, возвращается
+        not_modified=True без правил.
+        """
+        try:
+            snapshot = await self.rules_cache.get()
+
+            if request.if_version and request.if_version == snapshot.version:
+                self.rules_cache.not_modified += 1
+                return metadata_pb2.RulesResponse(version=snapshot.version, not_modified=True)
+
+            logger.info(f"GetRules: version={snapshot.version}, rules={len(snapshot.rules)}")
+
+            return metadata_pb2.RulesResponse(
+                version=snapshot.version,
+                rules=[metadata_pb2.FraudRule(**rule) for rule in snapshot.rules]
+            )
+
+        except Exception as e:
+            logger.error(f"GetRules failed: {e}")
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(str(e))
+            return metadata_pb2.RulesResponse()
+
     async def HealthCheck(self, request, context):
         """Health check"""
         async with async_session_maker() as db:
@@ -53,11 +246,54 @@ class MetadataDBServicer(metadata_pb2_grpc.MetadataDBServicer):
                 logger.error(f"Health check failed: {e}")
                 context.set_code(grpc.StatusCode.UNAVAILABLE)
                 return metadata_pb2.HealthCheckResponse(status="unhealthy")
+
+    @staticmethod
+    async def _activate(db, version: str):
+        """Снимает флаг со старой активной версии и ставит на новую в одной транзакции"""
+        await db.execute(
+            update(ModelVersion)
+            .where(ModelVersion.is_active.is_(True), ModelVersion.version != version)
+            .values(is_active=False)
+        )
+        await db.execute(
+            update(ModelVersion)
+            .where(ModelVersion.version == version)
+            .values(is_active=True)
+        )
+
+    @staticmethod
+    def _config_to_proto(config: MLConfigSnapshot) -> metadata_pb2.MLConfigResponse:
+        return metadata_pb2.MLConfigResponse(
+            threshold=config.threshold,
+            version=config.version,
+            configs=[
+                metadata_pb2.MLConfig(**{
+                    key: value for key, value in row.items() if value is not None
+                })
+                for row in config.configs
+            ]
+        )
+
+    @staticmethod
+    def _model_version_to_proto(model: ModelVersion) -> metadata_pb2.ModelVersion:
+        return metadata_pb2.ModelVersion(
+            version=model.version,
+            artifact_path=model.artifact_path,
+            feature_list_path=model.feature_list_path,
+            threshold=float(model.threshold),
+            checksum=model.checksum,
+            is_active=model.is_active
+        )
             
 async def serve():
     """Запуск async gRPC сервера"""
     logger.info("Initializing database...")
     await init_db()
+
+    config_cache = MLConfigCache(load_ml_config, ttl=CONFIG_CACHE_TTL)
+    rules_cache = RulesCache(load_fraud_rules, ttl=RULES_CACHE_TTL)
+    config_watcher = MLConfigWatcher(config_cache)
+    config_watcher.start()
     
     server = grpc.aio.server()
 
@@ -68,7 +304,7 @@ async def serve():
     reflection.enable_server_reflection(SERVICE_NAMES, server)
     
     metadata_pb2_grpc.add_MetadataDBServicer_to_server(
-        MetadataDBServicer(), 
+        MetadataDBServicer(config_cache, config_watcher, rules_cache),
         server
     )
     
@@ -84,6 +320,8 @@ async def serve():
     except KeyboardInterrupt:
         logger.info("Shutting down...")
         await server.stop(0)
+    finally:
+        await config_watcher.stop()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,201 @@
+import asyncio
+import bisect
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+PredictFn = Callable[[Sequence], Awaitable[Tuple[np.ndarray, np.ndarray]]]
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+QUEUE_DELAY_BUCKETS_MS = (0.25, 0.5, 1, 2, 5, 10, 25, 50, 100)
+
+
+class Histogram:
+    """Кумулятивная гистограмма с фиксированными границами бакетов"""
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = tuple(bounds)
+        self.buckets = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.buckets[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def snapshot(self, prefix: str) -> Dict[str, float]:
+        """Метрики в виде {"<prefix>.le_<граница>": накопленный счётчик, ...}"""
+        metrics = {
+            f"{prefix}.count": float(self.count),
+            f"{prefix}.sum": self.sum,
+            f"{prefix}.max": self.max,
+            f"{prefix}.avg": self.sum / self.count if self.count else 0.0,
+        }
+        cumulative = 0
+        for bound, bucket in zip(self.bounds + ("inf",), self.buckets):
+            cumulative += bucket
+            metrics[f"{prefix}.le_{bound}"] = float(cumulative)
+        return metrics
+
+
+class MicroBatcher:
+    """
+    Динамический микро-батчинг одиночных запросов
+
+    Каждый вызов submit кладёт запрос в общую очередь и ждёт future.
+    Фоновая задача забирает из очереди до max_batch_size запросов, ожидая
+    добора не дольше max_wait_ms от первого запроса, и скорит их одним
+    вызовом predict_fn. Одновременно выполняется не больше max_inflight батчей.
+    """
+
+    def __init__(
+        self,
+        predict_fn: PredictFn,
+        max_batch_size: int = 64,
+        max_wait_ms: float = 2.0,
+        max_inflight: int = 2,
+        max_queue_size: int = 10000
+    ):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size должен быть положительным")
+
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_inflight = max_inflight
+
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue_size)
+        self._inflight: Optional[asyncio.Semaphore] = None
+        self._tasks: set = set()
+        self._task: Optional[asyncio.Task] = None
+
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self.queue_delays_ms = Histogram(QUEUE_DELAY_BUCKETS_MS)
+        self.errors = 0
+
+    async def submit(self, request: Any) -> Tuple[float, bool]:
+        """
+        Скоринг одного запроса в составе батча
+
+        Returns:
+            (probability, is_fraud)
+        """
+        if not self._task:
+            self.start()
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        await self._queue.put((request, future, loop.time()))
+        return await future
+
+    def start(self):
+        if not self._task:
+            self._inflight = asyncio.Semaphore(self.max_inflight)
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """
+        Останавливает сбор батчей и дожидается уже запущенных
+
+        Запросы, оставшиеся в очереди, скорятся батчами без ожидания
+        добора, чтобы ни один вызывающий не остался без ответа.
+        """
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+        while not self._queue.empty():
+            batch = [self._queue.get_nowait() for _ in range(min(self._queue.qsize(), self.max_batch_size))]
+            await self._score(batch)
+
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._task = None
+
+    def metrics(self) -> Dict[str, float]:
+        """Распределение размеров батчей и задержки в очереди"""
+        metrics = {
+            "batcher.queue_size": float(self._queue.qsize()),
+            "batcher.inflight_batches": float(len(self._tasks)),
+            "batcher.errors": float(self.errors),
+        }
+        metrics.update(self.batch_sizes.snapshot("batcher.batch_size"))
+        metrics.update(self.queue_delays_ms.snapshot("batcher.queue_delay_ms"))
+        return metrics
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        batch = []
+        try:
+            while True:
+                batch = [await self._queue.get()]
+                deadline = batch[0][2] + self.max_wait
+
+                while len(batch) < self.max_batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                        continue
+                    except asyncio.QueueEmpty:
+                        pass
+
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                    except asyncio.TimeoutError:
+                        break
+
+                await self._inflight.acquire()
+                task = asyncio.create_task(self._score(batch))
+                batch = []
+                self._tasks.add(task)
+                task.add_done_callback(self._batch_done)
+        except asyncio.CancelledError:
+            # Собранный, но не запущенный батч скорится вне лимита
+            # max_inflight: stop дождётся его вместе с остальными
+            if batch:
+                task = asyncio.create_task(self._score(batch))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+            raise
+
+    def _batch_done(self, task: asyncio.Task):
+        self._tasks.discard(task)
+        self._inflight.release()
+
+    async def _score(self, batch: List[tuple]):
+        # Запросы, чей вызывающий уже отменил ожидание, не скорим
+        batch = [item for item in batch if not item[1].done()]
+        if not batch:
+            return
+
+        now = asyncio.get_running_loop().time()
+        self.batch_sizes.observe(len(batch))
+        for _, _, enqueued_at in batch:
+            self.queue_delays_ms.observe((now - enqueued_at) * 1000)
+
+        try:
+            probabilities, is_fraud = await self.predict_fn([request for request, _, _ in batch])
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Batch of {len(batch)} failed: {e}")
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future, _), probability, flag in zip(
+            batch, probabilities.tolist(), is_fraud.tolist()
+        ):
+            if not future.done():
+                future.set_result((probability, flag))
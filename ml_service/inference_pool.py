@@ -0,0 +1,162 @@
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, List, Optional, Tuple
+
+import lightgbm as lgb
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Состояние процесса-воркера: своя копия модели и подключённые слоты памяти
+_booster: Optional[lgb.Booster] = None
+_attached: Dict[str, Tuple[SharedMemory, np.ndarray, np.ndarray]] = {}
+
+
+def _slot_arrays(buffer, max_rows: int, num_features: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Матрица признаков float32 и вектор вероятностей float64 поверх одного буфера"""
+    features_size = max_rows * num_features * 4
+    scores_offset = (features_size + 7) // 8 * 8
+    features = np.ndarray((max_rows, num_features), dtype=np.float32, buffer=buffer)
+    scores = np.ndarray((max_rows,), dtype=np.float64, buffer=buffer, offset=scores_offset)
+    return features, scores
+
+
+def _slot_size(max_rows: int, num_features: int) -> int:
+    return (max_rows * num_features * 4 + 7) // 8 * 8 + max_rows * 8
+
+
+def _init_worker(model_path: str):
+    global _booster
+    _booster = lgb.Booster(model_file=model_path)
+
+
+def _predict_slot(slot_name: str, rows: int, max_rows: int, num_features: int):
+    """Скоринг первых rows строк слота; результат пишется в тот же слот"""
+    if slot_name not in _attached:
+        shm = SharedMemory(name=slot_name)
+        _attached[slot_name] = (shm, *_slot_arrays(shm.buf, max_rows, num_features))
+
+    _, features, scores = _attached[slot_name]
+    scores[:rows] = _booster.predict(features[:rows], num_threads=1)
+
+
+class _Slot:
+    def __init__(self, max_rows: int, num_features: int):
+        self.shm = SharedMemory(create=True, size=_slot_size(max_rows, num_features))
+        self.features, self.scores = _slot_arrays(self.shm.buf, max_rows, num_features)
+
+    def release(self):
+        del self.features, self.scores
+        self.shm.close()
+        self.shm.unlink()
+
+
+class ProcessInferencePool:
+    """
+    Инференс в пуле процессов
+
+    Каждый процесс загружает свою копию модели, поэтому скоринг не упирается
+    в GIL процесса с gRPC. Матрица признаков передаётся через shared memory:
+    родитель копирует её в свободный слот, процесс скорит слот и пишет туда
+    же вероятности; через pickle идут только имя слота и число строк.
+    Упавший пул пересоздаётся, запрос повторяется один раз.
+    """
+
+    def __init__(
+        self,
+        model_path: str,
+        num_features: int,
+        processes: int,
+        max_batch_rows: int = 1024
+    ):
+        self.model_path = model_path
+        self.num_features = num_features
+        self.processes = processes
+        self.max_batch_rows = max_batch_rows
+
+        self._context = multiprocessing.get_context("spawn")
+        self._slots: List[_Slot] = [
+            _Slot(max_batch_rows, num_features) for _ in range(processes * 2)
+        ]
+        self._free_slots: Optional[asyncio.Queue] = None
+        self._executor = self._create_executor()
+        self.restarts = 0
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=self._context,
+            initializer=_init_worker,
+            initargs=(self.model_path,)
+        )
+
+    async def predict(self, features: np.ndarray) -> np.ndarray:
+        """Вероятности для матрицы признаков; большие батчи режутся по max_batch_rows"""
+        if self._free_slots is None:
+            self._free_slots = asyncio.Queue()
+            for slot in self._slots:
+                self._free_slots.put_nowait(slot)
+
+        chunks = [
+            features[start:start + self.max_batch_rows]
+            for start in range(0, len(features), self.max_batch_rows)
+        ]
+        scores = await asyncio.gather(*(self._predict_chunk(chunk) for chunk in chunks))
+        return np.concatenate(scores) if scores else np.empty(0, dtype=np.float64)
+
+    async def _predict_chunk(self, chunk: np.ndarray) -> np.ndarray:
+        slot = await self._free_slots.get()
+        run = None
+        try:
+            rows = len(chunk)
+            slot.features[:rows] = chunk
+            run = asyncio.ensure_future(self._run(slot.shm.name, rows))
+            await asyncio.shield(run)
+            return slot.scores[:rows].copy()
+        finally:
+            if run is None or run.done():
+                self._free_slots.put_nowait(slot)
+            else:
+                # Запрос отменён (дедлайн клиента), а процесс ещё пишет в слот:
+                # слот вернётся в пул, когда скоринг закончится
+                run.add_done_callback(lambda done: self._release_after(done, slot))
+
+    def _release_after(self, run: asyncio.Future, slot: _Slot):
+        if not run.cancelled() and run.exception() is not None:
+            logger.error(f"Inference of a cancelled request failed: {run.exception()}")
+        self._free_slots.put_nowait(slot)
+
+    async def _run(self, slot_name: str, rows: int):
+        loop = asyncio.get_running_loop()
+        for attempt in range(2):
+            executor = self._executor
+            try:
+                return await loop.run_in_executor(
+                    executor, _predict_slot,
+                    slot_name, rows, self.max_batch_rows, self.num_features
+                )
+            except BrokenProcessPool:
+                self._restart(executor)
+                if attempt:
+                    raise
+
+    def _restart(self, broken: ProcessPoolExecutor):
+        # Пул мог уже пересоздать другой запрос, упавший вместе с этим
+        if self._executor is not broken:
+            return
+
+        logger.warning("Inference worker process died, restarting the pool")
+        broken.shutdown(wait=False, cancel_futures=True)
+        self._executor = self._create_executor()
+        self.restarts += 1
+
+    def close(self):
+        """Остановка процессов и освобождение shared memory"""
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        for slot in self._slots:
+            slot.release()
+        self._slots = []
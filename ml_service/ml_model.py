@@ -1,27 +1,293 @@
+import asyncio
+import json
 import logging
-import random
-from typing import Dict
+import math
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from operator import getitem
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import lightgbm as lgb
+import numpy as np
+
+from core.config import MODEL_PATH, FEATURE_LIST_PATH
+from inference_pool import ProcessInferencePool
 from model_config import ModelConfig
 
 logger = logging.getLogger(__name__)
 
+CATEGORICAL_FEATURES = (
+    "transaction_type",
+    "merchant_category",
+    "location",
+    "device_used",
+    "payment_channel",
+)
+
+NUMERIC_FEATURES = (
+    "amount",
+    "time_since_last_transaction",
+    "spending_deviation_score",
+    "velocity_score",
+    "geo_anomaly_score",
+)
+
+
+def _parse_timestamp(value: str) -> Optional[datetime]:
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except (AttributeError, ValueError):
+        return None
+
+
+def _hour(timestamp: str) -> float:
+    ts = _parse_timestamp(timestamp)
+    return float(ts.hour) if ts else math.nan
+
+
+def _day_of_week(timestamp: str) -> float:
+    ts = _parse_timestamp(timestamp)
+    return float(ts.weekday()) if ts else math.nan
+
+
+# Производный признак -> (исходное поле транзакции, функция от его значения)
+DERIVED_FEATURES: Dict[str, Tuple[str, Callable[[str], float]]] = {
+    "hour": ("timestamp", _hour),
+    "day_of_week": ("timestamp", _day_of_week),
+}
+
+
+class FeatureEncoder:
+    """
+    Построение вектора признаков в порядке из feature_names.json
+
+    Категориальные признаки кодируются заранее построенными словарями
+    категория -> код; неизвестная категория становится NaN (missing для LightGBM).
+    """
+
+    def __init__(self, feature_names: List[str], categories: Dict[str, List[str]]):
+        self.feature_names = feature_names
+        self.category_codes = {
+            name: {category: float(code) for code, category in enumerate(values)}
+            for name, values in categories.items()
+        }
+
+        unknown = [
+            name for name in feature_names
+            if name not in CATEGORICAL_FEATURES
+            and name not in NUMERIC_FEATURES
+            and name not in DERIVED_FEATURES
+        ]
+        if unknown:
+            raise ValueError(f"Unsupported features in feature list: {unknown}")
+
+        missing = [
+            name for name in feature_names
+            if name in CATEGORICAL_FEATURES and name not in self.category_codes
+        ]
+        if missing:
+            raise ValueError(f"No category encoding for features: {missing}")
+
+    @classmethod
+    def load(cls, feature_list_path: str, booster: lgb.Booster) -> "FeatureEncoder":
+        """
+        Загрузка списка признаков
+
+        feature_names.json - либо список имён, либо объект
+        {"features": [...], "categories": {"<признак>": [...]}}. Если
+        категорий в файле нет, берутся pandas_categorical из модели
+        в порядке следования категориальных признаков.
+        """
+        with open(feature_list_path) as f:
+            spec = json.load(f)
+
+        if isinstance(spec, list):
+            feature_names, categories = spec, {}
+        else:
+            feature_names, categories = spec["features"], spec.get("categories", {})
+
+        if not categories and booster.pandas_categorical:
+            categorical_names = [name for name in feature_names if name in CATEGORICAL_FEATURES]
+            categories = dict(zip(categorical_names, booster.pandas_categorical))
+
+        return cls(feature_names, categories)
+
+    def encode(self, transaction: Dict) -> np.ndarray:
+        """Матрица признаков 1 x n_features (float32)"""
+        return self.encode_batch([transaction], getitem)
+
+    def encode_requests(self, requests: Sequence) -> np.ndarray:
+        """Матрица признаков n_requests x n_features напрямую из PredictRequest"""
+        return self.encode_batch(requests, getattr)
+
+    def encode_batch(self, rows: Sequence, get: Callable[[Any, str], Any]) -> np.ndarray:
+        """
+        Построение матрицы признаков по столбцам
+
+        Args:
+            rows: Транзакции (dict'ы или proto-сообщения)
+            get: Доступ к полю строки: getitem для dict, getattr для proto
+
+        Returns:
+            C-contiguous матрица len(rows) x n_features (float32)
+        """
+        matrix = np.empty((len(rows), len(self.feature_names)), dtype=np.float32)
+        for i, name in enumerate(self.feature_names):
+            if name in self.category_codes:
+                codes = self.category_codes[name]
+                matrix[:, i] = [codes.get(get(row, name), math.nan) for row in rows]
+            elif name in DERIVED_FEATURES:
+                source, derive = DERIVED_FEATURES[name]
+                matrix[:, i] = [derive(get(row, source)) for row in rows]
+            else:
+                matrix[:, i] = [get(row, name) for row in rows]
+        return matrix
+
+
 class FraudDetectionModel:
-    """ML-модель для gRPC сервиса"""
+    """
+    ML-модель для gRPC сервиса
+
+    inference_mode="thread" - скоринг в пуле потоков этого процесса,
+    "process" - в ProcessInferencePool из inference_processes процессов.
+    threshold версии модели из реестра, если задан, важнее общего
+    threshold из ModelConfig.
+    """
 
-    def __init__(self, model_config: ModelConfig):
-        """Загрузка конфига модели из БД"""
+    def __init__(
+        self,
+        model_config: ModelConfig,
+        model_path: str = MODEL_PATH,
+        feature_list_path: str = FEATURE_LIST_PATH,
+        inference_threads: int = 2,
+        inference_mode: str = "thread",
+        inference_processes: int = 1,
+        max_batch_rows: int = 1024,
+        version: str = "unknown",
+        threshold: Optional[float] = None
+    ):
+        """Загрузка LightGBM модели и списка признаков"""
         self.model_config = model_config
+        self.model_path = model_path
+        self.version = version
+        self._threshold = threshold
+        self.inflight = 0
+
+        self.booster = lgb.Booster(model_file=model_path)
+        self.encoder = FeatureEncoder.load(feature_list_path, self.booster)
+
+        if self.booster.num_feature() != len(self.encoder.feature_names):
+            raise ValueError(
+                f"Model expects {self.booster.num_feature()} features, "
+                f"feature list has {len(self.encoder.feature_names)}"
+            )
+
+        self.inference_mode = inference_mode
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pool: Optional[ProcessInferencePool] = None
+
+        if inference_mode == "thread":
+            self._executor = ThreadPoolExecutor(
+                max_workers=inference_threads,
+                thread_name_prefix="inference"
+            )
+        elif inference_mode == "process":
+            self._pool = ProcessInferencePool(
+                model_path,
+                num_features=len(self.encoder.feature_names),
+                processes=inference_processes,
+                max_batch_rows=max_batch_rows
+            )
+        else:
+            raise ValueError(f"Unknown inference mode: {inference_mode}")
+
+        logger.info(
+            f"Loaded model {model_path} (version {version}) with "
+            f"{len(self.encoder.feature_names)} features, inference_mode={inference_mode}"
+        )
+
+    @property
+    def threshold(self) -> float:
+        if self._threshold is not None:
+            return self._threshold
+        return self.model_config.threshold
+
+    @contextmanager
+    def lease(self) -> Iterator["FraudDetectionModel"]:
+        """
+        Учитывает запрос в inflight с момента выбора модели: ModelManager
+        не закроет её, даже если запрос ещё не дошёл до скоринга
+        """
+        self.inflight += 1
+        try:
+            yield self
+        finally:
+            self.inflight -= 1
 
     async def predict(self, transaction: Dict) -> Dict:
         """Получение результата работы модели"""
-        probability = random.random()
+        features = self.encoder.encode(transaction)
+        probability = float((await self._score(features))[0])
+
         return {
             "correlation_id": transaction["correlation_id"],
-            "is_fraud": True if probability >= self.model_config.threshold else False
+            "probability": probability,
+            "is_fraud": probability >= self.threshold
         }
-    
+
+    async def predict_batch(self, requests: Sequence) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Векторизованный скоринг батча PredictRequest
+
+        Матрица признаков строится сразу из proto-сообщений, модель
+        вызывается один раз на весь батч.
+
+        Returns:
+            (вероятности, флаги is_fraud) в порядке запросов
+        """
+        probabilities = await self.score_requests(requests)
+        return probabilities, probabilities >= self.threshold
+
+    async def score_requests(self, requests: Sequence) -> np.ndarray:
+        """Вероятности для батча PredictRequest без применения порога"""
+        if not requests:
+            return np.empty(0, dtype=np.float64)
+
+        return await self._score(self.encoder.encode_requests(requests))
+
+    async def warm_up(self, rows: int = 256, rounds: int = 1):
+        """
+        Прогрев на синтетических строках до того, как модель начнёт
+        получать трафик (первые вызовы booster'а и процессов пула медленнее)
+        """
+        features = np.zeros((rows, len(self.encoder.feature_names)), dtype=np.float32)
+        await asyncio.gather(*(self._score(features) for _ in range(rounds)))
+
+    async def _score(self, features: np.ndarray) -> np.ndarray:
+        self.inflight += 1
+        try:
+            if self._pool:
+                return await self._pool.predict(features)
+
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, self.booster.predict, features)
+        finally:
+            self.inflight -= 1
+
     async def get_model_info(self) -> Dict:
         """Информация о модели"""
         return {
-            "threshold": self.model_config.threshold,
+            "version": self.version,
+            "threshold": self.threshold,
+            "model_path": self.model_path,
+            "num_features": len(self.encoder.feature_names),
+            "inference_mode": self.inference_mode,
         }
+
+    def close(self):
+        """Остановка пула инференса"""
+        if self._executor:
+            self._executor.shutdown(wait=True)
+        if self._pool:
+            self._pool.close()
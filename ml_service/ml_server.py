@@ -1,15 +1,23 @@
 import asyncio
 import grpc
+from collections import defaultdict
 from concurrent import futures
+from contextlib import ExitStack
+from functools import partial
 import logging
 import os
 import sys
 from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
 from grpc_reflection.v1alpha import reflection
 
 from generated_proto import ml_pb2, ml_pb2_grpc
+from batcher import MicroBatcher
 from ml_model import FraudDetectionModel
 from model_config import ModelConfig
+from model_manager import ModelManager
 
 logging.basicConfig(
     level=logging.INFO,
@@ -20,6 +28,21 @@ logger = logging.getLogger(__name__)
 MODEL_VERSION = os.getenv("MODEL_VERSION", "1.0")
 GRPC_PORT = os.getenv("GRPC_PORT", "50051")
 MAX_WORKERS = int(os.getenv("MAX_WORKERS", "10"))
+INFERENCE_THREADS = int(os.getenv("INFERENCE_THREADS", "2"))
+INFERENCE_MODE = os.getenv("INFERENCE_MODE", "thread")
+INFERENCE_PROCESSES = int(os.getenv("INFERENCE_PROCESSES", str(os.cpu_count() or 1)))
+INFERENCE_MAX_BATCH_ROWS = int(os.getenv("INFERENCE_MAX_BATCH_ROWS", "1024"))
+BATCHER_MAX_BATCH_SIZE = int(os.getenv("BATCHER_MAX_BATCH_SIZE", "256"))
+BATCHER_MAX_WAIT_MS = float(os.getenv("BATCHER_MAX_WAIT_MS", "2"))
+BATCHER_MAX_INFLIGHT = int(os.getenv(
+    "BATCHER_MAX_INFLIGHT",
+    str(INFERENCE_PROCESSES if INFERENCE_MODE == "process" else INFERENCE_THREADS)
+))
+STREAM_MAX_PENDING = int(os.getenv("STREAM_MAX_PENDING", "1024"))
+MODEL_REGISTRY_POLL_INTERVAL = float(os.getenv("MODEL_REGISTRY_POLL_INTERVAL", "10"))
+MODEL_WARMUP_ROWS = int(os.getenv("MODEL_WARMUP_ROWS", "256"))
+
+_STREAM_END = object()
 
 class MLServiceServicer(ml_pb2_grpc.MLServiceServicer):
     """Реализация gRPC сервиса"""
@@ -29,30 +52,143 @@ class MLServiceServicer(ml_pb2_grpc.MLServiceServicer):
         
         try:
             self.model_config = ModelConfig()
-            self.model = FraudDetectionModel(self.model_config)
+            model_factory = partial(
+                FraudDetectionModel,
+                self.model_config,
+                inference_threads=INFERENCE_THREADS,
+                inference_mode=INFERENCE_MODE,
+                inference_processes=INFERENCE_PROCESSES,
+                max_batch_rows=INFERENCE_MAX_BATCH_ROWS
+            )
+            self.models = ModelManager(
+                model_factory(version=MODEL_VERSION),
+                model_factory,
+                metadata_url=self.model_config.metadata_url,
+                poll_interval=MODEL_REGISTRY_POLL_INTERVAL,
+                warmup_rows=MODEL_WARMUP_ROWS,
+                warmup_rounds=INFERENCE_PROCESSES if INFERENCE_MODE == "process" else 1,
+                required_versions=lambda: self.model_config.router.model_versions
+            )
+            self.batcher = MicroBatcher(
+                self._predict_batch,
+                max_batch_size=BATCHER_MAX_BATCH_SIZE,
+                max_wait_ms=BATCHER_MAX_WAIT_MS,
+                max_inflight=BATCHER_MAX_INFLIGHT
+            )
+            self._shadow_tasks = set()
             logger.info("ML Model loaded successfully")
             
         except Exception as e:
             logger.error(f"Failed to load model: {e}")
             raise
 
+    @property
+    def model(self) -> FraudDetectionModel:
+        """Текущая версия модели (меняется при горячей замене)"""
+        return self.models.model
+
+    async def _predict_batch(self, requests) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Скоринг батча с маршрутизацией по конфигам сегментов
+
+        Строки группируются по версии модели выбранного live-конфига, каждая
+        группа скорится одним вызовом своей модели, порог берётся из конфига.
+        Если конфигов нет или версия ещё не загружена, используется активная
+        модель с её порогом. Shadow-скоринг запускается в фоне и на ответ
+        не влияет.
+        """
+        router = self.model_config.router
+        if not router:
+            model = self.model
+            with model.lease():
+                return await model.predict_batch(requests)
+
+        thresholds = np.empty(len(requests), dtype=np.float64)
+        groups: Dict[FraudDetectionModel, List[int]] = defaultdict(list)
+        shadow: Dict[Tuple[FraudDetectionModel, str], List[int]] = defaultdict(list)
+
+        # Модели берутся в аренду при выборе, иначе выведенная из работы
+        # версия может закрыться до скоринга (см. ModelManager._retire)
+        with ExitStack() as leases, ExitStack() as shadow_leases:
+            for i, request in enumerate(requests):
+                config, shadow_configs = router.assign(request)
+
+                model = self.models.get(config.model_version) if config else None
+                if model is None:
+                    model = self.model
+                    thresholds[i] = model.threshold
+                else:
+                    thresholds[i] = config.threshold
+                if model not in groups:
+                    leases.enter_context(model.lease())
+                groups[model].append(i)
+
+                for shadow_config in shadow_configs:
+                    shadow_model = self.models.get(shadow_config.model_version)
+                    if shadow_model is not None:
+                        if (shadow_model, shadow_config) not in shadow:
+                            shadow_leases.enter_context(shadow_model.lease())
+                        shadow[(shadow_model, shadow_config)].append(i)
+
+            probabilities = np.empty(len(requests), dtype=np.float64)
+            scores = await asyncio.gather(*(
+                model.score_requests([requests[i] for i in rows])
+                for model, rows in groups.items()
+            ))
+            for rows, group_scores in zip(groups.values(), scores):
+                probabilities[rows] = group_scores
+
+            is_fraud = probabilities >= thresholds
+
+            if shadow:
+                task = asyncio.create_task(
+                    self._shadow_score(requests, shadow, is_fraud, shadow_leases.pop_all())
+                )
+                self._shadow_tasks.add(task)
+                task.add_done_callback(self._shadow_tasks.discard)
+
+        return probabilities, is_fraud
+
+    async def _shadow_score(
+        self,
+        requests,
+        shadow: dict,
+        live_is_fraud: np.ndarray,
+        leases: ExitStack
+    ):
+        """Скоринг shadow-конфигами; результат только логируется, аренды моделей снимаются в конце"""
+        with leases:
+            for (model, config), rows in shadow.items():
+                try:
+                    scores = await model.score_requests([requests[i] for i in rows])
+                except Exception as e:
+                    logger.error(f"Shadow scoring with config {config.name} failed: {e}")
+                    continue
+
+                for i, probability in zip(rows, scores.tolist()):
+                    logger.info(
+                        f"Shadow prediction: {requests[i].correlation_id} config={config.name} "
+                        f"model={model.version} probability={probability:.4f} "
+                        f"is_fraud={probability >= config.threshold} "
+                        f"live_is_fraud={bool(live_is_fraud[i])}"
+                    )
+
     async def Predict(self, request, context):
-        """Предсказание для одной транзакции"""
+        """Предсказание для одной транзакции (скорится в общем микро-батче)"""
         try:
             logger.info(f"Predict request: {request.correlation_id}")
             
-            transaction = self._proto_to_dict(request)
-            
-            result = await self.model.predict(transaction)
+            probability, is_fraud = await self.batcher.submit(request)
             
             response = ml_pb2.PredictResponse(
-                correlation_id=result["correlation_id"],
-                is_fraud=result["is_fraud"]
+                correlation_id=request.correlation_id,
+                is_fraud=is_fraud,
+                probability=probability
             )
             
             logger.info(
                 f"Prediction: {request.correlation_id} -> "
-                f"is_fraud={result['is_fraud']}"
+                f"is_fraud={response.is_fraud}, probability={response.probability:.4f}"
             )
             
             return response
@@ -62,7 +198,120 @@ class MLServiceServicer(ml_pb2_grpc.MLServiceServicer):
             context.set_code(grpc.StatusCode.INTERNAL)
             context.set_details(f"Prediction error: {str(e)}")
             return ml_pb2.PredictResponse()
+
+    async def PredictBatch(self, request, context):
+        """Векторизованное предсказание для батча транзакций (ответы в порядке запросов)"""
+        try:
+            probabilities, is_fraud = await self._predict_batch(request.requests)
+
+            responses = [
+                ml_pb2.PredictResponse(
+                    correlation_id=item.correlation_id,
+                    is_fraud=flag,
+                    probability=probability
+                )
+                for item, flag, probability in zip(
+                    request.requests, is_fraud.tolist(), probabilities.tolist()
+                )
+            ]
+
+            logger.info(
+                f"Batch prediction: size={len(responses)}, "
+                f"fraud={int(is_fraud.sum())}"
+            )
+
+            return ml_pb2.PredictBatchResponse(responses=responses)
+
+        except Exception as e:
+            logger.error(f"Batch prediction failed: {e}", exc_info=True)
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(f"Batch prediction error: {str(e)}")
+            return ml_pb2.PredictBatchResponse()
         
+    async def PredictStream(self, request_iterator, context):
+        """
+        Двунаправленный стрим предсказаний
+
+        Запросы стрима скорятся в общем микро-батчере вместе с запросами
+        других клиентов; ответы уходят по мере готовности, не в порядке
+        запросов, клиент сопоставляет их по correlation_id. Без ответа
+        может быть не больше STREAM_MAX_PENDING запросов, поэтому при
+        медленной модели сервер перестаёт читать стрим и клиента
+        притормаживает flow control HTTP/2. Ошибка скоринга отдельного
+        запроса приходит ответом с заполненным error и не обрывает стрим.
+        """
+        pending = asyncio.Semaphore(STREAM_MAX_PENDING)
+        responses = asyncio.Queue()
+
+        reader = asyncio.create_task(self._read_stream(request_iterator, pending, responses))
+
+        try:
+            while True:
+                item = await responses.get()
+                if item is _STREAM_END:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                pending.release()
+                yield item
+
+        except Exception as e:
+            logger.error(f"Stream prediction failed: {e}", exc_info=True)
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(f"Stream prediction error: {str(e)}")
+
+        finally:
+            reader.cancel()
+            await asyncio.gather(reader, return_exceptions=True)
+
+    async def _read_stream(
+        self,
+        request_iterator,
+        pending: asyncio.Semaphore,
+        responses: asyncio.Queue
+    ):
+        """Читает входящий стрим, пока есть свободные слоты pending"""
+        tasks = set()
+        try:
+            async for request in request_iterator:
+                await pending.acquire()
+                task = asyncio.create_task(self._predict_stream_item(request, responses))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+
+            if tasks:
+                await asyncio.gather(*tasks)
+            await responses.put(_STREAM_END)
+
+        except Exception as e:
+            # Иначе обработчик ждал бы ответов вечно
+            await responses.put(e)
+
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _predict_stream_item(self, request, responses: asyncio.Queue):
+        try:
+            probability, is_fraud = await self.batcher.submit(request)
+        except Exception as e:
+            logger.error(f"Stream item prediction failed: {request.correlation_id}: {e}")
+            responses.put_nowait(ml_pb2.PredictResponse(
+                correlation_id=request.correlation_id,
+                error=f"Prediction error: {str(e)}"
+            ))
+            return
+
+        responses.put_nowait(ml_pb2.PredictResponse(
+            correlation_id=request.correlation_id,
+            is_fraud=is_fraud,
+            probability=probability
+        ))
+
+    async def GetMetrics(self, request, context):
+        """Метрики микро-батчера"""
+        return ml_pb2.MetricsResponse(metrics=self.batcher.metrics())
+
     async def HealthCheck(self, request, context):
         """Health check"""
         try:
@@ -76,29 +325,8 @@ class MLServiceServicer(ml_pb2_grpc.MLServiceServicer):
             logger.error(f"Health check failed: {e}")
             context.set_code(grpc.StatusCode.UNAVAILABLE)
             return ml_pb2.HealthCheckResponse(status="unhealthy")
-        
-    def _proto_to_dict(self, proto_request) -> dict:
-        """Конвертирует proto request в Python dict"""
-        return {
-            "transaction_id": proto_request.transaction_id,
-            "timestamp": proto_request.timestamp,
-            "sender_account": proto_request.sender_account,
-            "receiver_account": proto_request.receiver_account,
-            "amount": proto_request.amount,
-            "transaction_type": proto_request.transaction_type,
-            "merchant_category": proto_request.merchant_category,
-            "location": proto_request.location,
-            "device_used": proto_request.device_used,
-            "payment_channel": proto_request.payment_channel,
-            "ip_address": proto_request.ip_address,
-            "device_hash": proto_request.device_hash,
-            "time_since_last_transaction": proto_request.time_since_last_transaction,
-            "spending_deviation_score": proto_request.spending_deviation_score,
-            "velocity_score": proto_request.velocity_score,
-            "geo_anomaly_score": proto_request.geo_anomaly_score,
-            "correlation_id": proto_request.correlation_id
-        }
-    
+
+
 async def serve():
     """Запуск gRPC сервера"""
     server = grpc.aio.server(
@@ -117,6 +345,9 @@ async def serve():
 
     service = MLServiceServicer()
     await service.model_config.fetch_threshold()
+    service.model_config.start_watching()
+    await service.model.warm_up(rows=MODEL_WARMUP_ROWS)
+    service.models.start()
 
     ml_pb2_grpc.add_MLServiceServicer_to_server(service, server)
     
@@ -133,6 +364,10 @@ async def serve():
     except KeyboardInterrupt:
         logger.info("Shutting down...")
         await server.stop(0)
+    finally:
+        await service.batcher.stop()
+        await service.models.close()
+        await service.model_config.close()
 
 
 if __name__ == '__main__':
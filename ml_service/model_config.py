@@ -1,22 +1,48 @@
+import asyncio
 import grpc
 import logging
 import os
+from typing import Optional
 
 from generated_proto import metadata_pb2_grpc, metadata_pb2
+from routing import ConfigRouter
 
 logger = logging.getLogger(__name__)
 
 class ModelConfig:
-    def __init__(self, threshold: float = 0.5):
+    """
+    Кэшированный ML конфиг
+
+    threshold читается из памяти; фоновая задача держит стрим
+    WatchMLConfig и обновляет значение при каждом изменении ml_configs,
+    переподключаясь при ошибках. До первого ответа Metadata Service
+    действует threshold по умолчанию.
+
+    По строкам ml_configs строится router - таблица выбора конфига
+    и версии модели для сегмента транзакции.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.5,
+        reconnect_delay: float = 1.0,
+        max_reconnect_delay: float = 30.0
+    ):
         self.metadata_url = os.getenv(
             "METADATA_SERVICE_URL",
             "metadata-service:50052"
         )
-    
+        self._threshold = threshold
+        self.version = 0
+        self.router = ConfigRouter()
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self._watch_task: Optional[asyncio.Task] = None
+
     @property
     def threshold(self):
         return self._threshold
-    
+
     async def fetch_threshold(self):
         """Получить threshold из Metadata Service"""
         try:
@@ -24,11 +50,14 @@ class ModelConfig:
                 stub = metadata_pb2_grpc.MetadataDBStub(channel)
                 
                 response = await stub.GetMLConfig(
-                    metadata_pb2.GetMLConfigRequest(),
+                    metadata_pb2.GetMLConfigRequest(if_version=self.version),
                     timeout=5.0
                 )
                 
-                self._threshold = response.threshold
+                if response.not_modified:
+                    return self._threshold
+                
+                self._apply(response)
                 logger.info(f"Threshold from metadata: {self._threshold}")
                 
                 return self._threshold
@@ -38,4 +67,53 @@ class ModelConfig:
             return self._threshold
         except Exception as e:
             logger.error(f"Error: {e}")
-            return self._threshold
\ No newline at end of file
+            return self._threshold
+
+    def _apply(self, response):
+        """Применяет ответ Metadata Service: threshold, версию и таблицу маршрутов"""
+        self._threshold = response.threshold
+        self.version = response.version
+        self.router = ConfigRouter(response.configs)
+        logger.info(
+            f"ML config version {self.version}: {len(response.configs)} configs, "
+            f"model versions {sorted(self.router.model_versions) or ['active']}"
+        )
+
+    def start_watching(self):
+        """Запускает фоновую подписку на изменения конфига"""
+        if not self._watch_task:
+            self._watch_task = asyncio.create_task(self._watch())
+
+    async def close(self):
+        if self._watch_task:
+            self._watch_task.cancel()
+            try:
+                await self._watch_task
+            except asyncio.CancelledError:
+                pass
+            self._watch_task = None
+
+    async def _watch(self):
+        delay = self.reconnect_delay
+        while True:
+            try:
+                async with grpc.aio.insecure_channel(self.metadata_url) as channel:
+                    stub = metadata_pb2_grpc.MetadataDBStub(channel)
+
+                    async for response in stub.WatchMLConfig(metadata_pb2.WatchMLConfigRequest()):
+                        if response.threshold != self._threshold:
+                            logger.info(
+                                f"Threshold updated: {self._threshold} -> {response.threshold}"
+                            )
+                        self._apply(response)
+                        delay = self.reconnect_delay
+
+                logger.warning("Config stream closed by metadata service")
+
+            except grpc.aio.AioRpcError as e:
+                logger.error(f"Config stream failed: {e.code()}, reconnecting in {delay}s")
+            except Exception as e:
+                logger.error(f"Config stream error: {e}, reconnecting in {delay}s")
+
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
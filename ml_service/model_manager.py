@@ -0,0 +1,218 @@
+import asyncio
+import hashlib
+import logging
+import os
+from typing import Callable, Dict, Optional, Set
+
+import grpc
+
+from generated_proto import metadata_pb2, metadata_pb2_grpc
+from ml_model import FraudDetectionModel
+
+logger = logging.getLogger(__name__)
+
+ModelFactory = Callable[..., FraudDetectionModel]
+
+
+def file_checksum(path: str) -> str:
+    """sha256 файла артефакта модели"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ModelManager:
+    """
+    Горячая замена модели по реестру версий в Metadata Service
+
+    Фоновая задача раз в poll_interval спрашивает активную версию. Новая
+    версия загружается в фоне (проверка checksum, загрузка booster'а,
+    прогрев), затем ссылка self.model подменяется одним присваиванием:
+    новые запросы идут в новую модель, уже начатые дорабатывают на старой,
+    которая закрывается, когда в ней не остаётся запросов.
+
+    Кроме активной, держатся загруженными версии из required_versions
+    (на них ссылаются конфиги A/B и shadow-скоринга).
+    """
+
+    def __init__(
+        self,
+        model: FraudDetectionModel,
+        model_factory: ModelFactory,
+        metadata_url: Optional[str] = None,
+        poll_interval: float = 10.0,
+        warmup_rows: int = 256,
+        warmup_rounds: int = 1,
+        required_versions: Callable[[], Set[str]] = set
+    ):
+        self.model = model
+        self.model_factory = model_factory
+        self.metadata_url = metadata_url or os.getenv(
+            "METADATA_SERVICE_URL",
+            "metadata-service:50052"
+        )
+        self.poll_interval = poll_interval
+        self.warmup_rows = warmup_rows
+        self.warmup_rounds = warmup_rounds
+        self.required_versions = required_versions
+
+        self.versions: Dict[str, FraudDetectionModel] = {}
+        self._failed: Dict[str, metadata_pb2.ModelVersion] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._retiring: set = set()
+
+    def start(self):
+        if not self._task:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        """Останавливает опрос реестра и закрывает модели"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        if self._retiring:
+            await asyncio.gather(*self._retiring, return_exceptions=True)
+        for model in self.versions.values():
+            model.close()
+        self.versions = {}
+        self.model.close()
+
+    def get(self, version: Optional[str] = None) -> Optional[FraudDetectionModel]:
+        """Модель версии version (None - активная); None, если версия не загружена"""
+        if not version or version == self.model.version:
+            return self.model
+        return self.versions.get(version)
+
+    async def refresh(self) -> bool:
+        """
+        Сверяет активную версию с реестром и переключается при изменении,
+        затем догружает и выгружает дополнительные версии
+
+        Returns:
+            True, если активная модель была заменена
+        """
+        swapped = False
+        async with grpc.aio.insecure_channel(self.metadata_url) as channel:
+            stub = metadata_pb2_grpc.MetadataDBStub(channel)
+            response = await stub.GetActiveModelVersion(
+                metadata_pb2.GetActiveModelVersionRequest(),
+                timeout=5.0
+            )
+
+            if response.found and response.model.version != self.model.version:
+                new_model = self.versions.pop(response.model.version, None)
+                if new_model is None:
+                    new_model = await self._try_load(response.model)
+                if new_model is not None:
+                    self.swap(new_model)
+                    swapped = True
+
+            await self._sync_versions(stub)
+
+        return swapped
+
+    async def _sync_versions(self, stub: metadata_pb2_grpc.MetadataDBStub):
+        required = set(self.required_versions()) - {self.model.version}
+
+        for version in required - self.versions.keys():
+            try:
+                response = await stub.GetModelVersion(
+                    metadata_pb2.GetModelVersionRequest(version=version),
+                    timeout=5.0
+                )
+            except grpc.aio.AioRpcError as e:
+                logger.error(f"Failed to look up model version {version}: {e.code()}")
+                continue
+
+            model = await self._try_load(response.model)
+            if model is not None:
+                self.versions[version] = model
+
+        for version in self.versions.keys() - required:
+            self._retire_later(self.versions.pop(version))
+
+    async def _try_load(self, spec: metadata_pb2.ModelVersion) -> Optional[FraudDetectionModel]:
+        """Загрузка версии; неудачная не повторяется, пока запись в реестре не изменится"""
+        if self._failed.get(spec.version) == spec:
+            return None
+
+        try:
+            model = await self.load(spec)
+        except Exception as e:
+            self._failed[spec.version] = spec
+            logger.error(f"Failed to load model version {spec.version}: {e}")
+            return None
+
+        self._failed.pop(spec.version, None)
+        return model
+
+    async def load(self, spec: metadata_pb2.ModelVersion) -> FraudDetectionModel:
+        """Загрузка и прогрев версии модели без влияния на текущий трафик"""
+        logger.info(f"Loading model version {spec.version} from {spec.artifact_path}")
+        loop = asyncio.get_running_loop()
+
+        checksum = await loop.run_in_executor(None, file_checksum, spec.artifact_path)
+        if spec.checksum and checksum != spec.checksum:
+            raise ValueError(
+                f"Checksum mismatch for {spec.artifact_path}: "
+                f"expected {spec.checksum}, got {checksum}"
+            )
+
+        model = await loop.run_in_executor(None, lambda: self.model_factory(
+            model_path=spec.artifact_path,
+            feature_list_path=spec.feature_list_path,
+            version=spec.version,
+            threshold=spec.threshold or None
+        ))
+
+        try:
+            await model.warm_up(rows=self.warmup_rows, rounds=self.warmup_rounds)
+        except Exception:
+            model.close()
+            raise
+
+        return model
+
+    def swap(self, new_model: FraudDetectionModel):
+        """
+        Атомарная замена текущей модели; старая закрывается после дренажа,
+        если на неё не ссылаются конфиги
+        """
+        old_model, self.model = self.model, new_model
+        logger.info(f"Switched model version {old_model.version} -> {new_model.version}")
+
+        if old_model.version in self.required_versions():
+            self.versions[old_model.version] = old_model
+        else:
+            self._retire_later(old_model)
+
+    def _retire_later(self, model: FraudDetectionModel):
+        task = asyncio.create_task(self._retire(model))
+        self._retiring.add(task)
+        task.add_done_callback(self._retiring.discard)
+
+    async def _retire(self, model: FraudDetectionModel):
+        """Закрывает модель, когда её не арендует ни один запрос (FraudDetectionModel.lease)"""
+        while model.inflight:
+            await asyncio.sleep(0.05)
+
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, model.close)
+        logger.info(f"Closed model version {model.version}")
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh()
+            except grpc.aio.AioRpcError as e:
+                logger.error(f"Failed to poll model registry: {e.code()}")
+            except Exception as e:
+                logger.error(f"Model registry poll failed: {e}")
+            await asyncio.sleep(self.poll_interval)
@@ -0,0 +1,136 @@
+import bisect
+import zlib
+from collections import defaultdict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+SEGMENT_FIELDS = ("payment_channel", "transaction_type", "merchant_category")
+
+# Значения сегмента приходят от клиентов, поэтому кэш маршрутов ограничен
+MAX_RESOLVED_ROUTES = 10000
+
+# Ключи поиска от самого специфичного сегмента к самому общему:
+# сначала больше заданных полей, при равенстве важнее payment_channel,
+# затем transaction_type
+_FALLBACK_MASKS = sorted(
+    [(pc, tt, mc) for pc in (True, False) for tt in (True, False) for mc in (True, False)],
+    key=lambda mask: (-sum(mask), [not flag for flag in mask])
+)
+
+
+class SegmentConfig(NamedTuple):
+    name: str
+    segment: Tuple[Optional[str], Optional[str], Optional[str]]
+    model_version: Optional[str]
+    threshold: float
+    traffic_weight: float
+    mode: str
+
+
+class Route(NamedTuple):
+    """Live-конфиги сегмента с накопленными весами и shadow-конфиги"""
+    live: Tuple[SegmentConfig, ...]
+    cumulative_weights: Tuple[float, ...]
+    shadow: Tuple[SegmentConfig, ...]
+
+
+def traffic_bucket(key: str) -> float:
+    """Детерминированная точка в [0, 1) для ключа транзакции (одинакова во всех процессах)"""
+    return zlib.crc32(key.encode("utf-8")) / 2 ** 32
+
+
+class ConfigRouter:
+    """
+    Выбор конфига для транзакции без обращения к БД
+
+    Конфиги группируются по сегменту (payment_channel, transaction_type,
+    merchant_category; пустое значение - любое). Для транзакции берётся
+    самый специфичный сегмент, в котором есть live-конфиги, и выбирается
+    один из них по весам traffic_weight детерминированным хэшем
+    transaction_id. Shadow-конфиги самого специфичного сегмента с такими
+    конфигами скорятся дополнительно, их результат только логируется.
+    Разрешённые маршруты кэшируются по точному значению сегмента.
+    """
+
+    def __init__(self, configs: Iterable = ()):
+        grouped: Dict[tuple, List[SegmentConfig]] = defaultdict(list)
+        for config in configs:
+            segment_config = SegmentConfig(
+                name=config.name,
+                segment=tuple(getattr(config, field) or None for field in SEGMENT_FIELDS),
+                model_version=config.model_version or None,
+                threshold=config.threshold,
+                traffic_weight=config.traffic_weight,
+                mode=config.mode or "live",
+            )
+            grouped[segment_config.segment].append(segment_config)
+
+        self._routes: Dict[tuple, Route] = {
+            segment: self._build_route(configs) for segment, configs in grouped.items()
+        }
+        self._resolved: Dict[tuple, Route] = {}
+
+        self.model_versions: Set[str] = {
+            config.model_version
+            for configs in grouped.values() for config in configs
+            if config.model_version
+        }
+
+    def __bool__(self) -> bool:
+        return bool(self._routes)
+
+    @staticmethod
+    def _build_route(configs: List[SegmentConfig]) -> Route:
+        live = tuple(c for c in configs if c.mode == "live" and c.traffic_weight > 0)
+        shadow = tuple(c for c in configs if c.mode == "shadow")
+
+        total = sum(c.traffic_weight for c in live)
+        cumulative, running = [], 0.0
+        for config in live:
+            running += config.traffic_weight
+            cumulative.append(running / total)
+
+        return Route(live=live, cumulative_weights=tuple(cumulative), shadow=shadow)
+
+    def route(self, request) -> Route:
+        """Маршрут для сегмента транзакции"""
+        key = tuple(getattr(request, field) for field in SEGMENT_FIELDS)
+
+        route = self._resolved.get(key)
+        if route is None:
+            live = shadow = None
+            for mask in _FALLBACK_MASKS:
+                candidate = self._routes.get(
+                    tuple(value if keep else None for value, keep in zip(key, mask))
+                )
+                if candidate is None:
+                    continue
+                if live is None and candidate.live:
+                    live = candidate
+                if shadow is None and candidate.shadow:
+                    shadow = candidate
+
+            route = Route(
+                live=live.live if live else (),
+                cumulative_weights=live.cumulative_weights if live else (),
+                shadow=shadow.shadow if shadow else ()
+            )
+            if len(self._resolved) >= MAX_RESOLVED_ROUTES:
+                self._resolved.clear()
+            self._resolved[key] = route
+
+        return route
+
+    def assign(self, request) -> Tuple[Optional[SegmentConfig], Tuple[SegmentConfig, ...]]:
+        """
+        Live-конфиг (None, если подходящего нет) и shadow-конфиги транзакции
+        """
+        route = self.route(request)
+        if not route.live:
+            return None, route.shadow
+
+        if len(route.live) == 1:
+            return route.live[0], route.shadow
+
+        bucket = traffic_bucket(request.transaction_id or request.correlation_id)
+        index = bisect.bisect_right(route.cumulative_weights, bucket)
+        return route.live[min(index, len(route.live) - 1)], route.shadow
@@ -1,3 +1,5 @@
 from .redis_queue import RedisQueue
+from .redis_stream_queue import RedisStreamQueue
+from .factory import create_queue
 
-__all__ = ["RedisQueue"]
\ No newline at end of file
+__all__ = ["RedisQueue", "RedisStreamQueue", "create_queue"]
\ No newline at end of file
@@ -0,0 +1,146 @@
+from typing import Dict, Union
+import json
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Формат бинарных payload'ов: MAGIC + версия формата + id кодека + тело.
+# JSON пишется без заголовка, чтобы старые воркеры продолжали его читать;
+# MAGIC не может быть первым байтом JSON-документа.
+PAYLOAD_MAGIC = b"\xfd"
+PAYLOAD_VERSION = 1
+HEADER_SIZE = 3
+
+
+class PayloadError(ValueError):
+    """Payload очереди не декодируется в транзакцию ни одним кодеком"""
+
+
+class JsonCodec:
+    """JSON без заголовка (исходный формат очереди)"""
+
+    name = "json"
+    codec_id = 0
+
+    def encode(self, transaction: dict) -> bytes:
+        return json.dumps(transaction).encode("utf-8")
+
+    def decode_body(self, body: bytes) -> dict:
+        return json.loads(body)
+
+
+class MsgpackCodec:
+    """MessagePack: компактнее JSON и быстрее кодируется"""
+
+    name = "msgpack"
+    codec_id = 1
+
+    def __init__(self):
+        if msgpack is None:
+            raise RuntimeError("msgpack codec requires the 'msgpack' package")
+
+    def encode(self, transaction: dict) -> bytes:
+        return _header(self.codec_id) + msgpack.packb(transaction, use_bin_type=True)
+
+    def decode_body(self, body: bytes) -> dict:
+        return msgpack.unpackb(body, raw=False)
+
+
+class ProtobufCodec:
+    """Protobuf по схеме PredictRequest из shared_proto/ml.proto"""
+
+    name = "protobuf"
+    codec_id = 2
+
+    def __init__(self):
+        from generated_proto import ml_pb2
+
+        self._message_cls = ml_pb2.PredictRequest
+        self._fields = [field.name for field in ml_pb2.PredictRequest.DESCRIPTOR.fields]
+
+    def encode(self, transaction: dict) -> bytes:
+        message = self._message_cls(**transaction)
+        return _header(self.codec_id) + message.SerializeToString()
+
+    def decode_body(self, body: bytes) -> dict:
+        message = self._message_cls.FromString(body)
+        return {name: getattr(message, name) for name in self._fields}
+
+
+CODECS = {
+    JsonCodec.name: JsonCodec,
+    MsgpackCodec.name: MsgpackCodec,
+    ProtobufCodec.name: ProtobufCodec,
+}
+
+Codec = Union[JsonCodec, MsgpackCodec, ProtobufCodec]
+
+_decoders: Dict[int, Codec] = {}
+
+
+def get_codec(name: str) -> Codec:
+    """
+    Возвращает кодек по имени
+
+    Args:
+        name: "json", "msgpack" или "protobuf"
+    """
+    try:
+        return CODECS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown queue codec: {name}. Available: {', '.join(CODECS)}")
+
+
+def decode_payload(data: Union[bytes, str]) -> dict:
+    """
+    Декодирует payload из очереди любым поддерживаемым кодеком
+
+    Воркер читает все форматы независимо от того, каким кодеком пишет сам,
+    поэтому при смене QUEUE_CODEC сначала обновляются потребители, затем продюсеры.
+
+    Raises:
+        PayloadError: повреждённый payload, неизвестные версия или кодек,
+            тело не является объектом транзакции
+    """
+    try:
+        transaction = _decode(data)
+    except PayloadError:
+        raise
+    except Exception as e:
+        raise PayloadError(f"Undecodable queue payload: {e}") from e
+
+    if not isinstance(transaction, dict):
+        raise PayloadError(f"Queue payload is {type(transaction).__name__}, not a transaction object")
+    return transaction
+
+
+def _decode(data: Union[bytes, str]) -> dict:
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+
+    if not data.startswith(PAYLOAD_MAGIC):
+        return json.loads(data)
+
+    if len(data) < HEADER_SIZE:
+        raise PayloadError("Truncated queue payload header")
+
+    version, codec_id = data[1], data[2]
+    if version > PAYLOAD_VERSION:
+        raise PayloadError(f"Unsupported queue payload version: {version}")
+
+    codec = _decoders.get(codec_id)
+    if codec is None:
+        for codec_cls in CODECS.values():
+            if codec_cls.codec_id == codec_id:
+                codec = _decoders[codec_id] = codec_cls()
+                break
+        else:
+            raise PayloadError(f"Unknown queue codec id: {codec_id}")
+
+    return codec.decode_body(data[HEADER_SIZE:])
+
+
+def _header(codec_id: int) -> bytes:
+    return PAYLOAD_MAGIC + bytes((PAYLOAD_VERSION, codec_id))
@@ -0,0 +1,44 @@
+from typing import Optional
+
+from .redis_queue import RedisQueue
+from .redis_stream_queue import RedisStreamQueue
+
+QUEUE_BACKENDS = ("list", "stream")
+
+
+def create_queue(
+    redis_url: str,
+    backend: str = "list",
+    queue_name: Optional[str] = None,
+    group_name: str = "scoring",
+    maxlen: Optional[int] = 1_000_000,
+    reliable: bool = False,
+    **kwargs
+) -> RedisQueue:
+    """
+    Создаёт очередь транзакций с выбранным бэкендом
+
+    Args:
+        redis_url: Адрес Redis
+        backend: "list" (LIST + LPUSH/BRPOP) или "stream" (Redis Streams)
+        queue_name: Имя ключа очереди (по умолчанию - своё для каждого бэкенда)
+        group_name: Consumer group (только для "stream")
+        maxlen: Длина потока, до которой reaper обрезает подтверждённые
+            сообщения (только для "stream")
+        reliable: Надёжный режим (только для "list", поток надёжен всегда)
+        **kwargs: Общие параметры конструктора очереди
+
+    Returns:
+        Экземпляр RedisQueue или RedisStreamQueue
+    """
+    if queue_name:
+        kwargs["queue_name"] = queue_name
+
+    if backend == "list":
+        return RedisQueue(redis_url, reliable=reliable, **kwargs)
+    if backend == "stream":
+        return RedisStreamQueue(redis_url, group_name=group_name, maxlen=maxlen, **kwargs)
+
+    raise ValueError(
+        f"Unknown queue backend: {backend}. Available: {', '.join(QUEUE_BACKENDS)}"
+    )
@@ -1,10 +1,83 @@
-from typing import Any, Optional
+import asyncio
+from collections import OrderedDict
+from typing import Any, List, Optional, Tuple, Union
 from redis import asyncio as aioredis
-import json
 import logging
+import os
+import socket
+import time
+
+from .codecs import Codec, PayloadError, decode_payload, get_codec
 
 logger = logging.getLogger(__name__)
 
+# Период опроса пустой очереди в надёжном режиме (сек)
+RELIABLE_POLL_INTERVAL = 0.02
+
+# KEYS: очередь, processing-список, zset дедлайнов, множество консьюмеров
+# ARGV: количество, visibility timeout (сек), id консьюмера
+MOVE_SCRIPT = """
+local now = redis.call('TIME')
+local deadline = tonumber(now[1]) + tonumber(now[2]) / 1000000 + tonumber(ARGV[2])
+local items = {}
+for i = 1, tonumber(ARGV[1]) do
+    local item = redis.call('LMOVE', KEYS[1], KEYS[2], 'RIGHT', 'LEFT')
+    if not item then
+        break
+    end
+    items[#items + 1] = item
+    redis.call('ZADD', KEYS[3], deadline, item)
+end
+if #items > 0 then
+    redis.call('SADD', KEYS[4], ARGV[3])
+end
+return items
+"""
+
+# KEYS: processing-список, zset дедлайнов, очередь
+# ARGV: 1 - вернуть в очередь, 0 - только удалить; элементы в порядке FIFO
+# (обход с конца, чтобы после RPUSH первым снова извлекался самый старый)
+SETTLE_SCRIPT = """
+local settled = 0
+for i = #ARGV, 2, -1 do
+    local removed = redis.call('LREM', KEYS[1], -1, ARGV[i])
+    redis.call('ZREM', KEYS[2], ARGV[i])
+    if removed > 0 then
+        settled = settled + 1
+        if ARGV[1] == '1' then
+            redis.call('RPUSH', KEYS[3], ARGV[i])
+        end
+    end
+end
+return settled
+"""
+
+# KEYS: processing-список, zset дедлайнов, очередь, множество консьюмеров
+# ARGV: id консьюмера
+REAP_SCRIPT = """
+local now = redis.call('TIME')
+local ts = tonumber(now[1]) + tonumber(now[2]) / 1000000
+local expired = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ts)
+local is_expired = {}
+for _, item in ipairs(expired) do
+    is_expired[item] = true
+    redis.call('ZREM', KEYS[2], item)
+end
+-- processing-список упорядочен от новых к старым: RPUSH в этом порядке
+-- оставляет самый старый элемент первым на извлечение
+for _, item in ipairs(redis.call('LRANGE', KEYS[1], 0, -1)) do
+    if is_expired[item] then
+        redis.call('LREM', KEYS[1], 1, item)
+        redis.call('RPUSH', KEYS[3], item)
+        is_expired[item] = nil
+    end
+end
+if redis.call('LLEN', KEYS[1]) == 0 and redis.call('ZCARD', KEYS[2]) == 0 then
+    redis.call('SREM', KEYS[4], ARGV[1])
+end
+return #expired
+"""
+
 
 class RedisQueue:
     """
@@ -13,12 +86,53 @@ class RedisQueue:
     Использует:
     - LPUSH для добавления (в начало)
     - BRPOP для извлечения с блокировкой (из конца)
+    - Pipeline + LPUSH с несколькими значениями и BLMPOP для пакетных операций
+    
+    В надёжном режиме (reliable=True) извлечённые элементы переносятся
+    (LMOVE) в processing-список консьюмера и остаются там до ack/nack.
+    Элементы, не подтверждённые за visibility_timeout секунд, возвращаются
+    в очередь через requeue_expired.
+    
+    Транзакции сериализуются кодеком codec ("json", "msgpack", "protobuf");
+    чтение поддерживает все форматы, поэтому соединение бинарное.
+    Нечитаемые элементы не обрывают извлечение пачки: они переносятся
+    в список dead_letter_key и пропускаются.
     """
     
-    def __init__(self, redis_url: str, queue_name: str = "transactions:queue"):
+    def __init__(
+        self,
+        redis_url: str,
+        queue_name: str = "transactions:queue",
+        push_chunk_size: int = 1000,
+        reliable: bool = False,
+        consumer_id: Optional[str] = None,
+        visibility_timeout: float = 30.0,
+        codec: Union[str, Codec] = "json"
+    ):
         self.redis_url = redis_url
         self.queue_name = queue_name
+        self.push_chunk_size = push_chunk_size
+        self.reliable = reliable
+        self.consumer_id = consumer_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.visibility_timeout = visibility_timeout
+        self.codec = get_codec(codec) if isinstance(codec, str) else codec
         self._redis: Optional[aioredis.Redis] = None
+        # id(транзакции) -> (локальный срок, транзакция, элемент в Redis), в порядке извлечения
+        self._inflight: "OrderedDict[int, Tuple[float, dict, Any]]" = OrderedDict()
+
+    @property
+    def consumers_key(self) -> str:
+        return f"{self.queue_name}:consumers"
+
+    @property
+    def dead_letter_key(self) -> str:
+        return f"{self.queue_name}:dead"
+
+    def processing_key(self, consumer_id: Optional[str] = None) -> str:
+        return f"{self.queue_name}:processing:{consumer_id or self.consumer_id}"
+
+    def deadlines_key(self, consumer_id: Optional[str] = None) -> str:
+        return f"{self.queue_name}:deadlines:{consumer_id or self.consumer_id}"
 
     async def connect(self):
         """Подключение к Redis"""
@@ -26,10 +140,12 @@ class RedisQueue:
             try:
                 self._redis = await aioredis.from_url(
                     self.redis_url, 
-                    decode_responses=True,
-                    encoding="utf-8"
+                    decode_responses=False
                 )
                 await self._redis.ping()
+                self._move_script = self._redis.register_script(MOVE_SCRIPT)
+                self._settle_script = self._redis.register_script(SETTLE_SCRIPT)
+                self._reap_script = self._redis.register_script(REAP_SCRIPT)
                 logger.info(f"Connected to Redis: {self.redis_url}")
             except Exception as e:
                 logger.error(f"Failed to connect to Redis: {e}")
@@ -40,6 +156,7 @@ class RedisQueue:
         if self._redis:
             await self._redis.aclose()
             self._redis = None
+            self._inflight.clear()
             logger.info("Redis connection closed")
 
     async def push(self, transaction: dict) -> int:
@@ -56,8 +173,8 @@ class RedisQueue:
             await self.connect()
 
         try:
-            transaction_json = json.dumps(transaction)
-            length = await self._redis.lpush(self.queue_name, transaction_json)
+            payload = self.codec.encode(transaction)
+            length = await self._redis.lpush(self.queue_name, payload)
             logger.debug(f"Pushed transaction to queue. Queue length: {length}")
             return length
         except Exception as e:
@@ -77,12 +194,19 @@ class RedisQueue:
         if not self._redis:
             await self.connect()
 
+        if self.reliable:
+            transactions = await self._pop_reliable(1, timeout)
+            return transactions[0] if transactions else None
+
         try:
             result = await self._redis.brpop(self.queue_name, timeout=timeout)
             
             if result:
                 _, data = result
-                transaction = json.loads(data)
+                transactions = await self._decode([data])
+                if not transactions:
+                    return None
+                transaction = transactions[0][0]
                 logger.debug(f"Popped transaction from queue: {transaction.get('id', 'unknown')}")
                 return transaction
             else:
@@ -93,6 +217,247 @@ class RedisQueue:
             logger.error(f"Failed to pop transaction: {e}")
             raise
 
+    async def push_many(self, transactions: List[dict]) -> int:
+        """
+        Добавляет пачку транзакций в очередь за один round-trip
+        
+        Args:
+            transactions: Список транзакций (порядок сохраняется для FIFO)
+            
+        Returns:
+            Длина очереди после добавления
+        """
+        if not self._redis:
+            await self.connect()
+
+        if not transactions:
+            return await self.length()
+
+        try:
+            payloads = [self.codec.encode(transaction) for transaction in transactions]
+
+            async with self._redis.pipeline(transaction=False) as pipe:
+                for start in range(0, len(payloads), self.push_chunk_size):
+                    pipe.lpush(self.queue_name, *payloads[start:start + self.push_chunk_size])
+                lengths = await pipe.execute()
+
+            logger.debug(f"Pushed {len(payloads)} transactions. Queue length: {lengths[-1]}")
+            return lengths[-1]
+        except Exception as e:
+            logger.error(f"Failed to push transactions: {e}")
+            raise
+
+    async def pop_many(self, count: int, timeout: Optional[float] = 0) -> List[dict]:
+        """
+        Извлекает до count транзакций из очереди
+        
+        Args:
+            count: Максимальное количество транзакций
+            timeout: Таймаут ожидания в секундах, если очередь пуста
+                (0 = бесконечно, None = не блокировать)
+            
+        Returns:
+            Список транзакций в порядке FIFO (пустой при таймауте)
+        """
+        if not self._redis:
+            await self.connect()
+
+        if self.reliable:
+            return await self._pop_reliable(count, timeout)
+
+        try:
+            if timeout is None:
+                items = await self._redis.rpop(self.queue_name, count)
+            else:
+                result = await self._redis.blmpop(
+                    timeout, 1, self.queue_name, direction="RIGHT", count=count
+                )
+                items = result[1] if result else None
+
+            if not items:
+                logger.debug("Queue pop_many timeout")
+                return []
+
+            transactions = [transaction for transaction, _ in await self._decode(items)]
+            logger.debug(f"Popped {len(transactions)} transactions from queue")
+            return transactions
+
+        except Exception as e:
+            logger.error(f"Failed to pop transactions: {e}")
+            raise
+
+    async def ack(self, transactions: List[dict]) -> int:
+        """
+        Подтверждает обработку транзакций (надёжный режим)
+        
+        Args:
+            transactions: Объекты, полученные из pop/pop_many
+            
+        Returns:
+            Количество подтверждённых элементов
+        """
+        return await self._settle(transactions, requeue=False)
+
+    async def nack(self, transactions: List[dict]) -> int:
+        """
+        Возвращает транзакции в очередь для повторной обработки (надёжный режим)
+        
+        Args:
+            transactions: Объекты, полученные из pop/pop_many
+            
+        Returns:
+            Количество возвращённых элементов
+        """
+        return await self._settle(transactions, requeue=True)
+
+    async def requeue_expired(self) -> int:
+        """
+        Возвращает в очередь элементы всех консьюмеров с истёкшим дедлайном
+        
+        Returns:
+            Количество возвращённых элементов
+        """
+        if not self._redis:
+            await self.connect()
+
+        requeued = 0
+        for member in await self._redis.smembers(self.consumers_key):
+            consumer_id = member.decode("utf-8")
+            requeued += await self._reap_script(
+                keys=[
+                    self.processing_key(consumer_id),
+                    self.deadlines_key(consumer_id),
+                    self.queue_name,
+                    self.consumers_key,
+                ],
+                args=[consumer_id],
+            )
+
+        if requeued:
+            logger.warning(f"Requeued {requeued} expired transactions")
+        return requeued
+
+    async def _pop_reliable(self, count: int, timeout: Optional[float]) -> List[dict]:
+        """
+        Переносит до count элементов в processing-список консьюмера
+
+        Пустая очередь опрашивается MOVE_SCRIPT раз в RELIABLE_POLL_INTERVAL
+        секунд, а не через BLMOVE: перенос и дедлайн ставятся одним скриптом,
+        и элемент не остаётся в processing-списке без дедлайна, если
+        консьюмер упал между двумя командами.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout if timeout else None
+        try:
+            while True:
+                items = await self._move_script(
+                    keys=[
+                        self.queue_name,
+                        self.processing_key(),
+                        self.deadlines_key(),
+                        self.consumers_key,
+                    ],
+                    args=[count, self.visibility_timeout, self.consumer_id],
+                )
+                if items or timeout is None:
+                    break
+                delay = RELIABLE_POLL_INTERVAL
+                if deadline is not None:
+                    delay = min(delay, deadline - loop.time())
+                    if delay <= 0:
+                        break
+                await asyncio.sleep(delay)
+
+            if not items:
+                logger.debug("Queue pop timeout")
+                return []
+
+            transactions = []
+            for transaction, item in await self._decode(items, reliable=True):
+                self._remember(transaction, item)
+                transactions.append(transaction)
+
+            logger.debug(f"Moved {len(transactions)} transactions to processing list")
+            return transactions
+
+        except Exception as e:
+            logger.error(f"Failed to pop transactions: {e}")
+            raise
+
+    async def _settle(self, transactions: List[dict], requeue: bool) -> int:
+        """Удаляет элементы из processing-списка, при requeue возвращает в очередь"""
+        if not self.reliable or not transactions:
+            return 0
+
+        if not self._redis:
+            await self.connect()
+
+        items = [item for item in (self._forget(tx) for tx in transactions) if item is not None]
+
+        if not items:
+            return 0
+
+        return await self._settle_script(
+            keys=[self.processing_key(), self.deadlines_key(), self.queue_name],
+            args=[1 if requeue else 0, *items],
+        )
+
+    async def _decode(self, items: List[Any], reliable: bool = False) -> List[Tuple[dict, Any]]:
+        """
+        Декодирует извлечённые элементы, нечитаемые переносит в dead_letter_key
+
+        В надёжном режиме нечитаемый элемент убирается из processing-списка
+        тем же SETTLE_SCRIPT, иначе reaper возвращал бы его в очередь вечно.
+
+        Returns:
+            Пары (транзакция, элемент в Redis) для читаемых элементов
+        """
+        decoded, broken = [], []
+        for item in items:
+            try:
+                decoded.append((decode_payload(item), item))
+            except PayloadError as e:
+                broken.append(item)
+                logger.error(f"Moved undecodable item to {self.dead_letter_key}: {e}", extra={
+                    "event": "queue_dead_letter",
+                    "queue": self.queue_name,
+                })
+
+        if broken:
+            if reliable:
+                await self._settle_script(
+                    keys=[self.processing_key(), self.deadlines_key(), self.dead_letter_key],
+                    args=[1, *broken],
+                )
+            else:
+                await self._redis.lpush(self.dead_letter_key, *broken)
+        return decoded
+
+    def _remember(self, transaction: dict, item: Any):
+        """Запоминает элемент транзакции для ack/nack"""
+        now = time.monotonic()
+        self._prune_inflight(now)
+        # С запасом: до ack, пришедшего чуть позже дедлайна, reaper мог не дойти
+        self._inflight[id(transaction)] = (now + 2 * self.visibility_timeout, transaction, item)
+
+    def _forget(self, transaction: dict) -> Optional[Any]:
+        """Элемент транзакции для ack/nack (None - неизвестна или уже забыта)"""
+        entry = self._inflight.pop(id(transaction), None)
+        return entry[2] if entry is not None else None
+
+    def _prune_inflight(self, now: float):
+        """
+        Забывает давно просроченные элементы
+
+        Неподтверждённые воркером транзакции возвращает в очередь reaper,
+        а без этого записи о них копились бы в памяти процесса.
+        """
+        while self._inflight:
+            key, (expires_at, _, _) = next(iter(self._inflight.items()))
+            if expires_at > now:
+                break
+            del self._inflight[key]
+
     async def length(self) -> int:
         """Возвращает длину очереди"""
         if not self._redis:
@@ -105,7 +470,10 @@ class RedisQueue:
         if not self._redis:
             await self.connect()
             
-        await self._redis.delete(self.queue_name)
+        await self._redis.delete(
+            self.queue_name, self.processing_key(), self.deadlines_key(), self.dead_letter_key
+        )
+        self._inflight.clear()
         logger.info(f"Queue '{self.queue_name}' cleared")
 
     async def peek(self, count: int = 1) -> list:
@@ -122,7 +490,7 @@ class RedisQueue:
             await self.connect()
             
         items = await self._redis.lrange(self.queue_name, -count, -1)
-        return [json.loads(item) for item in items]
+        return [decode_payload(item) for item in items]
 
     async def __aenter__(self):
         """Context manager support"""
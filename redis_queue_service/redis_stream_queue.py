@@ -0,0 +1,438 @@
+from collections import deque
+from datetime import datetime
+from typing import Deque, List, Optional, Tuple, Union
+from redis.exceptions import ResponseError
+import logging
+
+from .codecs import Codec, PayloadError, decode_payload
+from .redis_queue import RedisQueue
+
+logger = logging.getLogger(__name__)
+
+MAX_STREAM_SEQ = 2 ** 64 - 1
+
+
+def _parse_stream_id(message_id: Union[bytes, str]) -> Tuple[int, int]:
+    """Id сообщения потока ("ms-seq") в виде, пригодном для сравнения"""
+    if isinstance(message_id, bytes):
+        message_id = message_id.decode()
+    ms, seq = message_id.split("-")
+    return int(ms), int(seq)
+
+
+class RedisStreamQueue(RedisQueue):
+    """
+    Асинхронная очередь транзакций на Redis Streams
+
+    Использует:
+    - XADD для добавления
+    - XREADGROUP для извлечения через consumer group
+    - XACK для подтверждения, XAUTOCLAIM для перехвата зависших сообщений
+    - XRANGE для воспроизведения истории по времени
+    - XTRIM MINID для обрезки до maxlen только уже подтверждённых сообщений
+
+    Поверхность push/pop/length/peek совпадает с RedisQueue; извлечённые
+    сообщения остаются в pending-списке консьюмера до ack, поэтому очередь
+    всегда работает в надёжном режиме. Нечитаемое сообщение подтверждается
+    сразу, а его payload переносится в список dead_letter_key.
+    """
+
+    def __init__(
+        self,
+        redis_url: str,
+        queue_name: str = "transactions:stream",
+        group_name: str = "scoring",
+        push_chunk_size: int = 1000,
+        consumer_id: Optional[str] = None,
+        visibility_timeout: float = 30.0,
+        maxlen: Optional[int] = 1_000_000,
+        codec: Union[str, Codec] = "json"
+    ):
+        super().__init__(
+            redis_url,
+            queue_name=queue_name,
+            push_chunk_size=push_chunk_size,
+            reliable=True,
+            consumer_id=consumer_id,
+            visibility_timeout=visibility_timeout,
+            codec=codec
+        )
+        self.group_name = group_name
+        self.maxlen = maxlen
+        self._reclaimed: Deque[Tuple[bytes, bytes]] = deque()
+
+    async def connect(self):
+        """Подключение к Redis и создание consumer group"""
+        if not self._redis:
+            await super().connect()
+            await self._ensure_group()
+
+    async def close(self):
+        """Закрытие соединения"""
+        self._reclaimed.clear()
+        await super().close()
+
+    async def push(self, transaction: dict) -> int:
+        """
+        Добавляет транзакцию в поток
+
+        Args:
+            transaction: Словарь с данными транзакции
+
+        Returns:
+            Длина потока после добавления
+        """
+        return await self.push_many([transaction])
+
+    async def push_many(self, transactions: List[dict]) -> int:
+        """
+        Добавляет пачку транзакций в поток за один round-trip
+
+        Args:
+            transactions: Список транзакций
+
+        Returns:
+            Длина потока после добавления
+        """
+        if not self._redis:
+            await self.connect()
+
+        try:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                for transaction in transactions:
+                    pipe.xadd(self.queue_name, {"data": self.codec.encode(transaction)})
+                pipe.xlen(self.queue_name)
+                results = await pipe.execute()
+
+            logger.debug(f"Added {len(transactions)} transactions to stream. Length: {results[-1]}")
+            return results[-1]
+        except Exception as e:
+            logger.error(f"Failed to push transactions: {e}")
+            raise
+
+    async def pop(self, timeout: int = 0) -> Optional[dict]:
+        """
+        Извлекает транзакцию из потока (блокирующий)
+
+        Args:
+            timeout: Таймаут ожидания в секундах (0 = бесконечно)
+
+        Returns:
+            Словарь с транзакцией или None при таймауте
+        """
+        transactions = await self.pop_many(1, timeout=timeout)
+        return transactions[0] if transactions else None
+
+    async def pop_many(self, count: int, timeout: Optional[float] = 0) -> List[dict]:
+        """
+        Извлекает до count транзакций через consumer group
+
+        Сначала отдаются сообщения, перехваченные requeue_expired.
+
+        Args:
+            count: Максимальное количество транзакций
+            timeout: Таймаут ожидания в секундах, если новых сообщений нет
+                (0 = бесконечно, None = не блокировать)
+
+        Returns:
+            Список транзакций (пустой при таймауте)
+        """
+        if not self._redis:
+            await self.connect()
+
+        try:
+            entries = []
+            while self._reclaimed and len(entries) < count:
+                entries.append(self._reclaimed.popleft())
+
+            if len(entries) < count:
+                block = None
+                if timeout is not None and not entries:
+                    block = max(1, int(timeout * 1000)) if timeout > 0 else 0
+
+                response = await self._redis.xreadgroup(
+                    self.group_name,
+                    self.consumer_id,
+                    {self.queue_name: ">"},
+                    count=count - len(entries),
+                    block=block
+                )
+                for _, messages in response or []:
+                    entries.extend(
+                        (message_id, fields.get(b"data", b"")) for message_id, fields in messages
+                    )
+
+            if not entries:
+                logger.debug("Stream pop timeout")
+                return []
+
+            return await self._track(entries)
+
+        except Exception as e:
+            logger.error(f"Failed to pop transactions: {e}")
+            raise
+
+    async def ack(self, transactions: List[dict]) -> int:
+        """
+        Подтверждает обработку транзакций (XACK)
+
+        Args:
+            transactions: Объекты, полученные из pop/pop_many
+
+        Returns:
+            Количество подтверждённых сообщений
+        """
+        message_ids = self._untrack(transactions)
+        if not message_ids:
+            return 0
+
+        if not self._redis:
+            await self.connect()
+
+        return await self._redis.xack(self.queue_name, self.group_name, *message_ids)
+
+    async def nack(self, transactions: List[dict]) -> int:
+        """
+        Возвращает транзакции в поток для повторной обработки
+
+        Сообщения добавляются в конец потока заново и подтверждаются
+        под старыми id, поэтому их порядок относительно остальных не сохраняется.
+
+        Args:
+            transactions: Объекты, полученные из pop/pop_many
+
+        Returns:
+            Количество возвращённых сообщений
+        """
+        entries = [
+            (tx, message_id) for tx, message_id in ((tx, self._forget(tx)) for tx in transactions)
+            if message_id is not None
+        ]
+        if not entries:
+            return 0
+
+        if not self._redis:
+            await self.connect()
+
+        async with self._redis.pipeline(transaction=True) as pipe:
+            for transaction, _ in entries:
+                pipe.xadd(self.queue_name, {"data": self.codec.encode(transaction)})
+            pipe.xack(self.queue_name, self.group_name, *(message_id for _, message_id in entries))
+            results = await pipe.execute()
+
+        return results[-1]
+
+    async def requeue_expired(self) -> int:
+        """
+        Перехватывает (XAUTOCLAIM) сообщения, не подтверждённые дольше
+        visibility_timeout; они будут отданы следующими вызовами pop/pop_many.
+        Заодно обрезает поток до maxlen (см. _trim).
+
+        В локальном буфере держится не больше push_chunk_size перехваченных
+        сообщений: остальные остаются в pending и перехватываются следующими
+        вызовами.
+
+        Returns:
+            Количество перехваченных сообщений
+        """
+        if not self._redis:
+            await self.connect()
+
+        claimed = 0
+        cursor = b"0-0"
+        min_idle_time = int(self.visibility_timeout * 1000)
+        limit = self.push_chunk_size - len(self._reclaimed)
+
+        while claimed < limit:
+            cursor, messages, *_ = await self._redis.xautoclaim(
+                self.queue_name,
+                self.group_name,
+                self.consumer_id,
+                min_idle_time=min_idle_time,
+                start_id=cursor,
+                count=limit - claimed
+            )
+            for message_id, fields in messages:
+                if fields:
+                    self._reclaimed.append((message_id, fields.get(b"data", b"")))
+                    claimed += 1
+
+            if cursor == b"0-0" or not messages:
+                break
+
+        if claimed:
+            logger.warning(f"Claimed {claimed} expired stream messages")
+
+        await self._trim()
+        return claimed
+
+    async def length(self) -> int:
+        """Возвращает количество ещё не выданных группе сообщений"""
+        if not self._redis:
+            await self.connect()
+
+        group = await self._group_info()
+        if group and group.get("lag") is not None:
+            return group["lag"]
+
+        return await self._redis.xlen(self.queue_name)
+
+    async def clear(self):
+        """Очищает поток и пересоздаёт consumer group"""
+        if not self._redis:
+            await self.connect()
+
+        await self._redis.delete(self.queue_name, self.dead_letter_key)
+        self._inflight.clear()
+        self._reclaimed.clear()
+        await self._ensure_group()
+        logger.info(f"Stream '{self.queue_name}' cleared")
+
+    async def peek(self, count: int = 1) -> list:
+        """
+        Просмотр ещё не выданных группе сообщений без извлечения
+
+        Args:
+            count: Количество элементов для просмотра
+
+        Returns:
+            Список транзакций
+        """
+        if not self._redis:
+            await self.connect()
+
+        group = await self._group_info()
+        last_delivered = group["last-delivered-id"].decode() if group else "0-0"
+
+        messages = await self._redis.xrange(
+            self.queue_name, min=f"({last_delivered}", max="+", count=count
+        )
+        return [decode_payload(fields[b"data"]) for _, fields in messages]
+
+    async def replay(
+        self,
+        start: datetime,
+        end: Optional[datetime] = None,
+        count: Optional[int] = None
+    ) -> List[Tuple[str, dict]]:
+        """
+        Воспроизведение сообщений за интервал времени (XRANGE), без влияния на группу
+
+        Args:
+            start: Начало интервала
+            end: Конец интервала (по умолчанию - до конца потока)
+            count: Максимальное количество сообщений
+
+        Returns:
+            Список пар (id сообщения, транзакция)
+        """
+        if not self._redis:
+            await self.connect()
+
+        min_id = f"{int(start.timestamp() * 1000)}-0"
+        max_id = f"{int(end.timestamp() * 1000)}-{MAX_STREAM_SEQ}" if end else "+"
+
+        messages = await self._redis.xrange(self.queue_name, min=min_id, max=max_id, count=count)
+        return [
+            (message_id.decode(), decode_payload(fields[b"data"]))
+            for message_id, fields in messages
+        ]
+
+    async def _ensure_group(self):
+        """Создаёт consumer group (и поток), если её ещё нет"""
+        try:
+            await self._redis.xgroup_create(
+                self.queue_name, self.group_name, id="0", mkstream=True
+            )
+            logger.info(f"Created consumer group '{self.group_name}' on '{self.queue_name}'")
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    async def _group_info(self) -> Optional[dict]:
+        """Информация о consumer group из XINFO GROUPS"""
+        for group in await self._redis.xinfo_groups(self.queue_name):
+            if group["name"].decode() == self.group_name:
+                return group
+        return None
+
+    async def _trim(self) -> int:
+        """
+        Обрезает поток до maxlen, удаляя только подтверждённые сообщения
+
+        XADD MAXLEN удалял бы и ещё не выданные группе, и pending-сообщения.
+        Здесь граница XTRIM MINID не выше самого старого pending-сообщения
+        и last-delivered-id группы, поэтому поток может оставаться длиннее
+        maxlen, пока консьюмеры не догонят.
+
+        Returns:
+            Количество удалённых сообщений
+        """
+        if not self.maxlen:
+            return 0
+
+        excess = await self._redis.xlen(self.queue_name) - self.maxlen
+        if excess <= 0:
+            return 0
+
+        group = await self._group_info()
+        if not group:
+            return 0
+        safe_id = _parse_stream_id(group["last-delivered-id"])
+        pending = await self._redis.xpending(self.queue_name, self.group_name)
+        if pending["pending"]:
+            safe_id = min(safe_id, _parse_stream_id(pending["min"]))
+
+        trimmed = 0
+        while trimmed < excess:
+            # Первое сообщение, которое остаётся: за ним ровно maxlen
+            messages = await self._redis.xrange(
+                self.queue_name, min="-", max="+",
+                count=min(excess - trimmed, self.push_chunk_size) + 1
+            )
+            min_id = min(_parse_stream_id(messages[-1][0]), safe_id)
+            removed = await self._redis.xtrim(
+                self.queue_name, minid="%d-%d" % min_id, approximate=False
+            )
+            trimmed += removed
+            if not removed or min_id == safe_id:
+                break
+
+        if trimmed:
+            logger.debug(f"Trimmed {trimmed} acknowledged messages from stream")
+        return trimmed
+
+    async def _track(self, entries: List[Tuple[bytes, bytes]]) -> List[dict]:
+        """
+        Декодирует сообщения и запоминает их id для ack/nack
+
+        Нечитаемые сообщения переносятся в dead_letter_key и подтверждаются
+        (XACK) в одной транзакции, иначе XAUTOCLAIM перехватывал бы их вечно.
+        """
+        transactions, broken = [], []
+        for message_id, data in entries:
+            try:
+                transaction = decode_payload(data)
+            except PayloadError as e:
+                broken.append((message_id, data))
+                logger.error(f"Moved undecodable message {message_id.decode()} to {self.dead_letter_key}: {e}", extra={
+                    "event": "queue_dead_letter",
+                    "queue": self.queue_name,
+                })
+                continue
+            self._remember(transaction, message_id)
+            transactions.append(transaction)
+
+        if broken:
+            async with self._redis.pipeline(transaction=True) as pipe:
+                pipe.lpush(self.dead_letter_key, *(data for _, data in broken))
+                pipe.xack(self.queue_name, self.group_name, *(message_id for message_id, _ in broken))
+                await pipe.execute()
+        return transactions
+
+    def _untrack(self, transactions: List[dict]) -> List[bytes]:
+        """Возвращает id сообщений для переданных транзакций"""
+        return [
+            message_id for message_id in (self._forget(tx) for tx in transactions)
+            if message_id is not None
+        ]
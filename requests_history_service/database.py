@@ -2,8 +2,11 @@ import os
 from pathlib import Path
 from decimal import Decimal
 import logging
+from datetime import datetime
+from typing import List, Optional, Sequence, Set, Tuple
 
-from sqlalchemy import TIMESTAMP, CheckConstraint, Double, Index, String, DECIMAL, text, desc
+import asyncpg
+from sqlalchemy import TIMESTAMP, BigInteger, CheckConstraint, Double, Index, String, DECIMAL, select, text, tuple_
 from sqlalchemy.dialects.postgresql import INET
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import declarative_base, Mapped, mapped_column
@@ -31,13 +34,13 @@ async_session_maker = async_sessionmaker(
 Base = declarative_base()
 
 class TransactionHistory(Base):
-    """Таблица истории транзакций"""
+    """Таблица истории транзакций (секционирована по дням, см. 002_partitioned_history.sql)"""
     __tablename__ = "transactions_history"
 
-    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
 
     transaction_id: Mapped[str] = mapped_column(String(255), nullable=False)
-    timestamp: Mapped[str] = mapped_column(TIMESTAMP, nullable=False)
+    timestamp: Mapped[str] = mapped_column(TIMESTAMP, primary_key=True)
 
     sender_account: Mapped[str] = mapped_column(
         String(255), nullable=False
@@ -63,13 +66,186 @@ class TransactionHistory(Base):
         CheckConstraint("amount > 0", name="chk_amount_positive"),
         CheckConstraint("char_length(device_hash) >= 8", name="chk_device_hash_len"),
 
-        Index("idx_transactions_transaction_id", "transaction_id", unique=True),
-        Index("idx_transactions_sender", "sender_account"),
-        Index("idx_transactions_receiver", "receiver_account"),
-        Index("idx_transactions_correlation", "correlation_id"),
-        Index("idx_transactions_timestamp", desc("timestamp")),
+        Index("idx_transactions_transaction_id", "transaction_id", "timestamp", unique=True),
+        Index("idx_transactions_sender", "sender_account", "timestamp", "id"),
+        Index("idx_transactions_receiver", "receiver_account", "timestamp", "id"),
+        Index("idx_transactions_correlation", "correlation_id", "timestamp", "id"),
+        Index("idx_transactions_timestamp", "timestamp", postgresql_using="brin"),
+        Index("idx_transactions_timestamp_id", "timestamp", "id"),
+        {"postgresql_partition_by": 'RANGE ("timestamp")'},
     )
 
+HISTORY_COLUMNS = (
+    ("transaction_id", "varchar"),
+    ("timestamp", "timestamp"),
+    ("sender_account", "varchar"),
+    ("receiver_account", "varchar"),
+    ("amount", "float8"),
+    ("transaction_type", "varchar"),
+    ("merchant_category", "varchar"),
+    ("location", "varchar"),
+    ("device_used", "varchar"),
+    ("payment_channel", "varchar"),
+    ("ip_address", "inet"),
+    ("device_hash", "varchar"),
+    ("correlation_id", "varchar"),
+)
+
+# Длина строковых колонок истории: длиннее БД не примет всю пачку
+HISTORY_LENGTH_LIMITS = {
+    column.name: column.type.length
+    for column in TransactionHistory.__table__.columns
+    if isinstance(column.type, String) and column.type.length
+}
+
+ROLLUP_TABLES = {
+    "hour": "account_rollups_hourly",
+    "day": "account_rollups_daily",
+}
+
+
+def _rollup_upsert(table: str, granularity: str) -> str:
+    """Upsert агрегатов счёта по строкам, реально вставленным в этой команде"""
+    return (
+        f"INSERT INTO {table} AS r "
+        f"(sender_account, bucket, tx_count, amount_sum, amount_sum_sq, amount_max, devices) "
+        f"SELECT sender_account, date_trunc('{granularity}', \"timestamp\"), count(*), sum(amount), "
+        f"sum(amount * amount), max(amount), array_agg(DISTINCT device_hash) "
+        f"FROM inserted GROUP BY 1, 2 ORDER BY 1, 2 "
+        f"ON CONFLICT (sender_account, bucket) DO UPDATE SET "
+        f"tx_count = r.tx_count + EXCLUDED.tx_count, "
+        f"amount_sum = r.amount_sum + EXCLUDED.amount_sum, "
+        f"amount_sum_sq = r.amount_sum_sq + EXCLUDED.amount_sum_sq, "
+        f"amount_max = greatest(r.amount_max, EXCLUDED.amount_max), "
+        f"devices = ARRAY(SELECT DISTINCT unnest(r.devices || EXCLUDED.devices))"
+    )
+
+
+# Одна команда на пачку: колонки передаются массивами и разворачиваются
+# unnest, поэтому план один при любом размере пачки. Агрегаты обновляются
+# в той же команде и только по вставленным строкам (дубликаты не считаются);
+# ORDER BY задаёт порядок блокировок строк агрегатов между пачками.
+INSERT_MANY_SQL = (
+    "WITH inserted AS ("
+    "INSERT INTO transactions_history ("
+    + ", ".join(f'"{name}"' for name, _ in HISTORY_COLUMNS)
+    + ") SELECT * FROM unnest("
+    + ", ".join(f"${i}::{pg_type}[]" for i, (_, pg_type) in enumerate(HISTORY_COLUMNS, start=1))
+    + ') ON CONFLICT (transaction_id, "timestamp") DO NOTHING '
+    'RETURNING transaction_id, "timestamp", sender_account, amount, device_hash'
+    "), "
+    + ", ".join(
+        f"{granularity}_rollup AS ({_rollup_upsert(table, granularity)})"
+        for granularity, table in ROLLUP_TABLES.items()
+    )
+    + " SELECT transaction_id FROM inserted"
+)
+
+
+async def insert_transactions(rows: Sequence[tuple]) -> Set[str]:
+    """
+    Вставка пачки строк (в порядке HISTORY_COLUMNS) одной командой
+
+    Уже существующие (transaction_id, timestamp) пропускаются; агрегаты
+    счетов (ROLLUP_TABLES) обновляются в той же транзакции.
+
+    Returns:
+        transaction_id вставленных строк
+    """
+    columns: List[list] = [list(column) for column in zip(*rows)]
+    async with engine.begin() as conn:
+        raw = await conn.get_raw_connection()
+        records = await raw.driver_connection.fetch(INSERT_MANY_SQL, *columns)
+    return {record["transaction_id"] for record in records}
+
+
+def is_row_error(error: Exception) -> bool:
+    """
+    Ошибка из-за данных строки (значение, ограничение), а не соединения
+    или сервера: такую строку можно отделить от остальных пачки
+    """
+    return isinstance(error, (
+        asyncpg.exceptions.DataError,
+        asyncpg.exceptions.IntegrityConstraintViolationError,
+    ))
+
+
+async def query_transactions(
+    sender_account: Optional[str] = None,
+    receiver_account: Optional[str] = None,
+    correlation_id: Optional[str] = None,
+    from_timestamp: Optional[datetime] = None,
+    to_timestamp: Optional[datetime] = None,
+    after: Optional[Tuple[datetime, int]] = None,
+    limit: int = 100,
+    ascending: bool = False,
+) -> list:
+    """
+    Страница истории по фильтрам, упорядоченная по (timestamp, id)
+
+    Keyset-пагинация: следующая страница начинается строго после ключа
+    after последней строки предыдущей, поэтому стоимость запроса не
+    зависит от глубины. Диапазон времени - [from_timestamp, to_timestamp).
+    """
+    table = TransactionHistory.__table__
+    key = tuple_(table.c.timestamp, table.c.id)
+    stmt = select(table)
+
+    if sender_account:
+        stmt = stmt.where(table.c.sender_account == sender_account)
+    if receiver_account:
+        stmt = stmt.where(table.c.receiver_account == receiver_account)
+    if correlation_id:
+        stmt = stmt.where(table.c.correlation_id == correlation_id)
+    if from_timestamp:
+        stmt = stmt.where(table.c.timestamp >= from_timestamp)
+    if to_timestamp:
+        stmt = stmt.where(table.c.timestamp < to_timestamp)
+
+    # Условие на timestamp дублирует ключ: по сравнению строк (timestamp, id)
+    # Postgres не отсекает секции
+    if ascending:
+        if after:
+            stmt = stmt.where(table.c.timestamp >= after[0], key > tuple_(*after))
+        stmt = stmt.order_by(table.c.timestamp, table.c.id)
+    else:
+        if after:
+            stmt = stmt.where(table.c.timestamp <= after[0], key < tuple_(*after))
+        stmt = stmt.order_by(table.c.timestamp.desc(), table.c.id.desc())
+
+    async with engine.connect() as conn:
+        result = await conn.execute(stmt.limit(limit))
+        return result.mappings().all()
+
+
+async def account_rollups(
+    account: str,
+    granularity: str = "day",
+    from_timestamp: Optional[datetime] = None,
+    to_timestamp: Optional[datetime] = None,
+) -> list:
+    """Корзины агрегатов счёта (granularity - hour или day) с началом в [from_timestamp, to_timestamp)"""
+    table = ROLLUP_TABLES[granularity]
+    conditions = ["sender_account = :account"]
+    params = {"account": account}
+    if from_timestamp:
+        conditions.append("bucket >= :from_timestamp")
+        params["from_timestamp"] = from_timestamp
+    if to_timestamp:
+        conditions.append("bucket < :to_timestamp")
+        params["to_timestamp"] = to_timestamp
+
+    async with engine.connect() as conn:
+        result = await conn.execute(
+            text(
+                f"SELECT bucket, tx_count, amount_sum, amount_sum_sq, amount_max, devices "
+                f"FROM {table} WHERE {' AND '.join(conditions)} ORDER BY bucket"
+            ),
+            params
+        )
+        return result.mappings().all()
+
+
 async def apply_migrations():
     """Применяет SQL миграции из папки migrations/"""
     migrations_path = Path(__file__).parent / "migrations"
@@ -79,16 +255,43 @@ async def apply_migrations():
         return
     
     async with engine.begin() as conn:
+        # Через соединение asyncpg напрямую: файл выполняется целиком,
+        # функции и DO-блоки не режутся по ";"
+        raw = await conn.get_raw_connection()
         for sql_file in sorted(migrations_path.glob("*.sql")):
             logger.info(f"Applying migration: {sql_file.name}")
             sql = sql_file.read_text()
-            statements = [stmt.strip() for stmt in sql.split(";") if stmt.strip()]
-
-            for stmt in statements:
-                await conn.execute(text(stmt))
+            await raw.driver_connection.execute(sql)
     
     logger.info("Migrations applied")
 
+
+async def maintain_partitions(days_ahead: int, retention_days: int = 0, detach: bool = False) -> Tuple[int, int]:
+    """
+    Создаёт дневные секции на days_ahead дней вперёд и применяет retention
+
+    Args:
+        retention_days: сколько дней хранить (0 - без удаления)
+        detach: отсоединять старые секции вместо удаления
+
+    Returns:
+        Число созданных и удалённых (отсоединённых) секций
+    """
+    async with engine.begin() as conn:
+        created = (await conn.execute(
+            text("SELECT create_history_partitions(current_date, current_date + CAST(:days AS integer))"),
+            {"days": days_ahead}
+        )).scalar()
+
+        removed = 0
+        if retention_days > 0:
+            removed = (await conn.execute(
+                text("SELECT apply_history_retention(CAST(:keep_days AS integer), :detach)"),
+                {"keep_days": retention_days, "detach": detach}
+            )).scalar()
+
+    return created, removed
+
 async def init_db():
     """Инициализация БД"""
     await apply_migrations()
@@ -15,8 +15,11 @@ CREATE TABLE IF NOT EXISTS transactions_history (
     correlation_id VARCHAR(255) NOT NULL
 );
 
+-- С "timestamp": миграции применяются при каждом запуске, а на секционированной
+-- таблице (002_partitioned_history.sql) уникальный индекс без ключа секционирования
+-- не проходит проверку даже с IF NOT EXISTS
 CREATE UNIQUE INDEX IF NOT EXISTS idx_transactions_transaction_id
-    ON transactions_history (transaction_id);
+    ON transactions_history (transaction_id, "timestamp");
 
 CREATE INDEX IF NOT EXISTS idx_transactions_sender
     ON transactions_history (sender_account);
@@ -0,0 +1,149 @@
+-- История транзакций секционирована по дням ("timestamp"): вставки идут в
+-- небольшую горячую секцию, запросы по времени читают только нужные дни,
+-- а retention удаляет секции целиком вместо DELETE.
+
+-- Дневные секции за [from_day, to_day]. Строки этих дней, попавшие в
+-- секцию по умолчанию, переносятся в новую секцию.
+CREATE OR REPLACE FUNCTION create_history_partitions(from_day DATE, to_day DATE)
+RETURNS INTEGER AS $$
+DECLARE
+    day DATE;
+    partition_name TEXT;
+    created INTEGER := 0;
+BEGIN
+    FOR day IN SELECT generate_series(from_day, to_day, INTERVAL '1 day')::date LOOP
+        partition_name := 'transactions_history_p' || to_char(day, 'YYYYMMDD');
+        CONTINUE WHEN to_regclass(partition_name) IS NOT NULL;
+
+        EXECUTE format(
+            'CREATE TABLE %I (LIKE transactions_history INCLUDING DEFAULTS INCLUDING CONSTRAINTS)',
+            partition_name
+        );
+        EXECUTE format(
+            'WITH moved AS (DELETE FROM transactions_history_default '
+            'WHERE "timestamp" >= %L AND "timestamp" < %L RETURNING *) '
+            'INSERT INTO %I SELECT * FROM moved',
+            day, day + 1, partition_name
+        );
+        -- CHECK с границами секции избавляет ATTACH от проверки всех строк
+        EXECUTE format(
+            'ALTER TABLE %I ADD CONSTRAINT %I CHECK ("timestamp" >= %L AND "timestamp" < %L)',
+            partition_name, partition_name || '_bounds', day, day + 1
+        );
+        EXECUTE format(
+            'ALTER TABLE transactions_history ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+            partition_name, day, day + 1
+        );
+        EXECUTE format('ALTER TABLE %I DROP CONSTRAINT %I', partition_name, partition_name || '_bounds');
+        created := created + 1;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Удаляет (detach_only - только отсоединяет, например для архива) дневные
+-- секции, целиком старше keep_days дней, и такие же строки секции по умолчанию.
+CREATE OR REPLACE FUNCTION apply_history_retention(keep_days INTEGER, detach_only BOOLEAN DEFAULT FALSE)
+RETURNS INTEGER AS $$
+DECLARE
+    cutoff DATE := current_date - keep_days;
+    partition_name TEXT;
+    removed INTEGER := 0;
+BEGIN
+    FOR partition_name IN
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'transactions_history'::regclass
+          AND c.relname ~ '^transactions_history_p[0-9]{8}$'
+          AND to_date(right(c.relname, 8), 'YYYYMMDD') < cutoff
+        ORDER BY c.relname
+    LOOP
+        IF detach_only THEN
+            EXECUTE format('ALTER TABLE transactions_history DETACH PARTITION %I', partition_name);
+        ELSE
+            EXECUTE format('DROP TABLE %I', partition_name);
+        END IF;
+        removed := removed + 1;
+    END LOOP;
+
+    DELETE FROM transactions_history_default WHERE "timestamp" < cutoff;
+    RETURN removed;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Перевод таблицы из 001_init.sql в секционированную (один раз).
+-- Уникальность transaction_id возможна только вместе с ключом секционирования,
+-- поэтому ключ - (transaction_id, "timestamp"): повторная доставка транзакции
+-- приходит с тем же временем. Имена индексов сохраняются, чтобы повторный
+-- запуск 001_init.sql их не создавал.
+DO $$
+DECLARE
+    legacy_day DATE;
+BEGIN
+    IF (SELECT relkind FROM pg_class WHERE oid = 'transactions_history'::regclass) = 'p' THEN
+        RETURN;
+    END IF;
+
+    ALTER TABLE transactions_history RENAME TO transactions_history_legacy;
+    ALTER TABLE transactions_history_legacy
+        RENAME CONSTRAINT transactions_history_pkey TO transactions_history_legacy_pkey;
+    ALTER INDEX IF EXISTS idx_transactions_transaction_id RENAME TO idx_transactions_legacy_transaction_id;
+    ALTER INDEX IF EXISTS idx_transactions_sender RENAME TO idx_transactions_legacy_sender;
+    ALTER INDEX IF EXISTS idx_transactions_receiver RENAME TO idx_transactions_legacy_receiver;
+    ALTER INDEX IF EXISTS idx_transactions_correlation RENAME TO idx_transactions_legacy_correlation;
+    ALTER INDEX IF EXISTS idx_transactions_timestamp RENAME TO idx_transactions_legacy_timestamp;
+
+    ALTER SEQUENCE transactions_history_id_seq OWNED BY NONE;
+    ALTER SEQUENCE transactions_history_id_seq AS BIGINT;
+
+    CREATE TABLE transactions_history (
+        id BIGINT NOT NULL DEFAULT nextval('transactions_history_id_seq'),
+        transaction_id VARCHAR(255) NOT NULL,
+        "timestamp" TIMESTAMP NOT NULL,
+        sender_account VARCHAR(255) NOT NULL CHECK (char_length(sender_account) >= 5),
+        receiver_account VARCHAR(255) NOT NULL CHECK (char_length(receiver_account) >= 5),
+        amount DOUBLE PRECISION NOT NULL CHECK (amount > 0),
+        transaction_type VARCHAR(100) NOT NULL,
+        merchant_category VARCHAR(100) NOT NULL,
+        location VARCHAR(255) NOT NULL,
+        device_used VARCHAR(100) NOT NULL,
+        payment_channel VARCHAR(100) NOT NULL,
+        ip_address INET NOT NULL,
+        device_hash VARCHAR(255) NOT NULL CHECK (char_length(device_hash) >= 8),
+        correlation_id VARCHAR(255) NOT NULL,
+        PRIMARY KEY (id, "timestamp")
+    ) PARTITION BY RANGE ("timestamp");
+
+    ALTER SEQUENCE transactions_history_id_seq OWNED BY transactions_history.id;
+
+    -- Строки вне созданных секций (поздние, далёкое будущее)
+    CREATE TABLE transactions_history_default PARTITION OF transactions_history DEFAULT;
+
+    -- Секции только под дни, в которых есть строки
+    FOR legacy_day IN SELECT DISTINCT "timestamp"::date FROM transactions_history_legacy LOOP
+        PERFORM create_history_partitions(legacy_day, legacy_day);
+    END LOOP;
+
+    INSERT INTO transactions_history SELECT * FROM transactions_history_legacy;
+    DROP TABLE transactions_history_legacy;
+END $$;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_transactions_transaction_id
+    ON transactions_history (transaction_id, "timestamp");
+
+CREATE INDEX IF NOT EXISTS idx_transactions_sender
+    ON transactions_history (sender_account);
+
+CREATE INDEX IF NOT EXISTS idx_transactions_receiver
+    ON transactions_history (receiver_account);
+
+CREATE INDEX IF NOT EXISTS idx_transactions_correlation
+    ON transactions_history (correlation_id);
+
+-- Строки секции пишутся почти по порядку времени: BRIN в сотни раз меньше
+-- B-tree и не разрастается на горячей секции
+CREATE INDEX IF NOT EXISTS idx_transactions_timestamp
+    ON transactions_history USING brin ("timestamp") WITH (pages_per_range = 32);
+
+SELECT create_history_partitions(current_date, current_date + 7);
@@ -0,0 +1,22 @@
+-- Индексы под keyset-пагинацию истории счёта: строки счёта читаются сразу в
+-- порядке (timestamp, id) без сортировки. Одноколоночные индексы из
+-- 001_init.sql пересоздаются под теми же именами (повторный запуск 001 их
+-- пропускает), чтобы не держать на вставке лишние индексы.
+DO $$
+BEGIN
+    IF (SELECT indexdef FROM pg_indexes WHERE indexname = 'idx_transactions_sender')
+            NOT LIKE '%(sender_account, "timestamp", id)%' THEN
+        DROP INDEX idx_transactions_sender;
+    END IF;
+
+    IF (SELECT indexdef FROM pg_indexes WHERE indexname = 'idx_transactions_receiver')
+            NOT LIKE '%(receiver_account, "timestamp", id)%' THEN
+        DROP INDEX idx_transactions_receiver;
+    END IF;
+END $$;
+
+CREATE INDEX IF NOT EXISTS idx_transactions_sender
+    ON transactions_history (sender_account, "timestamp", id);
+
+CREATE INDEX IF NOT EXISTS idx_transactions_receiver
+    ON transactions_history (receiver_account, "timestamp", id);
@@ -0,0 +1,39 @@
+-- Агрегаты по счёту отправителя за час и за день. Обновляются upsert'ом в той
+-- же команде, что и вставка истории (insert_transactions), поэтому статистика
+-- счёта читается несколькими строками вместо скана всей истории.
+-- sum и sum_sq складываются, devices объединяются - агрегаты любого
+-- диапазона собираются из корзин.
+CREATE TABLE IF NOT EXISTS account_rollups_hourly (
+    sender_account VARCHAR(255) NOT NULL,
+    bucket TIMESTAMP NOT NULL,
+    tx_count BIGINT NOT NULL,
+    amount_sum DOUBLE PRECISION NOT NULL,
+    amount_sum_sq DOUBLE PRECISION NOT NULL,
+    amount_max DOUBLE PRECISION NOT NULL,
+    devices TEXT[] NOT NULL,
+    PRIMARY KEY (sender_account, bucket)
+);
+
+CREATE TABLE IF NOT EXISTS account_rollups_daily (
+    LIKE account_rollups_hourly INCLUDING ALL
+);
+
+-- Заполнение по уже сохранённой истории (один раз, пока агрегатов нет)
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM account_rollups_hourly) OR EXISTS (SELECT 1 FROM account_rollups_daily) THEN
+        RETURN;
+    END IF;
+
+    INSERT INTO account_rollups_hourly
+    SELECT sender_account, date_trunc('hour', "timestamp"), count(*), sum(amount),
+           sum(amount * amount), max(amount), array_agg(DISTINCT device_hash)
+    FROM transactions_history
+    GROUP BY 1, 2;
+
+    INSERT INTO account_rollups_daily
+    SELECT sender_account, date_trunc('day', "timestamp"), count(*), sum(amount),
+           sum(amount * amount), max(amount), array_agg(DISTINCT device_hash)
+    FROM transactions_history
+    GROUP BY 1, 2;
+END $$;
@@ -0,0 +1,18 @@
+-- Индексы под keyset-пагинацию запросов без счёта: BRIN отбирает блоки
+-- диапазона, но каждую страницу приходится сортировать, поэтому запросы
+-- только по времени идут по B-tree (timestamp, id), а по correlation_id -
+-- по (correlation_id, timestamp, id). Индекс correlation_id из 002 пересоздаётся
+-- под тем же именем, как в 003.
+DO $$
+BEGIN
+    IF (SELECT indexdef FROM pg_indexes WHERE indexname = 'idx_transactions_correlation')
+            NOT LIKE '%(correlation_id, "timestamp", id)%' THEN
+        DROP INDEX idx_transactions_correlation;
+    END IF;
+END $$;
+
+CREATE INDEX IF NOT EXISTS idx_transactions_correlation
+    ON transactions_history (correlation_id, "timestamp", id);
+
+CREATE INDEX IF NOT EXISTS idx_transactions_timestamp_id
+    ON transactions_history ("timestamp", id);
@@ -1,15 +1,31 @@
 import asyncio
+import base64
 import grpc
+import ipaddress
 import logging
+import math
 import os
+import signal
 import sys
 from pathlib import Path
-from sqlalchemy import insert, select
+from typing import Iterable, List, Optional, Tuple
+from sqlalchemy import select
 from grpc_reflection.v1alpha import reflection
 from datetime import datetime
 
 from generated_proto import transactions_pb2, transactions_pb2_grpc
-from database import async_session_maker, init_db, TransactionHistory
+from database import (
+    HISTORY_LENGTH_LIMITS,
+    ROLLUP_TABLES,
+    account_rollups,
+    async_session_maker,
+    init_db,
+    insert_transactions,
+    is_row_error,
+    maintain_partitions,
+    query_transactions,
+)
+from write_buffer import WriteBuffer
 
 logging.basicConfig(
     level=logging.INFO,
@@ -18,47 +34,366 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 GRPC_PORT = os.getenv("GRPC_PORT", "50053")
+# Сколько строк потока InsertTransactionsStream пишется одной командой
+BULK_INSERT_CHUNK_SIZE = int(os.getenv("BULK_INSERT_CHUNK_SIZE", "1000"))
+# Group commit: строки всех RPC пишутся общими пачками
+WRITE_BUFFER_FLUSH_ROWS = int(os.getenv("WRITE_BUFFER_FLUSH_ROWS", "1000"))
+WRITE_BUFFER_FLUSH_MS = int(os.getenv("WRITE_BUFFER_FLUSH_MS", "10"))
+WRITE_BUFFER_MAX_ROWS = int(os.getenv("WRITE_BUFFER_MAX_ROWS", "50000"))
+# durable - ответ после коммита, fast - после постановки в буфер
+WRITE_BUFFER_ACK = os.getenv("WRITE_BUFFER_ACK", "durable")
+SHUTDOWN_GRACE = float(os.getenv("SHUTDOWN_GRACE", "10"))
+# Секции истории: сколько дней создавать вперёд, сколько хранить (0 - всегда)
+HISTORY_PARTITION_DAYS_AHEAD = int(os.getenv("HISTORY_PARTITION_DAYS_AHEAD", "7"))
+HISTORY_RETENTION_DAYS = int(os.getenv("HISTORY_RETENTION_DAYS", "0"))
+HISTORY_RETENTION_DETACH = os.getenv("HISTORY_RETENTION_DETACH", "false").lower() in ("1", "true", "yes")
+PARTITION_MAINTENANCE_INTERVAL = float(os.getenv("PARTITION_MAINTENANCE_INTERVAL", "3600"))
+
+# Размер страницы GetTransactions по умолчанию / максимум; StreamTransactions
+# читает историю страницами по QUERY_STREAM_PAGE_SIZE
+QUERY_DEFAULT_PAGE_SIZE = int(os.getenv("QUERY_DEFAULT_PAGE_SIZE", "100"))
+QUERY_MAX_PAGE_SIZE = int(os.getenv("QUERY_MAX_PAGE_SIZE", "1000"))
+QUERY_STREAM_PAGE_SIZE = int(os.getenv("QUERY_STREAM_PAGE_SIZE", "1000"))
+
+HISTORY_TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S.%f"
+
+INSERTED = "inserted"
+QUEUED = "queued"
+DUPLICATE = "duplicate"
+INVALID = "invalid"
+FAILED = "failed"
+
+
+def _history_row(request) -> tuple:
+    """Строка для вставки (порядок HISTORY_COLUMNS); ValueError - если данные некорректны"""
+    if not request.transaction_id:
+        raise ValueError("transaction_id is required")
+    if request.amount <= 0:
+        raise ValueError("amount must be positive")
+    if len(request.sender_account) < 5 or len(request.receiver_account) < 5:
+        raise ValueError("account must be at least 5 characters")
+    if len(request.device_hash) < 8:
+        raise ValueError("device_hash must be at least 8 characters")
+    for name, limit in HISTORY_LENGTH_LIMITS.items():
+        if len(getattr(request, name)) > limit:
+            raise ValueError(f"{name} must be at most {limit} characters")
+
+    return (
+        request.transaction_id,
+        datetime.strptime(request.timestamp, HISTORY_TIMESTAMP_FORMAT),
+        request.sender_account,
+        request.receiver_account,
+        request.amount,
+        request.transaction_type,
+        request.merchant_category,
+        request.location,
+        request.device_used,
+        request.payment_channel,
+        str(ipaddress.ip_address(request.ip_address)),
+        request.device_hash,
+        request.correlation_id,
+    )
+
+
+async def _insert_batch(write_buffer: WriteBuffer, requests: List) -> List[transactions_pb2.InsertResult]:
+    """
+    Вставка пачки через буфер со статусом по каждой транзакции
+
+    Некорректные строки получают invalid и не мешают остальным; уже
+    записанные (и повторы внутри пачки) - duplicate; строка, которую
+    отвергла БД, - failed, а при ошибке соединения с БД failed получает
+    вся пачка. В быстром режиме буфера записанные в буфер строки
+    получают queued.
+    """
+    results = [
+        transactions_pb2.InsertResult(
+            transaction_id=request.transaction_id,
+            correlation_id=request.correlation_id,
+        )
+        for request in requests
+    ]
+
+    rows = {}
+    for request, result in zip(requests, results):
+        try:
+            row = _history_row(request)
+        except ValueError as e:
+            result.status = INVALID
+            result.error = str(e)
+            continue
+        if request.transaction_id in rows:
+            result.status = DUPLICATE
+            continue
+        rows[request.transaction_id] = row
+
+    if rows:
+        try:
+            flushed = await write_buffer.submit(list(rows.values()))
+        except Exception as e:
+            logger.error(f"Bulk insert of {len(rows)} transactions failed: {e}")
+            for result in results:
+                if not result.status:
+                    result.status = FAILED
+                    result.error = str(e)
+            return results
+
+        for result in results:
+            if not result.status:
+                if flushed is None:
+                    result.status = QUEUED
+                elif result.transaction_id in flushed.failed:
+                    result.status = FAILED
+                    result.error = str(flushed.failed[result.transaction_id])
+                elif result.transaction_id in flushed.inserted:
+                    result.status = INSERTED
+                else:
+                    result.status = DUPLICATE
+    return results
+
+
+def _encode_page_token(row) -> str:
+    key = f"{row['timestamp'].isoformat()}|{row['id']}"
+    return base64.urlsafe_b64encode(key.encode()).decode()
+
+
+def _decode_page_token(token: str) -> Optional[Tuple[datetime, int]]:
+    """Ключ (timestamp, id) последней строки страницы; ValueError - если токен испорчен"""
+    if not token:
+        return None
+    try:
+        timestamp, row_id = base64.urlsafe_b64decode(token.encode()).decode().split("|")
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except Exception:
+        raise ValueError("invalid page_token")
+
+
+def _query_filters(request) -> dict:
+    """Фильтры TransactionsQuery для query_transactions; ValueError - если запрос некорректен"""
+    filters = {
+        "sender_account": request.sender_account or None,
+        "receiver_account": request.receiver_account or None,
+        "correlation_id": request.correlation_id or None,
+        "from_timestamp": datetime.fromisoformat(request.from_timestamp) if request.from_timestamp else None,
+        "to_timestamp": datetime.fromisoformat(request.to_timestamp) if request.to_timestamp else None,
+        "ascending": request.ascending,
+    }
+    if not any(value for name, value in filters.items() if name != "ascending"):
+        raise ValueError("account, correlation_id or time range is required")
+    if request.limit < 0:
+        raise ValueError("limit must not be negative")
+    return filters
+
+
+def _history_transaction(row) -> transactions_pb2.HistoryTransaction:
+    return transactions_pb2.HistoryTransaction(
+        id=row["id"],
+        transaction_id=row["transaction_id"],
+        timestamp=row["timestamp"].strftime(HISTORY_TIMESTAMP_FORMAT),
+        sender_account=row["sender_account"],
+        receiver_account=row["receiver_account"],
+        amount=row["amount"],
+        transaction_type=row["transaction_type"],
+        merchant_category=row["merchant_category"],
+        location=row["location"],
+        device_used=row["device_used"],
+        payment_channel=row["payment_channel"],
+        ip_address=str(row["ip_address"]),
+        device_hash=row["device_hash"],
+        correlation_id=row["correlation_id"],
+    )
+
+
+def _account_stats(account: str, rows) -> transactions_pb2.AccountStatsResponse:
+    """Статистика счёта за диапазон, собранная из корзин агрегатов"""
+    response = transactions_pb2.AccountStatsResponse(account=account)
+    devices = set()
+    amount_sum_sq = 0.0
+    for row in rows:
+        response.buckets.append(transactions_pb2.AccountStatsBucket(
+            bucket=row["bucket"].strftime(HISTORY_TIMESTAMP_FORMAT),
+            count=row["tx_count"],
+            amount_sum=row["amount_sum"],
+            amount_sum_sq=row["amount_sum_sq"],
+            max_amount=row["amount_max"],
+            distinct_devices=len(row["devices"]),
+        ))
+        response.count += row["tx_count"]
+        response.amount_sum += row["amount_sum"]
+        response.max_amount = max(response.max_amount, row["amount_max"])
+        amount_sum_sq += row["amount_sum_sq"]
+        devices.update(row["devices"])
+
+    n = response.count
+    if n:
+        response.mean_amount = response.amount_sum / n
+    if n >= 2:
+        # Выборочное стандартное отклонение, как в онлайн-признаках
+        variance = (amount_sum_sq - response.amount_sum ** 2 / n) / (n - 1)
+        response.stddev_amount = math.sqrt(max(variance, 0.0))
+    response.distinct_devices = len(devices)
+    return response
+
+
+async def _maintain_partitions_forever():
+    """Периодически создаёт будущие секции истории и удаляет устаревшие"""
+    while True:
+        try:
+            created, removed = await maintain_partitions(
+                HISTORY_PARTITION_DAYS_AHEAD, HISTORY_RETENTION_DAYS, HISTORY_RETENTION_DETACH
+            )
+            if created or removed:
+                logger.info(f"History partitions: {created} created, {removed} removed")
+        except Exception as e:
+            logger.error(f"History partition maintenance failed: {e}")
+        await asyncio.sleep(PARTITION_MAINTENANCE_INTERVAL)
+
+
+def _insert_response(results: Iterable) -> transactions_pb2.InsertTransactionsResponse:
+    response = transactions_pb2.InsertTransactionsResponse(results=results)
+    for result in response.results:
+        if result.status in (INSERTED, QUEUED):
+            response.inserted += 1
+        elif result.status == DUPLICATE:
+            response.duplicates += 1
+        elif result.status == INVALID:
+            response.invalid += 1
+        else:
+            response.failed += 1
+    return response
+
 
 class TransactionsDBServicer(transactions_pb2_grpc.TransactionsDBServicer):
     """Async реализация TransactionsDB сервиса"""
     
+    def __init__(self, write_buffer: WriteBuffer):
+        self.write_buffer = write_buffer
+
     async def InsertTransaction(self, request, context):
         """Добавить транзакцию в историю"""
-        async with async_session_maker() as db:
+        [result] = await _insert_batch(self.write_buffer, [request])
+
+        if result.status in (INSERTED, QUEUED):
+            logger.info(f"Transaction inserted: {request.correlation_id}")
+            return transactions_pb2.InsertTransactionResponse(status="success")
+
+        error = result.error or f"{result.status} transaction_id"
+        logger.error(f"Transaction inserte failed: {error}, correlation_id: {request.correlation_id}")
+        context.set_code(grpc.StatusCode.INTERNAL)
+        context.set_details(error)
+        return transactions_pb2.InsertTransactionResponse(status="failure")
+
+    async def InsertTransactions(self, request, context):
+        """Добавить пачку транзакций в историю одной командой"""
+        results = await _insert_batch(self.write_buffer, list(request.transactions))
+        response = _insert_response(results)
+        logger.info(
+            f"Transactions batch: {response.inserted} inserted, {response.duplicates} duplicates, "
+            f"{response.invalid} invalid, {response.failed} failed"
+        )
+        return response
+
+    async def InsertTransactionsStream(self, request_iterator, context):
+        """Добавить поток транзакций; пишется пачками по BULK_INSERT_CHUNK_SIZE"""
+        results = []
+        chunk = []
+        async for request in request_iterator:
+            chunk.append(request)
+            if len(chunk) >= BULK_INSERT_CHUNK_SIZE:
+                results.extend(await _insert_batch(self.write_buffer, chunk))
+                chunk = []
+        if chunk:
+            results.extend(await _insert_batch(self.write_buffer, chunk))
+
+        response = _insert_response(results)
+        logger.info(
+            f"Transactions stream: {response.inserted} inserted, {response.duplicates} duplicates, "
+            f"{response.invalid} invalid, {response.failed} failed"
+        )
+        return response
+
+    async def GetTransactions(self, request, context):
+        """Страница истории по счёту, correlation_id и/или диапазону времени"""
+        try:
+            filters = _query_filters(request)
+            after = _decode_page_token(request.page_token)
+        except ValueError as e:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(str(e))
+            return transactions_pb2.TransactionsPage()
+
+        limit = min(request.limit or QUERY_DEFAULT_PAGE_SIZE, QUERY_MAX_PAGE_SIZE)
+        try:
+            # Строка сверх limit показывает, есть ли следующая страница
+            rows = await query_transactions(**filters, after=after, limit=limit + 1)
+        except Exception as e:
+            logger.error(f"Transactions query failed: {e}")
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(str(e))
+            return transactions_pb2.TransactionsPage()
+
+        page = transactions_pb2.TransactionsPage(
+            transactions=[_history_transaction(row) for row in rows[:limit]]
+        )
+        if len(rows) > limit:
+            page.next_page_token = _encode_page_token(rows[limit - 1])
+        return page
+
+    async def StreamTransactions(self, request, context):
+        """
+        Вся история по фильтрам потоком (limit - общее ограничение, 0 - без него)
+
+        Читается keyset-страницами по QUERY_STREAM_PAGE_SIZE: в памяти одна
+        страница, и нет долгой транзакции, мешающей vacuum и retention.
+        """
+        try:
+            filters = _query_filters(request)
+            after = _decode_page_token(request.page_token)
+        except ValueError as e:
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+
+        remaining = request.limit or None
+        while remaining is None or remaining > 0:
+            page_size = min(QUERY_STREAM_PAGE_SIZE, remaining or QUERY_STREAM_PAGE_SIZE)
             try:
-                ts = datetime.strptime(request.timestamp, "%Y-%m-%dT%H:%M:%S.%f")
-
-                stmt = insert(TransactionHistory).values(
-                    transaction_id=request.transaction_id,
-                    timestamp=ts,
-                    sender_account=request.sender_account,
-                    receiver_account=request.receiver_account,
-                    amount=request.amount,
-                    transaction_type=request.transaction_type,
-                    merchant_category=request.merchant_category,
-                    location=request.location,
-                    device_used=request.device_used,
-                    payment_channel=request.payment_channel,
-                    ip_address=request.ip_address,
-                    device_hash=request.device_hash,
-                    correlation_id=request.correlation_id,
-                )
-                
-                await db.execute(stmt)
-                await db.commit()
-
-                logger.info(f"Transaction inserted: {request.correlation_id}")
-                
-                return transactions_pb2.InsertTransactionResponse(
-                    status="success",
-                )
-                
+                rows = await query_transactions(**filters, after=after, limit=page_size)
             except Exception as e:
-                logger.error(f"Transaction inserte failed: {e}, correlation_id: {request.correlation_id}")
-                context.set_code(grpc.StatusCode.INTERNAL)
-                context.set_details(str(e))
-                return transactions_pb2.InsertTransactionResponse(status="failure")
-    
+                logger.error(f"Transactions stream query failed: {e}")
+                await context.abort(grpc.StatusCode.INTERNAL, str(e))
+
+            for row in rows:
+                yield _history_transaction(row)
+
+            if len(rows) < page_size:
+                break
+            after = (rows[-1]["timestamp"], rows[-1]["id"])
+            if remaining is not None:
+                remaining -= len(rows)
+
+    async def GetAccountStats(self, request, context):
+        """Статистика счёта отправителя по часовым или дневным агрегатам"""
+        granularity = request.granularity or "day"
+        try:
+            if not request.account:
+                raise ValueError("account is required")
+            if granularity not in ROLLUP_TABLES:
+                raise ValueError(f"granularity must be one of {', '.join(ROLLUP_TABLES)}")
+            from_timestamp = datetime.fromisoformat(request.from_timestamp) if request.from_timestamp else None
+            to_timestamp = datetime.fromisoformat(request.to_timestamp) if request.to_timestamp else None
+        except ValueError as e:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(str(e))
+            return transactions_pb2.AccountStatsResponse()
+
+        try:
+            rows = await account_rollups(request.account, granularity, from_timestamp, to_timestamp)
+        except Exception as e:
+            logger.error(f"Account stats query failed: {e}")
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(str(e))
+            return transactions_pb2.AccountStatsResponse()
+
+        return _account_stats(request.account, rows)
+
     async def HealthCheck(self, request, context):
         """Health check"""
         async with async_session_maker() as db:
@@ -74,7 +409,18 @@ async def serve():
     """Запуск async gRPC сервера"""
     logger.info("Initializing database...")
     await init_db()
-    
+
+    write_buffer = WriteBuffer(
+        insert_transactions,
+        flush_rows=WRITE_BUFFER_FLUSH_ROWS,
+        flush_interval=WRITE_BUFFER_FLUSH_MS / 1000,
+        max_rows=WRITE_BUFFER_MAX_ROWS,
+        durable=WRITE_BUFFER_ACK != "fast",
+        is_row_error=is_row_error,
+    )
+    write_buffer.start()
+    maintenance = asyncio.create_task(_maintain_partitions_forever())
+
     server = grpc.aio.server()
 
     SERVICE_NAMES = (
@@ -84,7 +430,7 @@ async def serve():
     reflection.enable_server_reflection(SERVICE_NAMES, server)
     
     transactions_pb2_grpc.add_TransactionsDBServicer_to_server(
-        TransactionsDBServicer(), 
+        TransactionsDBServicer(write_buffer),
         server
     )
     
@@ -94,12 +440,18 @@ async def serve():
     
     await server.start()
     logger.info("Server started!")
-    
-    try:
-        await server.wait_for_termination()
-    except KeyboardInterrupt:
-        logger.info("Shutting down...")
-        await server.stop(0)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+    await stop.wait()
+
+    # Сначала дожидаемся текущих RPC (их строки уже в буфере), затем дописываем буфер
+    logger.info("Shutting down...")
+    await server.stop(SHUTDOWN_GRACE)
+    await write_buffer.close()
+    maintenance.cancel()
 
 
 if __name__ == '__main__':
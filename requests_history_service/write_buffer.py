@@ -0,0 +1,200 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+Writer = Callable[[Sequence[tuple]], Awaitable[Set[str]]]
+
+
+class FlushResult(NamedTuple):
+    """Итог записи строк одного submit"""
+    inserted: Set[str]
+    # transaction_id строк, которые БД отвергла, -> ошибка
+    failed: Dict[str, Exception]
+
+
+class WriteBuffer:
+    """
+    Write-behind буфер истории транзакций (group commit)
+
+    Строки от всех RPC копятся в общем буфере и пишутся одной вставкой,
+    когда набралось flush_rows строк или самая старая ждёт flush_interval
+    секунд; пока идёт запись, следующая пачка набирается. Буфер ограничен
+    max_rows строками: при переполнении submit ждёт освобождения места.
+
+    В durable-режиме submit возвращает результат после коммита пачки, в
+    быстром (durable=False) - сразу после постановки в буфер: строки,
+    не записанные из-за ошибки БД, только попадают в лог и счётчик failed.
+    close() дописывает всё, что осталось в буфере.
+
+    Если вставка упала из-за данных (is_row_error), пачка делится пополам,
+    пока не останутся отдельные плохие строки: они получают ошибку в
+    FlushResult.failed, остальные строки пачки записываются.
+    """
+
+    def __init__(
+        self,
+        write: Writer,
+        flush_rows: int = 1000,
+        flush_interval: float = 0.01,
+        max_rows: int = 50000,
+        durable: bool = True,
+        is_row_error: Optional[Callable[[Exception], bool]] = None,
+    ):
+        self.write = write
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.max_rows = max(max_rows, flush_rows)
+        self.durable = durable
+        self.is_row_error = is_row_error
+
+        self._entries: List[Tuple[Sequence[tuple], Optional[asyncio.Future]]] = []
+        self._pending_rows = 0
+        self._oldest = 0.0
+        self._wake = asyncio.Event()
+        self._full = asyncio.Event()
+        self._space = asyncio.Event()
+        self._space.set()
+        self._closing = False
+        self._task: Optional[asyncio.Task] = None
+
+        self.flushes = 0
+        self.flushed_rows = 0
+        self.failed_rows = 0
+
+    def start(self):
+        if not self._task:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        """Останавливает приём и дописывает буфер"""
+        self._closing = True
+        self._wake.set()
+        self._full.set()
+        if self._task:
+            await self._task
+            self._task = None
+        logger.info(f"Write buffer closed: {self.metrics()}")
+
+    async def submit(self, rows: Sequence[tuple]) -> Optional[FlushResult]:
+        """
+        Ставит строки (transaction_id первым полем) в буфер
+
+        Returns:
+            вставленные и отвергнутые БД строки этого submit (durable)
+            или None в быстром режиме
+        """
+        if self._closing:
+            raise RuntimeError("write buffer is closed")
+        if not rows:
+            return FlushResult(set(), {}) if self.durable else None
+
+        while self._pending_rows and self._pending_rows + len(rows) > self.max_rows:
+            self._space.clear()
+            await self._space.wait()
+
+        future = asyncio.get_running_loop().create_future() if self.durable else None
+        if not self._entries:
+            self._oldest = asyncio.get_running_loop().time()
+        self._entries.append((rows, future))
+        self._pending_rows += len(rows)
+        self._wake.set()
+        if self._pending_rows >= self.flush_rows:
+            self._full.set()
+
+        if future is None:
+            return None
+        return await future
+
+    def metrics(self) -> Dict[str, float]:
+        return {
+            "write_buffer.pending_rows": float(self._pending_rows),
+            "write_buffer.flushes": float(self.flushes),
+            "write_buffer.flushed_rows": float(self.flushed_rows),
+            "write_buffer.failed_rows": float(self.failed_rows),
+            "write_buffer.rows_per_flush": self.flushed_rows / self.flushes if self.flushes else 0.0,
+        }
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while self._entries or not self._closing:
+            if not self._entries:
+                self._wake.clear()
+                await self._wake.wait()
+                continue
+
+            remaining = self._oldest + self.flush_interval - loop.time()
+            if remaining > 0 and self._pending_rows < self.flush_rows and not self._closing:
+                self._full.clear()
+                try:
+                    await asyncio.wait_for(self._full.wait(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    pass
+
+            await self._flush()
+
+    async def _flush(self):
+        """Пишет из буфера не больше flush_rows строк (целыми submit) одной вставкой"""
+        count = rows_count = 0
+        for rows, _ in self._entries:
+            if count and rows_count + len(rows) > self.flush_rows:
+                break
+            count += 1
+            rows_count += len(rows)
+
+        entries = self._entries[:count]
+        del self._entries[:count]
+        self._pending_rows -= rows_count
+        if self._entries:
+            self._oldest = asyncio.get_running_loop().time()
+        self._space.set()
+
+        # Повтор transaction_id из разных submit: строку пишет первый
+        owners: Dict[str, int] = {}
+        rows = []
+        for index, (entry_rows, _) in enumerate(entries):
+            for row in entry_rows:
+                if row[0] not in owners:
+                    owners[row[0]] = index
+                    rows.append(row)
+
+        try:
+            inserted, failed = await self._write_isolating(rows)
+        except Exception as e:
+            self.failed_rows += len(rows)
+            logger.error(f"Write buffer flush of {len(rows)} rows failed: {e}")
+            for _, future in entries:
+                if future is not None and not future.done():
+                    future.set_exception(e)
+            return
+
+        self.flushes += 1
+        self.flushed_rows += len(rows) - len(failed)
+        self.failed_rows += len(failed)
+        for transaction_id, error in failed.items():
+            logger.error(f"Write buffer rejected row {transaction_id}: {error}")
+
+        owned = [FlushResult(set(), {}) for _ in entries]
+        for transaction_id in inserted:
+            owned[owners[transaction_id]].inserted.add(transaction_id)
+        for transaction_id, error in failed.items():
+            owned[owners[transaction_id]].failed[transaction_id] = error
+        for (_, future), result in zip(entries, owned):
+            if future is not None and not future.done():
+                future.set_result(result)
+
+    async def _write_isolating(self, rows: List[tuple]) -> Tuple[Set[str], Dict[str, Exception]]:
+        """Вставка с делением пачки пополам при ошибке данных (см. is_row_error)"""
+        try:
+            return await self.write(rows), {}
+        except Exception as e:
+            if not self.is_row_error or not self.is_row_error(e):
+                raise
+            if len(rows) == 1:
+                return set(), {rows[0][0]: e}
+
+        middle = len(rows) // 2
+        inserted, failed = await self._write_isolating(rows[:middle])
+        right_inserted, right_failed = await self._write_isolating(rows[middle:])
+        return inserted | right_inserted, {**failed, **right_failed}
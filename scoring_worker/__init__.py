@@ -0,0 +1,3 @@
+from .worker import ScoringWorker
+
+__all__ = ["ScoringWorker"]
\ No newline at end of file
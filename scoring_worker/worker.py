@@ -0,0 +1,495 @@
+import asyncio
+import logging
+import signal
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+import grpc
+
+from core import (
+    REDIS_URL,
+    ML_SERVICE_URL,
+    METADATA_SERVICE_URL,
+    TRANSACTIONS_SERVICE_URL,
+    WORKER_BATCH_SIZE,
+    WORKER_BATCH_LINGER_MS,
+    WORKER_RPC_TIMEOUT,
+    QUEUE_RELIABLE,
+    QUEUE_CONSUMER_ID,
+    QUEUE_VISIBILITY_TIMEOUT,
+    QUEUE_REAPER_INTERVAL,
+    QUEUE_BACKEND,
+    QUEUE_NAME,
+    QUEUE_STREAM_GROUP,
+    QUEUE_STREAM_MAXLEN,
+    QUEUE_CODEC,
+    FEATURE_WINDOW_SECONDS,
+    FEATURE_WINDOW_BUCKETS,
+    FEATURE_STATE_TTL,
+    FEATURE_SEEN_TTL,
+    FEATURE_CACHE_SIZE,
+    FEATURE_CACHE_TTL,
+    WORKER_METRICS_INTERVAL,
+    RULES_POLL_INTERVAL,
+)
+from feature_store import MODEL_FEATURES, AccountStateCache, OnlineFeatureStore
+from generated_proto import ml_pb2, ml_pb2_grpc, transactions_pb2, transactions_pb2_grpc
+from redis_queue_service import RedisQueue, create_queue
+from server.logging_config.logging_config import setup_logger
+from server.rule_engine.rule_engine import DECLINE, RuleEngine, RuleHit
+
+logger = logging.getLogger(__name__)
+
+HISTORY_TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S.%f"
+
+# Статусы InsertTransactions, при которых транзакция есть в истории
+PERSISTED_STATUSES = ("inserted", "queued", "duplicate")
+
+# Пауза после сбоя обработки батча, чтобы не крутить цикл при недоступном Redis
+ERROR_BACKOFF_SECONDS = 1.0
+
+TRANSACTION_FIELDS = (
+    "transaction_id",
+    "timestamp",
+    "sender_account",
+    "receiver_account",
+    "amount",
+    "transaction_type",
+    "merchant_category",
+    "location",
+    "device_used",
+    "payment_channel",
+    "ip_address",
+    "device_hash",
+    "correlation_id",
+)
+
+
+class ScoringWorker:
+    """
+    Воркер скоринга транзакций
+
+    Забирает из RedisQueue микро-батчи (не больше batch_size элементов,
+    ожидание добора не дольше linger_ms), дополняет транзакции онлайн-признаками
+    из OnlineFeatureStore (если задан), проверяет батч правилами RuleEngine
+    (если задан) и для всего батча конкурентно вызывает MLService.PredictBatch
+    (один вызов на батч, без транзакций, отклонённых правилами) и
+    TransactionsDB.InsertTransactions (одна пачка на батч).
+    Масштабируется запуском нескольких процессов на одну очередь.
+
+    Если очередь в надёжном режиме, воркер подтверждает (ack) транзакции,
+    которые сохранены и оценены моделью (или отклонены правилом), а также
+    некорректные (повтор их не исправит); остальные периодически
+    возвращаются в очередь как просроченные.
+    """
+
+    def __init__(
+        self,
+        queue: RedisQueue,
+        ml_url: str = ML_SERVICE_URL,
+        transactions_url: str = TRANSACTIONS_SERVICE_URL,
+        batch_size: int = WORKER_BATCH_SIZE,
+        linger_ms: int = WORKER_BATCH_LINGER_MS,
+        rpc_timeout: float = WORKER_RPC_TIMEOUT,
+        reaper_interval: float = QUEUE_REAPER_INTERVAL,
+        feature_store: Optional[OnlineFeatureStore] = None,
+        rule_engine: Optional[RuleEngine] = None,
+        metrics_interval: float = WORKER_METRICS_INTERVAL,
+    ):
+        self.queue = queue
+        self.ml_url = ml_url
+        self.transactions_url = transactions_url
+        self.batch_size = batch_size
+        self.linger = linger_ms / 1000
+        self.rpc_timeout = rpc_timeout
+        self.reaper_interval = reaper_interval
+        self.feature_store = feature_store
+        self.rule_engine = rule_engine
+        self.metrics_interval = metrics_interval
+
+        self._ml_channel: Optional[grpc.aio.Channel] = None
+        self._transactions_channel: Optional[grpc.aio.Channel] = None
+        self._ml_stub = None
+        self._transactions_stub = None
+        self._reaper_task: Optional[asyncio.Task] = None
+        self._metrics_task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+
+    async def start(self):
+        """Подключение к очереди и gRPC сервисам"""
+        await self.queue.connect()
+        if self.feature_store:
+            await self.feature_store.connect()
+
+        self._ml_channel = grpc.aio.insecure_channel(self.ml_url)
+        self._ml_stub = ml_pb2_grpc.MLServiceStub(self._ml_channel)
+
+        self._transactions_channel = grpc.aio.insecure_channel(self.transactions_url)
+        self._transactions_stub = transactions_pb2_grpc.TransactionsDBStub(
+            self._transactions_channel
+        )
+
+        if self.queue.reliable:
+            self._reaper_task = asyncio.create_task(self._reap_forever())
+        if self.rule_engine:
+            self.rule_engine.start()
+        if self.rule_engine or (self.feature_store and self.feature_store.cache is not None):
+            self._metrics_task = asyncio.create_task(self._report_metrics_forever())
+
+        logger.info(
+            f"Scoring worker started: batch_size={self.batch_size}, "
+            f"linger={self.linger * 1000:.0f}ms"
+        )
+
+    async def close(self):
+        """Закрытие соединений"""
+        for task in (self._reaper_task, self._metrics_task):
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._reaper_task = None
+        self._metrics_task = None
+
+        if self.rule_engine:
+            await self.rule_engine.close()
+
+        for channel in (self._ml_channel, self._transactions_channel):
+            if channel:
+                await channel.close()
+        self._ml_channel = None
+        self._transactions_channel = None
+        await self.queue.close()
+        if self.feature_store:
+            await self.feature_store.close()
+        logger.info("Scoring worker stopped")
+
+    def stop(self):
+        """Просит воркер завершиться после текущего батча"""
+        self._stopping.set()
+
+    async def collect_batch(self, timeout: float = 1.0) -> List[dict]:
+        """
+        Собирает микро-батч из очереди
+
+        Args:
+            timeout: Сколько ждать первый элемент (секунды)
+
+        Returns:
+            Список транзакций (пустой, если очередь пуста)
+        """
+        batch = await self.queue.pop_many(self.batch_size, timeout=timeout)
+        if not batch:
+            return []
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.linger
+
+        while len(batch) < self.batch_size:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+
+            more = await self.queue.pop_many(self.batch_size - len(batch), timeout=remaining)
+            if not more:
+                break
+            batch.extend(more)
+
+        return batch
+
+    async def process_batch(self, batch: List[dict]) -> List[dict]:
+        """
+        Скоринг и сохранение батча
+
+        Returns:
+            Результаты по каждой транзакции в порядке батча
+        """
+        normalized = [self._normalize(tx) for tx in batch]
+        valid = [i for i, item in enumerate(normalized) if item is not None]
+
+        # Некорректные транзакции не скорятся и не сохраняются; повтор их не
+        # исправит, поэтому они подтверждаются сразу
+        results = [
+            self._invalid_result(tx) if item is None else None
+            for tx, item in zip(batch, normalized)
+        ]
+        settled = [tx for tx, item in zip(batch, normalized) if item is None]
+
+        if valid:
+            valid_results, valid_settled = await self._score_and_persist(
+                [batch[i] for i in valid], [normalized[i] for i in valid]
+            )
+            for i, result in zip(valid, valid_results):
+                results[i] = result
+            settled.extend(valid_settled)
+
+        await self.queue.ack(settled)
+
+        failed = sum(1 for result in results if result["error"])
+        logger.info(f"Batch processed: size={len(batch)}, failed={failed}")
+
+        return results
+
+    async def _score_and_persist(self, batch: List[dict], fields: List[dict]) -> Tuple[List[dict], List[dict]]:
+        """Признаки, правила, PredictBatch и InsertTransactions для корректных транзакций батча"""
+        features = await self._features(fields)
+        hits = self._check_rules(fields, features)
+        scored = [i for i, hit in enumerate(hits) if hit is None or hit.action != DECLINE]
+
+        prediction, insertion = await asyncio.gather(
+            self._predict([
+                ml_pb2.PredictRequest(
+                    **fields[i],
+                    **{name: features[i][name] for name in MODEL_FEATURES if name in features[i]}
+                )
+                for i in scored
+            ]),
+            self._insert(fields),
+            return_exceptions=True,
+        )
+
+        responses = [None] * len(batch)
+        if isinstance(prediction, BaseException):
+            logger.error(f"Batch prediction failed: {prediction}", extra={
+                "event": "predict_failed",
+                "batch_size": len(scored),
+            })
+        else:
+            for i, response in zip(scored, prediction.responses):
+                responses[i] = response
+
+        if isinstance(insertion, BaseException):
+            insertions = [insertion] * len(batch)
+        else:
+            insertions = list(insertion.results)
+
+        results = [
+            self._result(tx, response, prediction, insertion, hit)
+            for tx, response, insertion, hit in zip(batch, responses, insertions, hits)
+        ]
+
+        # Подтверждаются сохранённые в истории и при этом оценённые моделью
+        # или отклонённые правилом; остальные вернёт в очередь reaper
+        settled = []
+        for tx, response, insertion, hit in zip(batch, responses, insertions, hits):
+            if isinstance(insertion, BaseException):
+                continue
+            decided = response is not None or (hit is not None and hit.action == DECLINE)
+            if insertion.status == "invalid" or (insertion.status in PERSISTED_STATUSES and decided):
+                settled.append(tx)
+        return results, settled
+
+    async def run(self):
+        """Основной цикл воркера"""
+        await self.start()
+        try:
+            while not self._stopping.is_set():
+                try:
+                    batch = await self.collect_batch()
+                    if batch:
+                        await self.process_batch(batch)
+                except Exception as e:
+                    # Неподтверждённые элементы батча вернёт в очередь reaper
+                    logger.exception(f"Batch processing failed: {e}", extra={"event": "batch_failed"})
+                    await asyncio.sleep(ERROR_BACKOFF_SECONDS)
+        finally:
+            await self.close()
+
+    async def _features(self, fields: List[dict]) -> List[dict]:
+        """Онлайн-признаки для PredictRequest и правил; при недоступности хранилища - пустые"""
+        if not self.feature_store:
+            return [{}] * len(fields)
+
+        try:
+            computed = await self.feature_store.compute(fields)
+        except Exception as e:
+            logger.error(f"Feature computation failed: {e}", extra={
+                "event": "features_failed",
+                "batch_size": len(fields),
+            })
+            return [{}] * len(fields)
+
+        return computed
+
+    def _check_rules(self, fields: List[dict], features: List[dict]) -> List[Optional[RuleHit]]:
+        """Правила по транзакциям с признаками; при ошибке батч идёт в модель целиком"""
+        if not self.rule_engine:
+            return [None] * len(fields)
+
+        try:
+            return self.rule_engine.evaluate([
+                {**item, **item_features} for item, item_features in zip(fields, features)
+            ])
+        except Exception as e:
+            logger.error(f"Rule evaluation failed: {e}", extra={
+                "event": "rules_failed",
+                "batch_size": len(fields),
+            })
+            return [None] * len(fields)
+
+    async def _predict(self, requests: List[ml_pb2.PredictRequest]) -> ml_pb2.PredictBatchResponse:
+        if not requests:
+            return ml_pb2.PredictBatchResponse()
+        return await self._ml_stub.PredictBatch(
+            ml_pb2.PredictBatchRequest(requests=requests),
+            timeout=self.rpc_timeout,
+        )
+
+    async def _insert(self, fields: List[dict]) -> transactions_pb2.InsertTransactionsResponse:
+        return await self._transactions_stub.InsertTransactions(
+            transactions_pb2.InsertTransactionsRequest(
+                transactions=[transactions_pb2.InsertTransactionRequest(**item) for item in fields]
+            ),
+            timeout=self.rpc_timeout,
+        )
+
+    @staticmethod
+    def _result(transaction: dict, response, prediction, insertion, hit: Optional[RuleHit] = None) -> dict:
+        """Результат по одной транзакции из правил, ответа PredictBatch и статуса вставки"""
+        correlation_id = transaction.get("correlation_id")
+        declined = hit is not None and hit.action == DECLINE
+        if declined:
+            prediction = None
+
+        insert_error = None
+        if isinstance(insertion, BaseException):
+            insert_error = insertion
+        elif insertion.status not in PERSISTED_STATUSES:
+            insert_error = f"{insertion.status}: {insertion.error}"
+
+        # При двух сбоях в error попадают оба, первым - ошибка модели
+        errors = []
+        if isinstance(prediction, BaseException):
+            errors.append(f"predict: {prediction}")
+        if insert_error is not None:
+            errors.append(f"insert: {insert_error}")
+        error = "; ".join(errors) or None
+        if insert_error is not None:
+            logger.error(f"Scoring step failed: {error}", extra={
+                "correlation_id": correlation_id,
+                "event": "insert_failed",
+            })
+
+        is_fraud = probability = None
+        if declined:
+            is_fraud = True
+            logger.info("Transaction declined by rule", extra={
+                "correlation_id": correlation_id,
+                "event": "transaction_declined",
+                "rule": hit.rule,
+            })
+        elif response is not None:
+            is_fraud, probability = response.is_fraud, response.probability
+            logger.info("Transaction scored", extra={
+                "correlation_id": correlation_id,
+                "event": "transaction_scored",
+                "is_fraud": is_fraud,
+                "probability": probability,
+                "rule": hit.rule if hit else None,
+            })
+
+        return {
+            "correlation_id": correlation_id,
+            "is_fraud": is_fraud,
+            "probability": probability,
+            "rule": hit.rule if hit else None,
+            "persisted": insert_error is None,
+            "error": error,
+        }
+
+    async def _reap_forever(self):
+        """Периодически возвращает в очередь неподтверждённые элементы"""
+        while True:
+            await asyncio.sleep(self.reaper_interval)
+            try:
+                await self.queue.requeue_expired()
+            except Exception as e:
+                logger.error(f"Requeue of expired transactions failed: {e}")
+
+    async def _report_metrics_forever(self):
+        """Периодически логирует счётчики кэша признаков и правил"""
+        while True:
+            await asyncio.sleep(self.metrics_interval)
+            metrics = {}
+            for source in (self.feature_store, self.rule_engine):
+                if source:
+                    metrics.update(source.metrics())
+            logger.info("Worker metrics", extra={"event": "worker_metrics", **metrics})
+
+    @staticmethod
+    def _invalid_result(transaction: dict) -> dict:
+        """Результат по транзакции, которую нельзя обработать (см. _normalize)"""
+        correlation_id = transaction.get("correlation_id")
+        error = f"invalid: unparsable timestamp {transaction.get('timestamp')!r}"
+        logger.error(f"Transaction rejected: {error}", extra={
+            "correlation_id": correlation_id,
+            "event": "transaction_invalid",
+        })
+        return {
+            "correlation_id": correlation_id,
+            "is_fraud": None,
+            "probability": None,
+            "rule": None,
+            "persisted": False,
+            "error": error,
+        }
+
+    @staticmethod
+    def _normalize(transaction: dict) -> Optional[dict]:
+        """
+        Оставляет поля транзакции и приводит timestamp к формату истории
+
+        Returns:
+            Поля транзакции или None, если timestamp не разбирается
+        """
+        fields = {key: transaction[key] for key in TRANSACTION_FIELDS if key in transaction}
+
+        timestamp = fields.get("timestamp")
+        if timestamp:
+            try:
+                ts = datetime.fromisoformat(str(timestamp).replace("Z", "+00:00"))
+            except ValueError:
+                return None
+            if ts.tzinfo is not None:
+                ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+            fields["timestamp"] = ts.strftime(HISTORY_TIMESTAMP_FORMAT)
+
+        return fields
+
+
+async def main():
+    setup_logger(component="scoring_worker")
+
+    queue = create_queue(
+        REDIS_URL,
+        backend=QUEUE_BACKEND,
+        queue_name=QUEUE_NAME,
+        group_name=QUEUE_STREAM_GROUP,
+        maxlen=QUEUE_STREAM_MAXLEN,
+        reliable=QUEUE_RELIABLE,
+        consumer_id=QUEUE_CONSUMER_ID,
+        visibility_timeout=QUEUE_VISIBILITY_TIMEOUT,
+        codec=QUEUE_CODEC,
+    )
+    feature_store = OnlineFeatureStore(
+        REDIS_URL,
+        window_seconds=FEATURE_WINDOW_SECONDS,
+        window_buckets=FEATURE_WINDOW_BUCKETS,
+        state_ttl=FEATURE_STATE_TTL,
+        seen_ttl=FEATURE_SEEN_TTL,
+        cache=AccountStateCache(FEATURE_CACHE_SIZE, ttl=FEATURE_CACHE_TTL) if FEATURE_CACHE_SIZE else None,
+    )
+    rule_engine = RuleEngine(METADATA_SERVICE_URL, poll_interval=RULES_POLL_INTERVAL)
+    worker = ScoringWorker(queue, feature_store=feature_store, rule_engine=rule_engine)
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, worker.stop)
+
+    await worker.run()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
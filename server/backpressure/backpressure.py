@@ -0,0 +1,165 @@
+import asyncio
+import logging
+from typing import List, Optional
+
+from redis_queue_service import RedisQueue
+
+logger = logging.getLogger(__name__)
+
+
+class QueueDepthMonitor:
+    """
+    Кэшированная глубина очереди с гистерезисом по watermark'ам
+
+    Длина очереди опрашивается фоновой задачей раз в refresh_interval,
+    поэтому проверка в обработчике запроса не ходит в Redis.
+    Перегрузка включается при depth >= high_watermark и снимается
+    только при depth <= low_watermark.
+    """
+
+    def __init__(
+        self,
+        queue: RedisQueue,
+        high_watermark: int,
+        low_watermark: int,
+        refresh_interval: float = 0.5
+    ):
+        if low_watermark > high_watermark:
+            raise ValueError("low_watermark не может быть больше high_watermark")
+
+        self.queue = queue
+        self.high_watermark = high_watermark
+        self.low_watermark = low_watermark
+        self.refresh_interval = refresh_interval
+        self.depth = 0
+        self.overloaded = False
+        self._task: Optional[asyncio.Task] = None
+
+    async def refresh(self) -> int:
+        """Обновляет кэшированную глубину очереди"""
+        self.depth = await self.queue.length()
+
+        if not self.overloaded and self.depth >= self.high_watermark:
+            self.overloaded = True
+            logger.warning(f"Queue depth {self.depth} above high watermark, shedding load")
+        elif self.overloaded and self.depth <= self.low_watermark:
+            self.overloaded = False
+            logger.info(f"Queue depth {self.depth} below low watermark, accepting again")
+
+        return self.depth
+
+    def start(self):
+        if not self._task:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Failed to refresh queue depth: {e}")
+            await asyncio.sleep(self.refresh_interval)
+
+
+class IngestBuffer:
+    """
+    Ограниченный буфер отправки в очередь
+
+    Обработчики кладут транзакции без ожидания Redis; фоновая задача
+    отправляет их пачками через push_many. Когда буфер полон, offer
+    возвращает False и запрос отклоняется вместо роста памяти процесса.
+    """
+
+    def __init__(
+        self,
+        queue: RedisQueue,
+        max_size: int,
+        flush_batch_size: int = 500,
+        retry_delay: float = 0.5
+    ):
+        self.queue = queue
+        self.max_size = max_size
+        self.flush_batch_size = flush_batch_size
+        self.retry_delay = retry_delay
+        self._buffer: asyncio.Queue = asyncio.Queue(maxsize=max_size)
+        self._pending: List[dict] = []
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def size(self) -> int:
+        return self._buffer.qsize()
+
+    def offer(self, transaction: dict) -> bool:
+        """Кладёт транзакцию в буфер; False, если места нет"""
+        try:
+            self._buffer.put_nowait(transaction)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    def offer_many(self, transactions: List[dict]) -> bool:
+        """Кладёт все транзакции или ни одной; False, если места не хватает"""
+        if self.max_size - self._buffer.qsize() < len(transactions):
+            return False
+
+        for transaction in transactions:
+            self._buffer.put_nowait(transaction)
+        return True
+
+    def start(self):
+        if not self._task:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Останавливает фоновую отправку и дописывает остаток буфера"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        batch = self._pending
+        self._pending = []
+        while batch or not self._buffer.empty():
+            batch += self._drain(self.flush_batch_size - len(batch))
+            try:
+                await self.queue.push_many(batch)
+            except Exception as e:
+                logger.error(f"Dropped {len(batch) + self.size} buffered transactions on shutdown: {e}")
+                return
+            batch = []
+
+    async def _run(self):
+        while True:
+            self._pending = [await self._buffer.get()]
+            self._pending += self._drain(self.flush_batch_size - 1)
+
+            while True:
+                try:
+                    await self.queue.push_many(self._pending)
+                    break
+                except Exception as e:
+                    logger.error(f"Failed to flush {len(self._pending)} transactions, retrying: {e}")
+                    await asyncio.sleep(self.retry_delay)
+
+            self._pending = []
+
+    def _drain(self, limit: int) -> List[dict]:
+        batch = []
+        while len(batch) < limit:
+            try:
+                batch.append(self._buffer.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        return batch
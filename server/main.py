@@ -1,23 +1,99 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Request
 from contextlib import asynccontextmanager
-from redis_queue_service import RedisQueue
+from typing import Optional
+from pydantic import ValidationError
+import grpc
+from redis_queue_service import create_queue
 from transaction import TransactionRequest
-from core import REDIS_URL
+from core import (
+    REDIS_URL,
+    QUEUE_BACKEND,
+    QUEUE_NAME,
+    QUEUE_STREAM_GROUP,
+    QUEUE_STREAM_MAXLEN,
+    QUEUE_CODEC,
+    MAX_INGEST_BATCH_SIZE,
+    MAX_INGEST_BATCH_BYTES,
+    INGEST_QUEUE_HIGH_WATERMARK,
+    INGEST_QUEUE_LOW_WATERMARK,
+    INGEST_DEPTH_REFRESH_INTERVAL,
+    INGEST_BUFFER_SIZE,
+    INGEST_FLUSH_BATCH_SIZE,
+    INGEST_RETRY_AFTER,
+    ML_SERVICE_URL,
+    ML_CHANNEL_POOL_SIZE,
+    SCORE_DEFAULT_DEADLINE_MS,
+    SCORE_FALLBACK_DECISION,
+    FEATURE_WINDOW_SECONDS,
+    FEATURE_WINDOW_BUCKETS,
+    FEATURE_STATE_TTL,
+    FEATURE_SEEN_TTL,
+    FEATURE_CACHE_SIZE,
+    FEATURE_CACHE_TTL,
+    METADATA_SERVICE_URL,
+    RULES_POLL_INTERVAL,
+)
+from feature_store import MODEL_FEATURES, AccountStateCache, OnlineFeatureStore
+from generated_proto import ml_pb2
 from server.logging_config.logging_config import setup_logger
+from server.backpressure.backpressure import IngestBuffer, QueueDepthMonitor
+from server.ml_client.ml_client import MLClient
+from server.rule_engine.rule_engine import DECLINE, RuleEngine
+import asyncio
+import json
+import time
 import uuid
 
 
-redis_queue = RedisQueue(REDIS_URL)
+redis_queue = create_queue(
+    REDIS_URL,
+    backend=QUEUE_BACKEND,
+    queue_name=QUEUE_NAME,
+    group_name=QUEUE_STREAM_GROUP,
+    maxlen=QUEUE_STREAM_MAXLEN,
+    codec=QUEUE_CODEC
+)
+depth_monitor = QueueDepthMonitor(
+    redis_queue,
+    high_watermark=INGEST_QUEUE_HIGH_WATERMARK,
+    low_watermark=INGEST_QUEUE_LOW_WATERMARK,
+    refresh_interval=INGEST_DEPTH_REFRESH_INTERVAL
+)
+ingest_buffer = IngestBuffer(
+    redis_queue,
+    max_size=INGEST_BUFFER_SIZE,
+    flush_batch_size=INGEST_FLUSH_BATCH_SIZE
+)
+ml_client = MLClient(ML_SERVICE_URL, pool_size=ML_CHANNEL_POOL_SIZE)
+feature_store = OnlineFeatureStore(
+    REDIS_URL,
+    window_seconds=FEATURE_WINDOW_SECONDS,
+    window_buckets=FEATURE_WINDOW_BUCKETS,
+    state_ttl=FEATURE_STATE_TTL,
+    seen_ttl=FEATURE_SEEN_TTL,
+    cache=AccountStateCache(FEATURE_CACHE_SIZE, ttl=FEATURE_CACHE_TTL) if FEATURE_CACHE_SIZE else None
+)
+rule_engine = RuleEngine(METADATA_SERVICE_URL, poll_interval=RULES_POLL_INTERVAL)
 logger = setup_logger(component="ingest")
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # --- startup ---
     await redis_queue.connect()
+    depth_monitor.start()
+    ingest_buffer.start()
+    await ml_client.connect()
+    await feature_store.connect()
+    rule_engine.start()
 
     yield
 
     # --- shutdown ---
+    await rule_engine.close()
+    await feature_store.close()
+    await ml_client.close()
+    await ingest_buffer.stop()
+    await depth_monitor.stop()
     await redis_queue.close()
 
 app = FastAPI(lifespan=lifespan)
@@ -30,8 +106,45 @@ async def root():
 async def echo(msg: str):
     return {"echo": msg}
 
+@app.get("/metrics/features")
+async def feature_metrics():
+    """Счётчики кэша онлайн-признаков (hits/misses/evictions) для подбора его размера"""
+    return feature_store.metrics()
+
+@app.get("/metrics/rules")
+async def rule_metrics():
+    """Версия набора правил и счётчики срабатываний"""
+    return rule_engine.metrics()
+
+def _check_queue_depth():
+    """Отклоняет запрос с 429, если очередь выше high watermark"""
+    if depth_monitor.overloaded:
+        logger.warning("Ingest rejected: queue overloaded", extra={
+            "event": "ingest_shed",
+            "queue_depth": depth_monitor.depth
+        })
+        raise HTTPException(
+            status_code=429,
+            detail="Очередь переполнена, повторите запрос позже",
+            headers={"Retry-After": str(INGEST_RETRY_AFTER)}
+        )
+
+def _send_buffer_full():
+    """Ответ 503, когда буфер отправки в очередь заполнен"""
+    logger.warning("Ingest rejected: send buffer full", extra={
+        "event": "ingest_buffer_full",
+        "buffer_size": ingest_buffer.size
+    })
+    return HTTPException(
+        status_code=503,
+        detail="Сервис перегружен, повторите запрос позже",
+        headers={"Retry-After": str(INGEST_RETRY_AFTER)}
+    )
+
 @app.post("/post")
-async def receive_transaction(tx: TransactionRequest, background_tasks: BackgroundTasks):
+async def receive_transaction(tx: TransactionRequest):
+    _check_queue_depth()
+
     transaction = tx.to_dict()
     transaction["correlation_id"] = str(uuid.uuid4())
 
@@ -43,10 +156,244 @@ async def receive_transaction(tx: TransactionRequest, background_tasks: Backgrou
         "amount": tx.amount
     })
 
-    background_tasks.add_task(redis_queue.push, transaction)
+    if not ingest_buffer.offer(transaction):
+        raise _send_buffer_full()
 
     return {
         "status": "accepted",
         "correlation_id": transaction["correlation_id"],
         "message": "Транзакция успешно принята в обработку"
     }
+
+
+@app.post("/post/batch")
+async def receive_transactions_batch(request: Request):
+    """
+    Пакетный приём транзакций
+
+    Принимает JSON-массив или NDJSON (Content-Type: application/x-ndjson),
+    валидирует каждую транзакцию отдельно и кладёт валидные в буфер
+    отправки целиком; если места не хватает, пакет отклоняется с 503.
+    Тело больше MAX_INGEST_BATCH_BYTES отклоняется с 413 до разбора.
+    """
+    body = await _read_batch_body(request)
+    content_type = request.headers.get("content-type", "")
+
+    try:
+        items = _parse_batch(body, content_type, MAX_INGEST_BATCH_SIZE)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if len(items) > MAX_INGEST_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Слишком большой пакет: больше {MAX_INGEST_BATCH_SIZE} транзакций"
+        )
+
+    _check_queue_depth()
+
+    results = []
+    accepted = []
+
+    for index, item in enumerate(items):
+        if isinstance(item, Exception):
+            results.append({"index": index, "status": "rejected", "errors": [str(item)]})
+            continue
+
+        try:
+            tx = TransactionRequest.model_validate(item)
+        except ValidationError as e:
+            results.append({
+                "index": index,
+                "status": "rejected",
+                "errors": e.errors(include_url=False, include_context=False, include_input=False)
+            })
+            continue
+
+        transaction = tx.to_dict()
+        transaction["correlation_id"] = str(uuid.uuid4())
+        accepted.append(transaction)
+        results.append({
+            "index": index,
+            "status": "accepted",
+            "transaction_id": tx.transaction_id,
+            "correlation_id": transaction["correlation_id"]
+        })
+
+    if accepted and not ingest_buffer.offer_many(accepted):
+        raise _send_buffer_full()
+
+    logger.info("Transaction batch received", extra={
+        "event": "transaction_batch_received",
+        "accepted": len(accepted),
+        "rejected": len(results) - len(accepted)
+    })
+
+    return {
+        "accepted": len(accepted),
+        "rejected": len(results) - len(accepted),
+        "results": results
+    }
+
+
+
+@app.post("/score")
+async def score_transaction(tx: TransactionRequest, deadline_ms: Optional[float] = None):
+    """
+    Синхронный скоринг транзакции в пределах бюджета времени
+
+    Дополняет транзакцию онлайн-признаками счёта, проверяет правилами
+    и вызывает MLService.Predict напрямую, минуя очередь. Транзакция,
+    попавшая под decline-правило, отклоняется без вызова модели; под
+    review-правило - получает решение review, если модель её не отклонила.
+    Если бюджет deadline_ms исчерпан или ML сервис недоступен, возвращается
+    fallback=true и решение review-правила, а без него - решение
+    по умолчанию (SCORE_FALLBACK_DECISION).
+    Признаки ждутся не дольше бюджета; не успевшие - считаются пустыми.
+    """
+    started = time.perf_counter()
+    budget = (deadline_ms or SCORE_DEFAULT_DEADLINE_MS) / 1000
+
+    transaction = tx.to_dict()
+    transaction["correlation_id"] = str(uuid.uuid4())
+
+    try:
+        computed = (await asyncio.wait_for(
+            feature_store.compute([transaction]),
+            timeout=budget - (time.perf_counter() - started)
+        ))[0]
+    except asyncio.TimeoutError:
+        logger.warning("Feature computation exceeded scoring budget", extra={
+            "correlation_id": transaction["correlation_id"],
+            "event": "features_timeout"
+        })
+        computed = {}
+    except Exception as e:
+        logger.error(f"Feature computation failed: {e}", extra={
+            "correlation_id": transaction["correlation_id"],
+            "event": "features_failed"
+        })
+        computed = {}
+
+    try:
+        hit = rule_engine.evaluate([{**transaction, **computed}])[0]
+    except Exception as e:
+        logger.error(f"Rule evaluation failed: {e}", extra={
+            "correlation_id": transaction["correlation_id"],
+            "event": "rules_failed"
+        })
+        hit = None
+    features = {name: computed[name] for name in MODEL_FEATURES if name in computed}
+    request = ml_pb2.PredictRequest(**transaction, **features)
+
+    prepared = time.perf_counter()
+    remaining = budget - (prepared - started)
+
+    is_fraud = None
+    probability = None
+    fallback_reason = None
+
+    if hit is not None and hit.action == DECLINE:
+        is_fraud = True
+    elif remaining <= 0:
+        fallback_reason = "DEADLINE_EXCEEDED"
+    else:
+        try:
+            response = await ml_client.predict(request, timeout=remaining)
+            is_fraud = response.is_fraud
+            probability = response.probability
+        except grpc.aio.AioRpcError as e:
+            fallback_reason = e.code().name
+        except asyncio.TimeoutError:
+            fallback_reason = grpc.StatusCode.DEADLINE_EXCEEDED.name
+        except OSError as e:
+            logger.error(f"ML service connection failed: {e}", extra={
+                "correlation_id": transaction["correlation_id"],
+                "event": "ml_connection_failed"
+            })
+            fallback_reason = grpc.StatusCode.UNAVAILABLE.name
+
+    finished = time.perf_counter()
+
+    if fallback_reason:
+        # Сработавшее правило надёжнее решения по умолчанию
+        decision = "review" if hit is not None else SCORE_FALLBACK_DECISION
+        logger.warning("Scoring fallback", extra={
+            "correlation_id": transaction["correlation_id"],
+            "event": "score_fallback",
+            "reason": fallback_reason
+        })
+    elif is_fraud:
+        decision = "decline"
+    else:
+        decision = "review" if hit is not None else "approve"
+
+    return {
+        "correlation_id": transaction["correlation_id"],
+        "decision": decision,
+        "is_fraud": is_fraud,
+        "probability": probability,
+        "rule": hit.rule if hit else None,
+        "fallback": fallback_reason is not None,
+        "fallback_reason": fallback_reason,
+        "latency_ms": {
+            "prepare": round((prepared - started) * 1000, 3),
+            "model_rpc": round((finished - prepared) * 1000, 3),
+            "total": round((finished - started) * 1000, 3)
+        }
+    }
+
+async def _read_batch_body(request: Request) -> bytes:
+    """
+    Читает тело пакетного запроса не больше MAX_INGEST_BATCH_BYTES
+
+    Content-Length проверяется до чтения; тело без него (chunked)
+    обрывается, как только превысит лимит.
+    """
+    too_large = HTTPException(
+        status_code=413,
+        detail=f"Слишком большое тело пакета: больше {MAX_INGEST_BATCH_BYTES} байт"
+    )
+
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > MAX_INGEST_BATCH_BYTES:
+        raise too_large
+
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > MAX_INGEST_BATCH_BYTES:
+            raise too_large
+    return bytes(body)
+
+def _parse_batch(body: bytes, content_type: str, max_items: int) -> list:
+    """
+    Разбирает тело пакетного запроса
+
+    Для NDJSON строка с невалидным JSON становится исключением в списке,
+    чтобы отклонить только её, а не весь пакет. Разбор NDJSON
+    останавливается на max_items + 1 строке: такой пакет всё равно
+    отклоняется как слишком большой.
+    """
+    if "ndjson" in content_type:
+        items = []
+        for line in body.splitlines():
+            if not line.strip():
+                continue
+            if len(items) > max_items:
+                break
+            try:
+                items.append(json.loads(line))
+            except json.JSONDecodeError as e:
+                items.append(ValueError(f"Невалидный JSON: {e.msg}"))
+        return items
+
+    try:
+        items = json.loads(body)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Невалидный JSON: {e.msg}")
+
+    if not isinstance(items, list):
+        raise ValueError("Ожидается JSON-массив транзакций")
+
+    return items
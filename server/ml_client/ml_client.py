@@ -0,0 +1,71 @@
+import itertools
+import logging
+from typing import List, Optional
+
+import grpc
+
+from generated_proto import ml_pb2, ml_pb2_grpc
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_OPTIONS = [
+    ('grpc.keepalive_time_ms', 10000),
+    ('grpc.keepalive_timeout_ms', 2000),
+    ('grpc.keepalive_permit_without_calls', 1),
+    ('grpc.http2.max_pings_without_data', 0),
+    ('grpc.use_local_subchannel_pool', 1),
+]
+
+
+class MLClient:
+    """
+    Клиент ML сервиса на пуле долгоживущих gRPC каналов
+
+    Каналы открываются один раз при старте и держатся keepalive'ами,
+    поэтому запрос не платит за установку соединения. Вызовы
+    распределяются по каналам round-robin.
+    """
+
+    def __init__(self, url: str, pool_size: int = 2):
+        self.url = url
+        self.pool_size = pool_size
+        self._channels: List[grpc.aio.Channel] = []
+        self._stubs: List[ml_pb2_grpc.MLServiceStub] = []
+        self._next_stub: Optional[itertools.cycle] = None
+
+    async def connect(self):
+        """Открывает пул каналов"""
+        if self._channels:
+            return
+
+        for _ in range(self.pool_size):
+            channel = grpc.aio.insecure_channel(self.url, options=CHANNEL_OPTIONS)
+            self._channels.append(channel)
+            self._stubs.append(ml_pb2_grpc.MLServiceStub(channel))
+
+        self._next_stub = itertools.cycle(self._stubs)
+        logger.info(f"ML client connected: {self.url}, channels={self.pool_size}")
+
+    async def close(self):
+        """Закрывает каналы"""
+        for channel in self._channels:
+            await channel.close()
+        self._channels = []
+        self._stubs = []
+        self._next_stub = None
+
+    async def predict(self, request: ml_pb2.PredictRequest, timeout: float) -> ml_pb2.PredictResponse:
+        """
+        Синхронный скоринг одной транзакции
+
+        Args:
+            request: Запрос к MLService.Predict
+            timeout: gRPC deadline в секундах
+
+        Raises:
+            grpc.aio.AioRpcError: при ошибке или истечении deadline
+        """
+        if not self._channels:
+            await self.connect()
+
+        return await next(self._next_stub).Predict(request, timeout=timeout)
@@ -0,0 +1,347 @@
+import asyncio
+import bisect
+import ipaddress
+import json
+import logging
+import socket
+from typing import Callable, Dict, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+import grpc
+import numpy as np
+
+from generated_proto import metadata_pb2, metadata_pb2_grpc
+
+logger = logging.getLogger(__name__)
+
+DECLINE = "decline"
+REVIEW = "review"
+
+
+class RuleHit(NamedTuple):
+    """Сработавшее правило: имя и действие (decline - без вызова модели)"""
+    rule: str
+    action: str
+
+
+class TransactionBatch:
+    """
+    Колонки пачки транзакций для векторной проверки правил
+
+    Колонки строятся один раз при первом обращении и переиспользуются
+    всеми правилами пачки.
+    """
+
+    def __init__(self, transactions: Sequence[Mapping]):
+        self.transactions = transactions
+        self.size = len(transactions)
+        self._columns: Dict[str, np.ndarray] = {}
+        self._ipv4: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        self._ipv6: Optional[Dict[int, int]] = None
+
+    def numbers(self, name: str) -> np.ndarray:
+        column = self._columns.get(name)
+        if column is None:
+            column = np.fromiter(
+                (float(tx.get(name) or 0.0) for tx in self.transactions),
+                dtype=np.float64,
+                count=self.size
+            )
+            self._columns[name] = column
+        return column
+
+    def strings(self, name: str) -> np.ndarray:
+        column = self._columns.get(name)
+        if column is None:
+            column = np.array([tx.get(name) or "" for tx in self.transactions], dtype=object)
+            self._columns[name] = column
+        return column
+
+    def ipv4(self) -> Tuple[np.ndarray, np.ndarray]:
+        """IPv4 адреса как uint32 и маска строк, где адрес IPv4"""
+        if self._ipv4 is None:
+            values = np.zeros(self.size, dtype=np.int64)
+            valid = np.zeros(self.size, dtype=bool)
+            ipv6 = {}
+            for i, tx in enumerate(self.transactions):
+                address = tx.get("ip_address") or ""
+                if ":" in address:
+                    try:
+                        ipv6[i] = int(ipaddress.IPv6Address(address))
+                    except ValueError:
+                        pass
+                    continue
+                try:
+                    values[i] = int.from_bytes(socket.inet_aton(address), "big")
+                    valid[i] = True
+                except OSError:
+                    pass
+            self._ipv4 = (values, valid)
+            self._ipv6 = ipv6
+        return self._ipv4
+
+    def ipv6(self) -> Dict[int, int]:
+        """IPv6 адреса как int по индексу строки (их обычно мало)"""
+        self.ipv4()
+        return self._ipv6
+
+
+Check = Callable[[TransactionBatch], np.ndarray]
+
+
+def _merge_intervals(networks) -> Tuple[List[int], List[int]]:
+    """Отсортированные непересекающиеся интервалы [start, end] адресов сетей"""
+    intervals = sorted((int(n.network_address), int(n.broadcast_address)) for n in networks)
+    starts, ends = [], []
+    for start, end in intervals:
+        if starts and start <= ends[-1] + 1:
+            ends[-1] = max(ends[-1], end)
+        else:
+            starts.append(start)
+            ends.append(end)
+    return starts, ends
+
+
+def _compile_amount_limit(params: dict) -> Check:
+    max_amount = float(params["max_amount"])
+    filters = {
+        key: params[key]
+        for key in ("transaction_type", "payment_channel", "merchant_category")
+        if params.get(key)
+    }
+
+    def check(batch: TransactionBatch) -> np.ndarray:
+        mask = batch.numbers("amount") > max_amount
+        for key, value in filters.items():
+            mask &= batch.strings(key) == value
+        return mask
+
+    return check
+
+
+def _compile_blocked_device(params: dict) -> Check:
+    blocked = frozenset(params["device_hashes"])
+
+    def check(batch: TransactionBatch) -> np.ndarray:
+        return np.fromiter(
+            (device in blocked for device in batch.strings("device_hash")),
+            dtype=bool,
+            count=batch.size
+        )
+
+    return check
+
+
+def _compile_blocked_ip_range(params: dict) -> Check:
+    networks = [ipaddress.ip_network(cidr, strict=False) for cidr in params["cidrs"]]
+    v4_starts, v4_ends = _merge_intervals(n for n in networks if n.version == 4)
+    v6_starts, v6_ends = _merge_intervals(n for n in networks if n.version == 6)
+    starts = np.array(v4_starts, dtype=np.int64)
+    ends = np.array(v4_ends, dtype=np.int64)
+
+    def check(batch: TransactionBatch) -> np.ndarray:
+        values, valid = batch.ipv4()
+        mask = np.zeros(batch.size, dtype=bool)
+        if len(starts):
+            index = np.searchsorted(starts, values, side="right") - 1
+            mask = valid & (index >= 0) & (values <= ends[np.maximum(index, 0)])
+
+        if v6_starts:
+            for row, value in batch.ipv6().items():
+                index = bisect.bisect_right(v6_starts, value) - 1
+                if index >= 0 and value <= v6_ends[index]:
+                    mask[row] = True
+        return mask
+
+    return check
+
+
+def _compile_type_channel(params: dict) -> Check:
+    combinations = frozenset(
+        (transaction_type, payment_channel)
+        for transaction_type, payment_channel in params["combinations"]
+    )
+
+    def check(batch: TransactionBatch) -> np.ndarray:
+        return np.fromiter(
+            (
+                pair in combinations
+                for pair in zip(batch.strings("transaction_type"), batch.strings("payment_channel"))
+            ),
+            dtype=bool,
+            count=batch.size
+        )
+
+    return check
+
+
+def _compile_velocity_cap(params: dict) -> Check:
+    max_velocity = params.get("max_velocity")
+    max_window_amount = params.get("max_window_amount")
+    if max_velocity is None and max_window_amount is None:
+        raise ValueError("velocity_cap needs max_velocity or max_window_amount")
+
+    def check(batch: TransactionBatch) -> np.ndarray:
+        mask = np.zeros(batch.size, dtype=bool)
+        if max_velocity is not None:
+            mask |= batch.numbers("velocity_score") > float(max_velocity)
+        if max_window_amount is not None:
+            mask |= batch.numbers("window_amount") > float(max_window_amount)
+        return mask
+
+    return check
+
+
+RULE_COMPILERS: Dict[str, Callable[[dict], Check]] = {
+    "amount_limit": _compile_amount_limit,
+    "blocked_device": _compile_blocked_device,
+    "blocked_ip_range": _compile_blocked_ip_range,
+    "type_channel": _compile_type_channel,
+    "velocity_cap": _compile_velocity_cap,
+}
+
+
+class CompiledRules:
+    """
+    Набор правил, скомпилированный для пакетной проверки
+
+    Каждое правило - функция от колонок пачки, возвращающая маску
+    сработавших строк: суммы сравниваются массивами NumPy, устройства и
+    пары тип/канал ищутся в хэш-множествах, IPv4 - бинарным поиском
+    (np.searchsorted) по отсортированным интервалам CIDR. decline-правила
+    проверяются раньше review, внутри - по priority; транзакции получают
+    первое сработавшее правило. Некорректное правило пропускается с ошибкой
+    в логе, не ломая остальные.
+    """
+
+    def __init__(self, rules: Sequence = (), version: int = 0):
+        self.version = version
+        self._rules: List[Tuple[RuleHit, Check]] = []
+
+        ordered = sorted(rules, key=lambda rule: (rule.action != DECLINE, rule.priority))
+        for rule in ordered:
+            try:
+                params = json.loads(rule.params) if rule.params else {}
+                check = RULE_COMPILERS[rule.rule_type](params)
+            except Exception as e:
+                logger.error(f"Skipping invalid rule {rule.name}: {e!r}")
+                continue
+            self._rules.append((RuleHit(rule.name, rule.action or DECLINE), check))
+
+    def __len__(self) -> int:
+        return len(self._rules)
+
+    def evaluate(self, transactions: Sequence[Mapping]) -> List[Optional[RuleHit]]:
+        """
+        Проверка пачки транзакций
+
+        Returns:
+            Сработавшее правило (или None) по каждой транзакции в порядке входа
+        """
+        if not self._rules or not transactions:
+            return [None] * len(transactions)
+
+        batch = TransactionBatch(transactions)
+        matched = np.full(batch.size, -1, dtype=np.int64)
+        for index, (_, check) in enumerate(self._rules):
+            undecided = matched < 0
+            if not undecided.any():
+                break
+            matched[undecided & check(batch)] = index
+
+        return [self._rules[index][0] if index >= 0 else None for index in matched.tolist()]
+
+
+class RuleEngine:
+    """
+    Правила антифрода из Metadata Service
+
+    Фоновая задача раз в poll_interval вызывает GetRules с if_version и
+    перекомпилирует правила только при изменении набора; проверка
+    транзакций идёт по скомпилированной копии в памяти. Пока правила
+    не получены, набор пуст и транзакции не отклоняются.
+    """
+
+    def __init__(self, metadata_url: str, poll_interval: float = 5.0):
+        self.metadata_url = metadata_url
+        self.poll_interval = poll_interval
+        self.rules = CompiledRules()
+        self._task: Optional[asyncio.Task] = None
+        # Канал к Metadata Service один на всё время работы, создаётся при первом опросе
+        self._channel: Optional[grpc.aio.Channel] = None
+        self._stub: Optional[metadata_pb2_grpc.MetadataDBStub] = None
+
+        self.evaluated = 0
+        self.declined = 0
+        self.flagged = 0
+
+    def start(self):
+        if not self._task:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._channel:
+            await self._channel.close()
+            self._channel = None
+            self._stub = None
+
+    async def refresh(self) -> bool:
+        """
+        Получает правила из Metadata Service
+
+        Returns:
+            True, если набор правил изменился
+        """
+        if self._stub is None:
+            self._channel = grpc.aio.insecure_channel(self.metadata_url)
+            self._stub = metadata_pb2_grpc.MetadataDBStub(self._channel)
+
+        response = await self._stub.GetRules(
+            metadata_pb2.GetRulesRequest(if_version=self.rules.version),
+            timeout=5.0
+        )
+
+        if response.not_modified:
+            return False
+
+        self.rules = CompiledRules(response.rules, version=response.version)
+        logger.info(f"Fraud rules version {response.version}: {len(self.rules)} rules")
+        return True
+
+    def evaluate(self, transactions: Sequence[Mapping]) -> List[Optional[RuleHit]]:
+        """Проверка пачки текущим набором правил"""
+        hits = self.rules.evaluate(transactions)
+
+        self.evaluated += len(hits)
+        for hit in hits:
+            if hit is not None:
+                if hit.action == DECLINE:
+                    self.declined += 1
+                else:
+                    self.flagged += 1
+        return hits
+
+    def metrics(self) -> Dict[str, float]:
+        return {
+            "rules.version": float(self.rules.version),
+            "rules.count": float(len(self.rules)),
+            "rules.evaluated": float(self.evaluated),
+            "rules.declined": float(self.declined),
+            "rules.flagged": float(self.flagged),
+        }
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh()
+            except grpc.aio.AioRpcError as e:
+                logger.error(f"Failed to fetch fraud rules: {e.code()}")
+            except Exception as e:
+                logger.error(f"Fraud rules refresh failed: {e}")
+            await asyncio.sleep(self.poll_interval)
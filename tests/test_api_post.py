@@ -1,3 +1,5 @@
+import asyncio
+
 import pytest
 from fastapi.testclient import TestClient
 from server.main import app
@@ -84,3 +86,318 @@ def test_post_transaction_invalid_ip():
     assert response.status_code == 422
     data = response.json()
     assert any(err["loc"][-1] == "ip_address" for err in data["detail"])
+
+@pytest.fixture
+def offered_batches(monkeypatch):
+    import server.main
+    batches = []
+
+    def mock_offer_many(transactions):
+        batches.append(transactions)
+        return True
+
+    monkeypatch.setattr(server.main.ingest_buffer, "offer_many", mock_offer_many)
+    return batches
+
+def test_post_batch_json_array(offered_batches):
+    invalid = valid_payload.copy()
+    invalid["transaction_id"] = "TXN102"
+    invalid["amount"] = -1
+
+    payload = [
+        {**valid_payload, "transaction_id": "TXN101"},
+        invalid,
+        {**valid_payload, "transaction_id": "TXN103"},
+    ]
+
+    response = client.post("/post/batch", json=payload)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["accepted"] == 2
+    assert data["rejected"] == 1
+    assert [r["status"] for r in data["results"]] == ["accepted", "rejected", "accepted"]
+    assert data["results"][1]["errors"][0]["loc"][-1] == "amount"
+    assert all(r["correlation_id"] for r in data["results"] if r["status"] == "accepted")
+
+    assert len(offered_batches) == 1
+    assert [tx["transaction_id"] for tx in offered_batches[0]] == ["TXN101", "TXN103"]
+
+def test_post_batch_ndjson(offered_batches):
+    import json
+
+    lines = [
+        json.dumps({**valid_payload, "transaction_id": "TXN201"}),
+        "{not json",
+        json.dumps({**valid_payload, "transaction_id": "TXN203"}),
+    ]
+
+    response = client.post(
+        "/post/batch",
+        content="\n".join(lines) + "\n",
+        headers={"Content-Type": "application/x-ndjson"}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert [r["status"] for r in data["results"]] == ["accepted", "rejected", "accepted"]
+    assert len(offered_batches[0]) == 2
+
+def test_post_batch_all_rejected_skips_queue(offered_batches):
+    payload = [{**valid_payload, "transaction_type": "invalid_type"}]
+
+    response = client.post("/post/batch", json=payload)
+    assert response.status_code == 200
+    assert response.json()["accepted"] == 0
+    assert offered_batches == []
+
+def test_post_batch_not_array():
+    response = client.post("/post/batch", json=valid_payload)
+    assert response.status_code == 400
+
+def test_post_batch_too_large(monkeypatch, offered_batches):
+    import server.main
+    monkeypatch.setattr(server.main, "MAX_INGEST_BATCH_SIZE", 1)
+
+    response = client.post("/post/batch", json=[valid_payload, valid_payload])
+    assert response.status_code == 413
+    assert offered_batches == []
+
+def test_post_batch_ndjson_parsing_stops_at_limit(monkeypatch, offered_batches):
+    """Тест: NDJSON разбирается только до первой строки сверх MAX_INGEST_BATCH_SIZE"""
+    import json
+    import server.main
+    monkeypatch.setattr(server.main, "MAX_INGEST_BATCH_SIZE", 2)
+
+    items = server.main._parse_batch(
+        "\n".join([json.dumps(valid_payload)] * 3 + ["{not json"] * 100).encode(),
+        "application/x-ndjson",
+        2
+    )
+    assert len(items) == 3
+
+    response = client.post(
+        "/post/batch",
+        content="\n".join([json.dumps(valid_payload)] * 5),
+        headers={"Content-Type": "application/x-ndjson"}
+    )
+    assert response.status_code == 413
+    assert offered_batches == []
+
+def test_post_batch_body_too_large(monkeypatch, offered_batches):
+    """Тест: тело больше MAX_INGEST_BATCH_BYTES - 413 по Content-Length и без него"""
+    import json
+    import server.main
+    monkeypatch.setattr(server.main, "MAX_INGEST_BATCH_BYTES", 64)
+
+    response = client.post("/post/batch", json=[valid_payload])
+    assert response.status_code == 413
+
+    def chunks():
+        yield b"["
+        yield json.dumps(valid_payload).encode()
+        yield b"]"
+
+    response = client.post("/post/batch", content=chunks())
+    assert response.status_code == 413
+    assert offered_batches == []
+
+def test_post_transaction_shed_when_queue_overloaded(monkeypatch):
+    import server.main
+    monkeypatch.setattr(server.main.depth_monitor, "overloaded", True)
+
+    response = client.post("/post", json=valid_payload)
+    assert response.status_code == 429
+    assert response.headers["Retry-After"]
+
+    response = client.post("/post/batch", json=[valid_payload])
+    assert response.status_code == 429
+
+def test_post_transaction_rejected_when_buffer_full(monkeypatch):
+    import server.main
+    monkeypatch.setattr(server.main.ingest_buffer, "offer", lambda transaction: False)
+
+    response = client.post("/post", json=valid_payload)
+    assert response.status_code == 503
+    assert response.headers["Retry-After"]
+
+def test_post_batch_rejected_when_buffer_full(monkeypatch):
+    import server.main
+    monkeypatch.setattr(server.main.ingest_buffer, "offer_many", lambda transactions: False)
+
+    response = client.post("/post/batch", json=[valid_payload])
+    assert response.status_code == 503
+    assert response.headers["Retry-After"]
+
+def test_score_transaction(monkeypatch):
+    import server.main
+
+    async def mock_predict(request, timeout):
+        from generated_proto import ml_pb2
+
+        assert 0 < timeout <= 0.05
+        assert request.velocity_score == 3
+        return ml_pb2.PredictResponse(
+            correlation_id=request.correlation_id,
+            is_fraud=request.amount > 1000,
+            probability=0.9
+        )
+
+    async def mock_compute(transactions):
+        return [{
+            "time_since_last_transaction": 60.0,
+            "spending_deviation_score": 2.5,
+            "velocity_score": 3.0,
+            "geo_anomaly_score": 0.0,
+            "window_amount": 5300.0,
+        } for _ in transactions]
+
+    monkeypatch.setattr(server.main.ml_client, "predict", mock_predict)
+    monkeypatch.setattr(server.main.feature_store, "compute", mock_compute)
+
+    response = client.post("/score?deadline_ms=50", json={**valid_payload, "amount": 5000.0})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["decision"] == "decline"
+    assert data["probability"] == 0.9
+    assert data["fallback"] is False
+    assert set(data["latency_ms"]) == {"prepare", "model_rpc", "total"}
+
+def test_score_transaction_declined_by_rule(monkeypatch):
+    import server.main
+    from server.rule_engine.rule_engine import CompiledRules
+    from tests.test_rule_engine import make_rule
+
+    async def mock_predict(request, timeout):
+        raise AssertionError("model must not be called")
+
+    async def mock_compute(transactions):
+        raise ConnectionError("redis is down")
+
+    monkeypatch.setattr(server.main.ml_client, "predict", mock_predict)
+    monkeypatch.setattr(server.main.feature_store, "compute", mock_compute)
+    monkeypatch.setattr(server.main.rule_engine, "rules", CompiledRules([
+        make_rule("bad-device", "blocked_device", {"device_hashes": [valid_payload["device_hash"]]})
+    ]))
+
+    response = client.post("/score", json=valid_payload)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["decision"] == "decline"
+    assert data["rule"] == "bad-device"
+    assert data["fallback"] is False
+
+def test_score_transaction_rules_failure_goes_to_model(monkeypatch):
+    import server.main
+
+    async def mock_predict(request, timeout):
+        from generated_proto import ml_pb2
+        return ml_pb2.PredictResponse(correlation_id=request.correlation_id, probability=0.1)
+
+    async def mock_compute(transactions):
+        return [{} for _ in transactions]
+
+    def broken_evaluate(transactions):
+        raise RuntimeError("bad rule set")
+
+    monkeypatch.setattr(server.main.ml_client, "predict", mock_predict)
+    monkeypatch.setattr(server.main.feature_store, "compute", mock_compute)
+    monkeypatch.setattr(server.main.rule_engine, "evaluate", broken_evaluate)
+
+    response = client.post("/score", json=valid_payload)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["decision"] == "approve"
+    assert data["fallback"] is False
+
+def test_score_transaction_fallback_on_deadline(monkeypatch):
+    import grpc
+    import server.main
+
+    async def mock_predict(request, timeout):
+        raise grpc.aio.AioRpcError(
+            grpc.StatusCode.DEADLINE_EXCEEDED, grpc.aio.Metadata(), grpc.aio.Metadata()
+        )
+
+    async def mock_compute(transactions):
+        raise ConnectionError("redis is down")
+
+    monkeypatch.setattr(server.main.ml_client, "predict", mock_predict)
+    monkeypatch.setattr(server.main.feature_store, "compute", mock_compute)
+    monkeypatch.setattr(server.main, "SCORE_FALLBACK_DECISION", "review")
+
+    response = client.post("/score", json=valid_payload)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["decision"] == "review"
+    assert data["fallback"] is True
+    assert data["fallback_reason"] == "DEADLINE_EXCEEDED"
+    assert data["is_fraud"] is None
+
+def test_score_transaction_slow_features_within_budget(monkeypatch):
+    import server.main
+
+    async def mock_predict(request, timeout):
+        raise AssertionError("budget is spent on features, model must not be called")
+
+    async def mock_compute(transactions):
+        await asyncio.sleep(5)
+
+    monkeypatch.setattr(server.main.ml_client, "predict", mock_predict)
+    monkeypatch.setattr(server.main.feature_store, "compute", mock_compute)
+
+    response = client.post("/score?deadline_ms=50", json=valid_payload)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["fallback"] is True
+    assert data["fallback_reason"] == "DEADLINE_EXCEEDED"
+    assert data["latency_ms"]["total"] < 1000
+
+@pytest.mark.parametrize("error, reason", [
+    (asyncio.TimeoutError(), "DEADLINE_EXCEEDED"),
+    (ConnectionRefusedError("ml is down"), "UNAVAILABLE"),
+])
+def test_score_transaction_fallback_on_client_error(monkeypatch, error, reason):
+    import server.main
+
+    async def mock_predict(request, timeout):
+        raise error
+
+    async def mock_compute(transactions):
+        return [{} for _ in transactions]
+
+    monkeypatch.setattr(server.main.ml_client, "predict", mock_predict)
+    monkeypatch.setattr(server.main.feature_store, "compute", mock_compute)
+
+    response = client.post("/score", json=valid_payload)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["decision"] == "approve"
+    assert data["fallback"] is True
+    assert data["fallback_reason"] == reason
+
+def test_score_transaction_review_rule_wins_over_fallback(monkeypatch):
+    import grpc
+    import server.main
+    from server.rule_engine.rule_engine import CompiledRules
+    from tests.test_rule_engine import make_rule
+
+    async def mock_predict(request, timeout):
+        raise grpc.aio.AioRpcError(
+            grpc.StatusCode.UNAVAILABLE, grpc.aio.Metadata(), grpc.aio.Metadata()
+        )
+
+    async def mock_compute(transactions):
+        return [{} for _ in transactions]
+
+    monkeypatch.setattr(server.main.ml_client, "predict", mock_predict)
+    monkeypatch.setattr(server.main.feature_store, "compute", mock_compute)
+    monkeypatch.setattr(server.main.rule_engine, "rules", CompiledRules([
+        make_rule("watch-device", "blocked_device", {"device_hashes": [valid_payload["device_hash"]]},
+                  action="review")
+    ]))
+
+    response = client.post("/score", json=valid_payload)
+    data = response.json()
+    assert data["decision"] == "review"
+    assert data["rule"] == "watch-device"
+    assert data["fallback"] is True
+    assert data["fallback_reason"] == "UNAVAILABLE"
@@ -0,0 +1,101 @@
+import pytest
+import asyncio
+
+from server.backpressure.backpressure import IngestBuffer, QueueDepthMonitor
+
+
+class FakeQueue:
+    def __init__(self, depth: int = 0, fail_pushes: int = 0):
+        self.depth = depth
+        self.fail_pushes = fail_pushes
+        self.pushed = []
+
+    async def length(self) -> int:
+        return self.depth
+
+    async def push_many(self, transactions):
+        if self.fail_pushes:
+            self.fail_pushes -= 1
+            raise ConnectionError("redis is slow")
+        self.pushed.append(list(transactions))
+        return len(transactions)
+
+
+@pytest.mark.asyncio
+async def test_depth_monitor_hysteresis():
+    """Тест: перегрузка включается на high и снимается только на low watermark"""
+    queue = FakeQueue()
+    monitor = QueueDepthMonitor(queue, high_watermark=100, low_watermark=50)
+
+    queue.depth = 99
+    await monitor.refresh()
+    assert not monitor.overloaded
+
+    queue.depth = 100
+    await monitor.refresh()
+    assert monitor.overloaded
+
+    queue.depth = 70
+    await monitor.refresh()
+    assert monitor.overloaded
+
+    queue.depth = 50
+    await monitor.refresh()
+    assert not monitor.overloaded
+
+
+def test_depth_monitor_invalid_watermarks():
+    """Тест: low watermark не может превышать high"""
+    with pytest.raises(ValueError):
+        QueueDepthMonitor(FakeQueue(), high_watermark=10, low_watermark=20)
+
+
+@pytest.mark.asyncio
+async def test_ingest_buffer_bounded():
+    """Тест: буфер не принимает больше max_size"""
+    buffer = IngestBuffer(FakeQueue(), max_size=3)
+
+    assert buffer.offer({"id": "tx-1"})
+    assert buffer.offer_many([{"id": "tx-2"}, {"id": "tx-3"}])
+    assert not buffer.offer({"id": "tx-4"})
+    assert buffer.size == 3
+
+
+@pytest.mark.asyncio
+async def test_ingest_buffer_offer_many_all_or_nothing():
+    """Тест: пачка, не помещающаяся целиком, не кладётся частично"""
+    buffer = IngestBuffer(FakeQueue(), max_size=3)
+    buffer.offer({"id": "tx-1"})
+
+    assert not buffer.offer_many([{"id": "tx-2"}, {"id": "tx-3"}, {"id": "tx-4"}])
+    assert buffer.size == 1
+
+
+@pytest.mark.asyncio
+async def test_ingest_buffer_flushes_in_batches():
+    """Тест: фоновая задача отправляет буфер пачками"""
+    queue = FakeQueue()
+    buffer = IngestBuffer(queue, max_size=100, flush_batch_size=4)
+    buffer.offer_many([{"id": f"tx-{i}"} for i in range(10)])
+
+    buffer.start()
+    await asyncio.sleep(0.05)
+    await buffer.stop()
+
+    assert [len(batch) for batch in queue.pushed] == [4, 4, 2]
+
+
+@pytest.mark.asyncio
+async def test_ingest_buffer_retries_and_flushes_on_stop():
+    """Тест: неудачная отправка повторяется, остаток дописывается при остановке"""
+    queue = FakeQueue(fail_pushes=1)
+    buffer = IngestBuffer(queue, max_size=100, flush_batch_size=10, retry_delay=10)
+    buffer.offer_many([{"id": "tx-1"}, {"id": "tx-2"}])
+
+    buffer.start()
+    await asyncio.sleep(0.05)
+    assert queue.pushed == []
+
+    await buffer.stop()
+
+    assert [tx["id"] for tx in queue.pushed[0]] == ["tx-1", "tx-2"]
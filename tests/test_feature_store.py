@@ -0,0 +1,202 @@
+import pytest
+
+import pytest_asyncio
+
+from feature_store import AccountStateCache, OnlineFeatureStore
+from core.config import REDIS_URL
+
+
+@pytest_asyncio.fixture
+async def store():
+    """Фикстура: хранилище признаков с отдельным префиксом ключей"""
+    store = OnlineFeatureStore(REDIS_URL, key_prefix="test:features", window_seconds=3600)
+    await store.connect()
+    keys = await store._redis.keys("test:features:*")
+    if keys:
+        await store._redis.delete(*keys)
+
+    yield store
+
+    keys = await store._redis.keys("test:features:*")
+    if keys:
+        await store._redis.delete(*keys)
+    await store.close()
+
+
+def make_transaction(timestamp: str, amount: float = 100.0, location: str = "Moscow, RU",
+                     account: str = "ACC12345", transaction_id: str = None) -> dict:
+    return {
+        "transaction_id": transaction_id,
+        "timestamp": timestamp,
+        "sender_account": account,
+        "amount": amount,
+        "location": location,
+        "device_hash": "abcdef12345678",
+    }
+
+
+@pytest.mark.asyncio
+async def test_first_transaction_has_empty_history(store):
+    """Тест: у первой транзакции счёта нет истории"""
+    [features] = await store.compute([make_transaction("2025-10-23T12:00:00+00:00")])
+
+    assert features["time_since_last_transaction"] == 0
+    assert features["spending_deviation_score"] == 0
+    assert features["velocity_score"] == 1
+    assert features["geo_anomaly_score"] == 0
+    assert features["window_amount"] == 100.0
+
+
+@pytest.mark.asyncio
+async def test_features_follow_account_history(store):
+    """Тест: признаки считаются по истории счёта, в том числе внутри одной пачки"""
+    features = await store.compute([
+        make_transaction("2025-10-23T12:00:00+00:00", amount=100.0),
+        make_transaction("2025-10-23T12:10:00+00:00", amount=200.0),
+        make_transaction("2025-10-23T12:40:00+00:00", amount=2000.0, location="Paris, FR"),
+        make_transaction("2025-10-23T12:40:00+00:00", account="ACC99999"),
+    ])
+
+    assert features[1]["time_since_last_transaction"] == 600
+    assert features[2]["time_since_last_transaction"] == 1800
+    assert features[2]["velocity_score"] == 3
+    assert features[2]["window_amount"] == 2300.0
+    # история 100 и 200: среднее 150, стандартное отклонение ~70.7
+    assert features[2]["spending_deviation_score"] == pytest.approx(1850 / 70.7107, rel=1e-4)
+    assert features[2]["geo_anomaly_score"] == pytest.approx(1 / 1.5)
+    assert features[3]["velocity_score"] == 1
+
+
+@pytest.mark.asyncio
+async def test_window_expires_old_transactions(store):
+    """Тест: транзакции старше окна не входят в velocity_score"""
+    await store.compute([
+        make_transaction("2025-10-23T10:00:00+00:00"),
+        make_transaction("2025-10-23T10:30:00+00:00"),
+    ])
+
+    [features] = await store.compute([make_transaction("2025-10-23T12:00:00+00:00")])
+
+    assert features["velocity_score"] == 1
+    assert features["time_since_last_transaction"] == 5400
+
+
+@pytest.mark.asyncio
+async def test_late_transaction_keeps_last_state(store):
+    """Тест: опоздавшая транзакция не сдвигает время и локацию последней"""
+    await store.compute([make_transaction("2025-10-23T12:00:00+00:00")])
+    [late] = await store.compute([
+        make_transaction("2025-10-23T11:50:00+00:00", location="Paris, FR")
+    ])
+    [features] = await store.compute([make_transaction("2025-10-23T12:05:00+00:00")])
+
+    assert late["time_since_last_transaction"] == 0
+    assert late["geo_anomaly_score"] == 0
+    assert features["time_since_last_transaction"] == 300
+    assert features["geo_anomaly_score"] == 0
+    assert features["velocity_score"] == 3
+
+
+@pytest.mark.asyncio
+async def test_cached_features_match_script(store):
+    """Тест: признаки из кэша совпадают с расчётом скрипта в Redis"""
+    cached = OnlineFeatureStore(
+        REDIS_URL, key_prefix="test:features:cached", cache=AccountStateCache(ttl=60)
+    )
+    transactions = [
+        make_transaction(f"2025-10-23T12:{minute:02d}:00+00:00", amount=amount, location=location)
+        for minute, amount, location in [
+            (0, 100.0, "Moscow, RU"), (5, 250.0, "Moscow, RU"), (7, 40.5, "Paris, FR"),
+            (20, 999.9, "Paris, FR"), (15, 10.0, "Moscow, RU"), (59, 3000.0, "Moscow, RU"),
+        ]
+    ]
+
+    try:
+        expected = [(await store.compute([tx]))[0] for tx in transactions]
+        actual = [(await cached.compute([tx]))[0] for tx in transactions]
+        await cached.flush()
+
+        assert actual == expected
+        assert cached.cache.hits == len(transactions) - 1
+        assert cached.cache.invalidations == 0
+    finally:
+        await cached.close()
+
+
+@pytest.mark.asyncio
+async def test_cache_invalidated_by_other_writer(store):
+    """Тест: обновление счёта другим процессом инвалидирует запись кэша"""
+    cached = OnlineFeatureStore(
+        REDIS_URL, key_prefix="test:features", cache=AccountStateCache(ttl=60)
+    )
+
+    try:
+        await cached.compute([make_transaction("2025-10-23T12:00:00+00:00")])
+        await store.compute([make_transaction("2025-10-23T12:01:00+00:00")])
+
+        await cached.compute([make_transaction("2025-10-23T12:02:00+00:00")])
+        await cached.flush()
+        assert cached.cache.invalidations == 1
+
+        [features] = await cached.compute([make_transaction("2025-10-23T12:03:00+00:00")])
+        assert features["velocity_score"] == 4
+    finally:
+        await cached.close()
+
+
+@pytest.mark.asyncio
+async def test_redelivered_transaction_counted_once(store):
+    """Тест: повторно доставленная транзакция не меняет состояние и получает прежние признаки"""
+    await store.compute([make_transaction("2025-10-23T12:00:00+00:00", amount=100.0)])
+    transaction = make_transaction("2025-10-23T12:10:00+00:00", amount=300.0, transaction_id="T1")
+
+    [first] = await store.compute([transaction])
+    [again] = await store.compute([transaction])
+    both = await store.compute([transaction, transaction])
+    [features] = await store.compute([make_transaction("2025-10-23T12:20:00+00:00")])
+
+    assert again == first and both == [first, first]
+    assert first["velocity_score"] == 2
+    assert features["velocity_score"] == 3
+    assert features["window_amount"] == 500.0
+    assert await store._redis.ttl(store.seen_key("T1")) > 0
+
+
+@pytest.mark.asyncio
+async def test_redelivered_transaction_invalidates_cache(store):
+    """Тест: повтор транзакции, применённый кэшем локально, сбрасывает запись кэша"""
+    cached = OnlineFeatureStore(
+        REDIS_URL, key_prefix="test:features", cache=AccountStateCache(ttl=60)
+    )
+    transaction = make_transaction("2025-10-23T12:10:00+00:00", transaction_id="T1")
+
+    try:
+        await cached.compute([make_transaction("2025-10-23T12:00:00+00:00")])
+        await cached.compute([transaction])
+        await cached.compute([transaction])
+        await cached.flush()
+        assert cached.cache.invalidations == 1
+
+        [features] = await cached.compute([make_transaction("2025-10-23T12:20:00+00:00")])
+        assert features["velocity_score"] == 3
+    finally:
+        await cached.close()
+
+
+def test_state_cache_lru_eviction_and_ttl():
+    """Тест: кэш вытесняет давно не использованные записи и не отдаёт истёкшие"""
+    cache = AccountStateCache(max_entries=2, ttl=60)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.evictions == 1
+
+    expired = AccountStateCache(ttl=0)
+    expired.put("a", 1)
+    assert expired.get("a") is None
+    assert expired.expirations == 1
+    assert expired.metrics()["feature_cache.hit_ratio"] == 0.0
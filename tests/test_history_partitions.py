@@ -0,0 +1,168 @@
+import uuid
+from datetime import date, datetime, timedelta
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import make_url, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from requests_history_service import database
+
+
+class FakeResult:
+    def __init__(self, value):
+        self.value = value
+
+    def scalar(self):
+        return self.value
+
+
+class FakeConnection:
+    def __init__(self, calls):
+        self.calls = calls
+
+    async def execute(self, statement, params=None):
+        self.calls.append((str(statement), params))
+        return FakeResult(len(self.calls))
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+class FakeEngine:
+    def __init__(self):
+        self.calls = []
+
+    def begin(self):
+        return FakeConnection(self.calls)
+
+
+@pytest.mark.asyncio
+async def test_maintain_partitions_skips_retention_by_default(monkeypatch):
+    """Тест: без retention_days только создаются будущие секции"""
+    engine = FakeEngine()
+    monkeypatch.setattr(database, "engine", engine)
+
+    assert await database.maintain_partitions(7) == (1, 0)
+    assert len(engine.calls) == 1
+    assert "create_history_partitions" in engine.calls[0][0]
+    assert engine.calls[0][1] == {"days": 7}
+
+
+@pytest.mark.asyncio
+async def test_maintain_partitions_applies_retention(monkeypatch):
+    """Тест: retention_days и detach передаются в apply_history_retention"""
+    engine = FakeEngine()
+    monkeypatch.setattr(database, "engine", engine)
+
+    assert await database.maintain_partitions(3, retention_days=30, detach=True) == (1, 2)
+    assert "apply_history_retention" in engine.calls[1][0]
+    assert engine.calls[1][1] == {"keep_days": 30, "detach": True}
+
+
+@pytest_asyncio.fixture
+async def history_db(monkeypatch):
+    """
+    Фикстура: миграции истории во временной базе на сервере DATABASE_URL
+
+    Без доступного Postgres тесты секционирования пропускаются.
+    """
+    url = make_url(database.DATABASE_URL)
+    name = f"test_history_{uuid.uuid4().hex[:8]}"
+    # CREATE DATABASE не выполняется внутри транзакции
+    admin = create_async_engine(url, isolation_level="AUTOCOMMIT")
+    try:
+        async with admin.connect() as conn:
+            await conn.execute(text(f'CREATE DATABASE "{name}"'))
+    except Exception as e:
+        await admin.dispose()
+        pytest.skip(f"Postgres is not available: {e}")
+
+    engine = create_async_engine(url.set(database=name))
+    monkeypatch.setattr(database, "engine", engine)
+    try:
+        await database.apply_migrations()
+        yield engine
+    finally:
+        await engine.dispose()
+        async with admin.connect() as conn:
+            await conn.execute(text(f'DROP DATABASE "{name}"'))
+        await admin.dispose()
+
+
+async def insert_rows(engine, *days: date):
+    async with engine.begin() as conn:
+        for i, day in enumerate(days):
+            await conn.execute(text(
+                "INSERT INTO transactions_history (transaction_id, \"timestamp\", sender_account, "
+                "receiver_account, amount, transaction_type, merchant_category, location, "
+                "device_used, payment_channel, ip_address, device_hash, correlation_id) "
+                "VALUES (:id, :ts, 'ACC12345', 'ACC54321', 100, 'transfer', 'retail', "
+                "'Moscow, RU', 'mobile', 'online', '127.0.0.1', 'abcdef12345678', :id)"
+            ), {"id": f"T{i}-{day}", "ts": datetime.combine(day, datetime.min.time()) + timedelta(hours=12)})
+
+
+async def partition_rows(engine) -> dict:
+    """Число строк по секциям истории"""
+    async with engine.connect() as conn:
+        result = await conn.execute(text(
+            "SELECT tableoid::regclass::text AS name, count(*) FROM transactions_history GROUP BY 1"
+        ))
+        return dict(result.all())
+
+
+async def scalar(engine, sql: str, **params):
+    async with engine.begin() as conn:
+        return (await conn.execute(text(sql), params)).scalar()
+
+
+@pytest.mark.asyncio
+async def test_create_partitions_moves_rows_from_default(history_db):
+    """Тест: секция за прошлый день забирает его строки из секции по умолчанию"""
+    old_day = date.today() - timedelta(days=20)
+    await insert_rows(history_db, old_day, old_day, date.today())
+    assert (await partition_rows(history_db))["transactions_history_default"] == 2
+
+    created = await scalar(history_db, "SELECT create_history_partitions(:day, :day)", day=old_day)
+    again = await scalar(history_db, "SELECT create_history_partitions(:day, :day)", day=old_day)
+
+    rows = await partition_rows(history_db)
+    assert (created, again) == (1, 0)
+    assert rows[f"transactions_history_p{old_day:%Y%m%d}"] == 2
+    assert rows[f"transactions_history_p{date.today():%Y%m%d}"] == 1
+    assert "transactions_history_default" not in rows
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("detach", [False, True])
+async def test_retention_removes_old_partitions(history_db, detach):
+    """Тест: retention убирает секции и строки по умолчанию старше keep_days, свежие не трогает"""
+    old_day, kept_day = date.today() - timedelta(days=20), date.today() - timedelta(days=2)
+    await insert_rows(history_db, old_day, kept_day, date.today() - timedelta(days=40))
+    await scalar(history_db, "SELECT create_history_partitions(:old, :old)", old=old_day)
+
+    created, removed = await database.maintain_partitions(7, retention_days=10, detach=detach)
+
+    rows = await partition_rows(history_db)
+    old_partition = f"transactions_history_p{old_day:%Y%m%d}"
+    assert (created, removed) == (0, 1)
+    assert old_partition not in rows
+    # В секции по умолчанию осталась строка за 2 дня назад, за 40 дней - удалена
+    assert rows == {"transactions_history_default": 1}
+    exists = await scalar(history_db, "SELECT to_regclass(:name) IS NOT NULL", name=old_partition)
+    assert exists is detach
+
+
+@pytest.mark.asyncio
+async def test_maintain_partitions_creates_days_ahead(history_db):
+    """Тест: maintain_partitions добавляет недостающие будущие дни, существующие не пересоздаёт"""
+    # Миграция уже создала секции на сегодня и 7 дней вперёд
+    assert await database.maintain_partitions(10) == (3, 0)
+    assert await database.maintain_partitions(10) == (0, 0)
+
+    last_day = date.today() + timedelta(days=10)
+    await insert_rows(history_db, last_day)
+    assert await partition_rows(history_db) == {f"transactions_history_p{last_day:%Y%m%d}": 1}
@@ -0,0 +1,290 @@
+import base64
+import importlib.util
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+from generated_proto import transactions_pb2
+from requests_history_service.write_buffer import FlushResult
+
+SERVICE_DIR = Path(__file__).resolve().parent.parent / "requests_history_service"
+
+# Модуль сервиса грузится под своим именем, а папка сервиса в sys.path
+# только на время импорта: иначе её server.py заслонит пакет шлюза server
+_spec = importlib.util.spec_from_file_location("history_server", SERVICE_DIR / "server.py")
+history_server = importlib.util.module_from_spec(_spec)
+sys.path.insert(0, str(SERVICE_DIR))
+try:
+    _spec.loader.exec_module(history_server)
+finally:
+    sys.path.remove(str(SERVICE_DIR))
+
+
+class FakeWriteBuffer:
+    def __init__(self, result=None, error=None):
+        self.submitted = []
+        self.result = result
+        self.error = error
+
+    async def submit(self, rows):
+        self.submitted.append([row[0] for row in rows])
+        if self.error:
+            raise self.error
+        return self.result
+
+
+def insert_request(transaction_id, **fields):
+    values = {
+        "transaction_id": transaction_id,
+        "timestamp": "2026-10-17T12:00:00.000000",
+        "sender_account": "ACC12345",
+        "receiver_account": "ACC54321",
+        "amount": 100.0,
+        "transaction_type": "transfer",
+        "merchant_category": "retail",
+        "location": "Moscow, RU",
+        "device_used": "mobile",
+        "payment_channel": "online",
+        "ip_address": "127.0.0.1",
+        "device_hash": "abcdef12345678",
+        "correlation_id": f"corr-{transaction_id}",
+    }
+    values.update(fields)
+    return transactions_pb2.InsertTransactionRequest(**values)
+
+
+async def insert_batch(write_buffer, requests):
+    results = await history_server._insert_batch(write_buffer, requests)
+    return [(result.transaction_id, result.status) for result in results], results
+
+
+@pytest.mark.asyncio
+async def test_insert_batch_statuses():
+    """Тест: invalid, повтор в пачке, вставленные, дубликаты и отвергнутые БД строки"""
+    write_buffer = FakeWriteBuffer(FlushResult({"T1"}, {"T4": ValueError("bad row")}))
+
+    statuses, results = await insert_batch(write_buffer, [
+        insert_request("T1"),
+        insert_request("T2"),
+        insert_request("T1"),
+        insert_request("T3", merchant_category="x" * 101),
+        insert_request("T4"),
+        insert_request("T5", timestamp="yesterday"),
+    ])
+
+    assert statuses == [
+        ("T1", "inserted"),
+        ("T2", "duplicate"),
+        ("T1", "duplicate"),
+        ("T3", "invalid"),
+        ("T4", "failed"),
+        ("T5", "invalid"),
+    ]
+    assert write_buffer.submitted == [["T1", "T2", "T4"]]
+    assert "merchant_category must be at most 100" in results[3].error
+    assert results[4].error == "bad row"
+
+
+@pytest.mark.asyncio
+async def test_insert_batch_queued_in_fast_mode():
+    """Тест: в быстром режиме буфера принятые строки получают queued"""
+    statuses, _ = await insert_batch(FakeWriteBuffer(None), [
+        insert_request("T1"), insert_request("T2", amount=-1.0)
+    ])
+
+    assert statuses == [("T1", "queued"), ("T2", "invalid")]
+
+
+@pytest.mark.asyncio
+async def test_insert_batch_buffer_failure():
+    """Тест: при ошибке записи failed получают все корректные строки пачки"""
+    statuses, results = await insert_batch(FakeWriteBuffer(error=RuntimeError("db is down")), [
+        insert_request("T1"), insert_request("T2", device_hash="short")
+    ])
+
+    assert statuses == [("T1", "failed"), ("T2", "invalid")]
+    assert results[0].error == "db is down"
+
+
+def test_insert_response_counters():
+    """Тест: счётчики ответа InsertTransactions по статусам (queued считается вставленной)"""
+    response = history_server._insert_response([
+        transactions_pb2.InsertResult(transaction_id=f"T{i}", status=status)
+        for i, status in enumerate(["inserted", "queued", "duplicate", "invalid", "failed", "failed"])
+    ])
+
+    assert (response.inserted, response.duplicates, response.invalid, response.failed) == (2, 1, 1, 2)
+    assert len(response.results) == 6
+
+
+def test_page_token_round_trip():
+    """Тест: токен страницы восстанавливает ключ (timestamp, id) последней строки"""
+    row = {"timestamp": datetime(2026, 10, 17, 12, 30, 5, 123456), "id": 42}
+
+    token = history_server._encode_page_token(row)
+
+    assert history_server._decode_page_token(token) == (row["timestamp"], 42)
+    assert history_server._decode_page_token("") is None
+
+
+@pytest.mark.parametrize("token", [
+    "not base64!",
+    base64.urlsafe_b64encode(b"2026-10-17T12:00:00").decode(),
+    base64.urlsafe_b64encode(b"yesterday|42").decode(),
+    base64.urlsafe_b64encode(b"2026-10-17T12:00:00|forty-two").decode(),
+])
+def test_page_token_corrupt(token):
+    """Тест: испорченный токен страницы - ValueError"""
+    with pytest.raises(ValueError, match="invalid page_token"):
+        history_server._decode_page_token(token)
+
+
+def test_query_filters():
+    """Тест: фильтры запроса истории разбираются, пустые поля становятся None"""
+    filters = history_server._query_filters(transactions_pb2.TransactionsQuery(
+        sender_account="ACC12345",
+        from_timestamp="2026-10-01T00:00:00",
+        ascending=True,
+    ))
+
+    assert filters == {
+        "sender_account": "ACC12345",
+        "receiver_account": None,
+        "correlation_id": None,
+        "from_timestamp": datetime(2026, 10, 1),
+        "to_timestamp": None,
+        "ascending": True,
+    }
+
+
+@pytest.mark.parametrize("query, message", [
+    (transactions_pb2.TransactionsQuery(ascending=True), "is required"),
+    (transactions_pb2.TransactionsQuery(sender_account="ACC12345", limit=-1), "limit"),
+    (transactions_pb2.TransactionsQuery(from_timestamp="yesterday"), "Invalid isoformat"),
+])
+def test_query_filters_invalid(query, message):
+    """Тест: запрос без фильтров, с отрицательным limit или плохой датой - ValueError"""
+    with pytest.raises(ValueError, match=message):
+        history_server._query_filters(query)
+
+
+def test_account_stats():
+    """Тест: статистика счёта собирается из корзин: среднее, stddev, уникальные устройства"""
+    amounts = [[10.0, 20.0], [30.0, 40.0, 50.0]]
+    rows = [
+        {
+            "bucket": datetime(2026, 10, 16 + i),
+            "tx_count": len(bucket),
+            "amount_sum": sum(bucket),
+            "amount_sum_sq": sum(a * a for a in bucket),
+            "amount_max": max(bucket),
+            "devices": devices,
+        }
+        for i, (bucket, devices) in enumerate(zip(amounts, [["dev-a", "dev-b"], ["dev-b", "dev-c"]]))
+    ]
+
+    stats = history_server._account_stats("ACC12345", rows)
+
+    assert stats.account == "ACC12345"
+    assert stats.count == 5
+    assert stats.amount_sum == 150.0
+    assert stats.mean_amount == 30.0
+    # Выборочное stddev 10, 20, 30, 40, 50
+    assert stats.stddev_amount == pytest.approx(15.8113883)
+    assert stats.max_amount == 50.0
+    assert stats.distinct_devices == 3
+    assert [bucket.distinct_devices for bucket in stats.buckets] == [2, 2]
+    assert stats.buckets[0].bucket == "2026-10-16T00:00:00.000000"
+
+
+def test_account_stats_few_rows():
+    """Тест: без строк статистика нулевая, по одной транзакции stddev = 0"""
+    empty = history_server._account_stats("ACC12345", [])
+    single = history_server._account_stats("ACC12345", [{
+        "bucket": datetime(2026, 10, 17),
+        "tx_count": 1,
+        "amount_sum": 25.0,
+        "amount_sum_sq": 625.0,
+        "amount_max": 25.0,
+        "devices": ["dev-a"],
+    }])
+
+    assert (empty.count, empty.mean_amount, empty.distinct_devices) == (0, 0.0, 0)
+    assert (single.mean_amount, single.stddev_amount) == (25.0, 0.0)
+
+
+def history_rows(count):
+    """Строки истории по три на одну метку времени, id по возрастанию"""
+    return [
+        {
+            "id": i + 1,
+            "transaction_id": f"T{i}",
+            "timestamp": datetime(2026, 10, 17, 12, i // 3),
+            "sender_account": "ACC12345",
+            "receiver_account": "ACC54321",
+            "amount": 100.0 + i,
+            "transaction_type": "transfer",
+            "merchant_category": "retail",
+            "location": "Moscow, RU",
+            "device_used": "mobile",
+            "payment_channel": "online",
+            "ip_address": "127.0.0.1",
+            "device_hash": "abcdef12345678",
+            "correlation_id": f"corr-{i}",
+        }
+        for i in range(count)
+    ]
+
+
+class FakeContext:
+    def __init__(self):
+        self.code = None
+
+    def set_code(self, code):
+        self.code = code
+
+    def set_details(self, details):
+        self.details = details
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("ascending", [True, False])
+@pytest.mark.parametrize("count", [10, 8])
+async def test_get_transactions_pages_through_equal_timestamps(monkeypatch, ascending, count):
+    """Тест: страницы по (timestamp, id) при одинаковых timestamp - без пропусков и повторов"""
+    table = history_rows(count)
+
+    async def fake_query_transactions(sender_account=None, after=None, limit=100, ascending=False, **filters):
+        rows = sorted(
+            (row for row in table if row["sender_account"] == sender_account),
+            key=lambda row: (row["timestamp"], row["id"]),
+            reverse=not ascending,
+        )
+        if after is not None:
+            rows = [
+                row for row in rows
+                if ((row["timestamp"], row["id"]) > after) == ascending
+                and (row["timestamp"], row["id"]) != after
+            ]
+        return rows[:limit]
+
+    monkeypatch.setattr(history_server, "query_transactions", fake_query_transactions)
+    servicer = history_server.TransactionsDBServicer(write_buffer=None)
+
+    pages, token = [], ""
+    while True:
+        context = FakeContext()
+        page = await servicer.GetTransactions(transactions_pb2.TransactionsQuery(
+            sender_account="ACC12345", limit=4, ascending=ascending, page_token=token
+        ), context)
+        assert context.code is None
+        pages.append([item.id for item in page.transactions])
+        token = page.next_page_token
+        if not token:
+            break
+
+    ids = list(range(1, count + 1)) if ascending else list(range(count, 0, -1))
+    # Последняя страница без токена, даже если в ней ровно limit строк
+    assert pages == [ids[start:start + 4] for start in range(0, count, 4)]
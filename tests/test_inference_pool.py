@@ -0,0 +1,94 @@
+import pytest
+import asyncio
+import os
+import signal
+
+import lightgbm as lgb
+import numpy as np
+
+from ml_service.inference_pool import ProcessInferencePool
+
+
+@pytest.fixture(scope="module")
+def booster_path(tmp_path_factory):
+    """Фикстура: маленькая обученная LightGBM модель на диске"""
+    rng = np.random.default_rng(0)
+    features = rng.random((200, 3))
+    labels = (features[:, 0] > 0.5).astype(int)
+
+    booster = lgb.train({"objective": "binary", "verbose": -1}, lgb.Dataset(features, labels), 5)
+    path = tmp_path_factory.mktemp("model") / "model.txt"
+    booster.save_model(str(path))
+    return str(path)
+
+
+@pytest.mark.asyncio
+async def test_pool_matches_in_process_predict(booster_path):
+    """Тест: пул процессов даёт те же вероятности, что и модель в процессе"""
+    pool = ProcessInferencePool(booster_path, num_features=3, processes=2, max_batch_rows=64)
+    features = np.random.default_rng(1).random((150, 3)).astype(np.float32)
+
+    try:
+        scores = await pool.predict(features)
+    finally:
+        pool.close()
+
+    expected = lgb.Booster(model_file=booster_path).predict(features)
+    assert scores.shape == (150,)
+    assert np.allclose(scores, expected)
+
+
+@pytest.mark.asyncio
+async def test_pool_restarts_after_worker_crash(booster_path):
+    """Тест: после падения процесса пул пересоздаётся и запрос выполняется"""
+    pool = ProcessInferencePool(booster_path, num_features=3, processes=1, max_batch_rows=16)
+    features = np.random.default_rng(2).random((10, 3)).astype(np.float32)
+
+    try:
+        await pool.predict(features)
+        for pid in list(pool._executor._processes):
+            os.kill(pid, signal.SIGKILL)
+
+        scores = await pool.predict(features)
+    finally:
+        pool.close()
+
+    assert len(scores) == 10
+    assert pool.restarts == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_request_keeps_slot_until_process_finishes(booster_path):
+    """Тест: слот отменённого запроса не выдаётся другому, пока процесс не дописал в него"""
+    pool = ProcessInferencePool(booster_path, num_features=3, processes=1, max_batch_rows=16)
+    features = np.random.default_rng(3).random((10, 3)).astype(np.float32)
+
+    gate = asyncio.Event()
+    run = pool._run
+
+    async def slow_run(slot_name, rows):
+        await gate.wait()
+        return await run(slot_name, rows)
+
+    pool._run = slow_run
+    try:
+        request = asyncio.create_task(pool.predict(features))
+        await asyncio.sleep(0.01)
+        request.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await request
+
+        assert pool._free_slots.qsize() == len(pool._slots) - 1
+
+        gate.set()
+        for _ in range(200):
+            if pool._free_slots.qsize() == len(pool._slots):
+                break
+            await asyncio.sleep(0.05)
+        assert pool._free_slots.qsize() == len(pool._slots)
+
+        scores = await pool.predict(features)
+    finally:
+        pool.close()
+
+    assert np.allclose(scores, lgb.Booster(model_file=booster_path).predict(features))
@@ -0,0 +1,270 @@
+import asyncio
+import importlib.util
+import sys
+from pathlib import Path
+
+import grpc
+import pytest
+
+from generated_proto import metadata_pb2
+
+SERVICE_DIR = Path(__file__).resolve().parent.parent / "metadata_postgres_service"
+SERVICE_MODULES = ("database", "config_cache", "config_watch")
+
+# Сервис грузится под своим именем, а его модули (database и др.) - только
+# на время импорта: одноимённые модули есть у сервиса истории запросов
+_shadowed = {name: sys.modules.pop(name) for name in SERVICE_MODULES if name in sys.modules}
+_spec = importlib.util.spec_from_file_location("metadata_server", SERVICE_DIR / "server.py")
+metadata_server = importlib.util.module_from_spec(_spec)
+sys.path.insert(0, str(SERVICE_DIR))
+try:
+    _spec.loader.exec_module(metadata_server)
+    config_watch = sys.modules["config_watch"]
+    RulesSnapshot = sys.modules["database"].RulesSnapshot
+finally:
+    sys.path.remove(str(SERVICE_DIR))
+    for _name in SERVICE_MODULES:
+        sys.modules.pop(_name, None)
+    sys.modules.update(_shadowed)
+
+MLConfigSnapshot = metadata_server.MLConfigSnapshot
+
+
+def snapshot(version, threshold=0.5):
+    return MLConfigSnapshot(version=version, threshold=threshold, configs=())
+
+
+class FakeCache:
+    """MLConfigCache, отдающий конфиг текущей версии"""
+
+    def __init__(self, version=1):
+        self.version = version
+
+    async def refresh(self):
+        return snapshot(self.version, threshold=self.version / 10)
+
+
+class FakeConnection:
+    """Соединение asyncpg для LISTEN: хранит обработчик уведомлений"""
+
+    def __init__(self):
+        self.listeners = {}
+        self.closed = False
+
+    async def add_listener(self, channel, callback):
+        self.listeners[channel] = callback
+
+    async def execute(self, query):
+        pass
+
+    def is_closed(self):
+        return self.closed
+
+    async def close(self):
+        self.closed = True
+
+    def notify(self, channel):
+        self.listeners[channel](self, 1, channel, "")
+
+
+@pytest.fixture
+def listener(monkeypatch):
+    """Фикстура: LISTEN-соединение наблюдателя конфига без Postgres"""
+    connection = FakeConnection()
+
+    async def listen_connection():
+        return connection
+
+    monkeypatch.setattr(config_watch, "listen_connection", listen_connection)
+    return connection
+
+
+async def next_config(queue):
+    return await asyncio.wait_for(queue.get(), timeout=1)
+
+
+@pytest.mark.asyncio
+async def test_watcher_fans_out_notify(listener):
+    """Тест: NOTIFY перечитывает конфиг и рассылает новую версию всем подписчикам"""
+    cache = FakeCache(version=1)
+    watcher = config_watch.MLConfigWatcher(cache, ping_interval=60)
+    first, second = watcher.subscribe(), watcher.subscribe()
+    watcher.start()
+
+    try:
+        assert (await next_config(first)).version == 1
+        assert (await next_config(second)).version == 1
+
+        cache.version = 2
+        listener.notify(config_watch.ML_CONFIGS_CHANNEL)
+
+        assert (await next_config(first)).version == 2
+        assert (await next_config(second)).version == 2
+        # Новый подписчик сразу получает текущую версию
+        assert (await next_config(watcher.subscribe())).version == 2
+    finally:
+        await watcher.stop()
+
+    assert listener.closed
+
+
+@pytest.mark.asyncio
+async def test_watch_stream_unsubscribes_on_disconnect(listener):
+    """Тест: WatchMLConfig отдаёт текущий конфиг и отписывается, когда клиент отключился"""
+    watcher = config_watch.MLConfigWatcher(FakeCache(version=3), ping_interval=60)
+    servicer = metadata_server.MetadataDBServicer(config_cache=None, config_watcher=watcher)
+    watcher.start()
+
+    try:
+        stream = servicer.WatchMLConfig(metadata_pb2.WatchMLConfigRequest(), context=None)
+        response = await asyncio.wait_for(stream.__anext__(), timeout=1)
+        assert (response.version, response.threshold) == (3, pytest.approx(0.3))
+        assert len(watcher._subscribers) == 1
+
+        # Отключение клиента: grpc закрывает генератор обработчика
+        await stream.aclose()
+        assert not watcher._subscribers
+    finally:
+        await watcher.stop()
+
+
+class CountingLoader:
+    """load_ml_config, считающий обращения к БД; gate задерживает загрузку"""
+
+    def __init__(self, version=1):
+        self.version = version
+        self.calls = 0
+        self.gate = None
+
+    async def __call__(self):
+        self.calls += 1
+        if self.gate is not None:
+            await self.gate.wait()
+        return snapshot(self.version)
+
+
+class FakeContext:
+    def __init__(self):
+        self.code = None
+        self.details = None
+
+    def set_code(self, code):
+        self.code = code
+
+    def set_details(self, details):
+        self.details = details
+
+
+@pytest.mark.asyncio
+async def test_config_cache_ttl():
+    """Тест: до истечения TTL конфиг отдаётся из памяти, после - перечитывается"""
+    loader = CountingLoader()
+    cache = metadata_server.MLConfigCache(loader, ttl=0.05)
+
+    assert (await cache.get()).version == 1
+    loader.version = 2
+    assert (await cache.get()).version == 1
+    assert loader.calls == 1
+
+    await asyncio.sleep(0.06)
+    assert (await cache.get()).version == 2
+    assert loader.calls == 2
+    assert (cache.hits, cache.misses, cache.db_queries) == (1, 2, 2)
+
+
+@pytest.mark.asyncio
+async def test_config_cache_single_flight():
+    """Тест: параллельные промахи ждут одну загрузку из БД"""
+    loader = CountingLoader()
+    loader.gate = asyncio.Event()
+    cache = metadata_server.MLConfigCache(loader, ttl=30)
+
+    pending = [asyncio.create_task(cache.get()) for _ in range(10)]
+    await asyncio.sleep(0.01)
+    loader.gate.set()
+    configs = await asyncio.gather(*pending)
+
+    assert loader.calls == 1
+    assert {config.version for config in configs} == {1}
+    assert cache.misses == 10 and cache.db_queries == 1
+
+
+@pytest.mark.asyncio
+async def test_get_ml_config_not_modified():
+    """Тест: GetMLConfig с текущей if_version отвечает not_modified без конфига"""
+    loader = CountingLoader(version=5)
+    cache = metadata_server.MLConfigCache(loader, ttl=30)
+    servicer = metadata_server.MetadataDBServicer(cache, config_watcher=None)
+
+    full = await servicer.GetMLConfig(metadata_pb2.GetMLConfigRequest(), FakeContext())
+    same = await servicer.GetMLConfig(metadata_pb2.GetMLConfigRequest(if_version=5), FakeContext())
+    older = await servicer.GetMLConfig(metadata_pb2.GetMLConfigRequest(if_version=4), FakeContext())
+
+    assert (full.version, full.not_modified, full.threshold) == (5, False, 0.5)
+    assert (same.version, same.not_modified, same.threshold) == (5, True, 0.0)
+    assert (older.version, older.not_modified) == (5, False)
+    assert loader.calls == 1
+
+    metrics = cache.metrics()
+    assert metrics["config_cache.hits"] == 2
+    assert metrics["config_cache.misses"] == 1
+    assert metrics["config_cache.not_modified"] == 1
+    assert metrics["config_cache.version"] == 5
+
+
+@pytest.mark.asyncio
+async def test_get_ml_config_load_failure():
+    """Тест: ошибка загрузки конфига - INTERNAL и threshold по умолчанию"""
+    async def broken_loader():
+        raise RuntimeError("db is down")
+
+    servicer = metadata_server.MetadataDBServicer(
+        metadata_server.MLConfigCache(broken_loader), config_watcher=None
+    )
+    context = FakeContext()
+
+    response = await servicer.GetMLConfig(metadata_pb2.GetMLConfigRequest(), context)
+
+    assert context.code == grpc.StatusCode.INTERNAL
+    assert response.threshold == 0.5
+
+
+class CountingRulesLoader:
+    """load_fraud_rules, считающий обращения к БД"""
+
+    def __init__(self, version=1):
+        self.version = version
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        return RulesSnapshot(version=self.version, rules=(
+            {"name": "big", "rule_type": "amount_limit", "params": '{"max_amount": 1000}',
+             "action": "decline", "priority": 100},
+        ))
+
+
+@pytest.mark.asyncio
+async def test_get_rules_polls_skip_db():
+    """Тест: опросы GetRules с текущей if_version отвечают not_modified из кэша без БД"""
+    loader = CountingRulesLoader(version=7)
+    rules_cache = metadata_server.RulesCache(loader, ttl=30)
+    servicer = metadata_server.MetadataDBServicer(
+        metadata_server.MLConfigCache(CountingLoader()), config_watcher=None, rules_cache=rules_cache
+    )
+
+    full = await servicer.GetRules(metadata_pb2.GetRulesRequest(), FakeContext())
+    polls = [
+        await servicer.GetRules(metadata_pb2.GetRulesRequest(if_version=7), FakeContext())
+        for _ in range(5)
+    ]
+
+    assert (full.version, full.not_modified, [rule.name for rule in full.rules]) == (7, False, ["big"])
+    assert all(poll.not_modified and not poll.rules for poll in polls)
+    assert loader.calls == 1
+
+    metrics = (await servicer.GetMetrics(metadata_pb2.MetricsRequest(), None)).metrics
+    assert metrics["rules_cache.db_queries"] == 1
+    assert metrics["rules_cache.not_modified"] == 5
+    assert metrics["rules_cache.version"] == 7
+    assert metrics["config_cache.db_queries"] == 0
@@ -0,0 +1,122 @@
+import pytest
+import asyncio
+
+import numpy as np
+
+from ml_service.batcher import Histogram, MicroBatcher
+
+
+class FakeModel:
+    def __init__(self, fail: bool = False, delay: float = 0.0):
+        self.batches = []
+        self.fail = fail
+        self.delay = delay
+
+    async def predict_batch(self, requests):
+        self.batches.append(list(requests))
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("model failed")
+        probabilities = np.array([float(r) for r in requests])
+        return probabilities, probabilities >= 0.5
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_batch():
+    """Тест: одновременные запросы скорятся одним вызовом модели"""
+    model = FakeModel()
+    batcher = MicroBatcher(model.predict_batch, max_batch_size=16, max_wait_ms=20)
+
+    results = await asyncio.gather(*(batcher.submit(v) for v in (0.1, 0.7, 0.3)))
+    await batcher.stop()
+
+    assert results == [(0.1, False), (0.7, True), (0.3, False)]
+    assert len(model.batches) == 1
+
+
+@pytest.mark.asyncio
+async def test_batch_size_limit():
+    """Тест: батч не превышает max_batch_size"""
+    model = FakeModel()
+    batcher = MicroBatcher(model.predict_batch, max_batch_size=4, max_wait_ms=20)
+
+    await asyncio.gather(*(batcher.submit(0.1) for _ in range(10)))
+    await batcher.stop()
+
+    assert max(len(batch) for batch in model.batches) == 4
+    assert sum(len(batch) for batch in model.batches) == 10
+
+
+@pytest.mark.asyncio
+async def test_lone_request_waits_at_most_max_wait():
+    """Тест: одиночный запрос отдаётся по истечении max_wait_ms"""
+    batcher = MicroBatcher(FakeModel().predict_batch, max_batch_size=64, max_wait_ms=10)
+
+    result = await asyncio.wait_for(batcher.submit(0.9), timeout=1)
+    await batcher.stop()
+
+    assert result == (0.9, True)
+
+
+@pytest.mark.asyncio
+async def test_model_error_fails_whole_batch():
+    """Тест: ошибка модели передаётся всем запросам батча"""
+    batcher = MicroBatcher(FakeModel(fail=True).predict_batch, max_wait_ms=10)
+
+    results = await asyncio.gather(
+        batcher.submit(0.1), batcher.submit(0.2), return_exceptions=True
+    )
+    await batcher.stop()
+
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert batcher.metrics()["batcher.errors"] == 1
+
+
+@pytest.mark.asyncio
+async def test_metrics_report_batch_sizes_and_delay():
+    """Тест: метрики содержат распределение размеров батчей и задержку в очереди"""
+    batcher = MicroBatcher(FakeModel().predict_batch, max_batch_size=8, max_wait_ms=5)
+
+    await asyncio.gather(*(batcher.submit(0.1) for _ in range(3)))
+    await batcher.stop()
+
+    metrics = batcher.metrics()
+    assert metrics["batcher.batch_size.count"] == 1
+    assert metrics["batcher.batch_size.le_2"] == 0
+    assert metrics["batcher.batch_size.le_4"] == 1
+    assert metrics["batcher.queue_delay_ms.count"] == 3
+    assert metrics["batcher.queue_delay_ms.le_inf"] == 3
+
+
+@pytest.mark.asyncio
+async def test_stop_scores_requests_in_flight():
+    """Тест: stop скорит батч, ждущий слота, и запросы из очереди"""
+    model = FakeModel(delay=0.05)
+    batcher = MicroBatcher(model.predict_batch, max_batch_size=2, max_wait_ms=1000, max_inflight=1)
+
+    submitted = [asyncio.create_task(batcher.submit(v)) for v in (0.1, 0.2, 0.6, 0.7, 0.9)]
+    await asyncio.sleep(0.01)
+    # Первый батч скорится, второй ждёт слот, пятый запрос в очереди
+    assert len(model.batches) == 1 and batcher._queue.qsize() == 1
+
+    await asyncio.wait_for(batcher.stop(), timeout=1)
+
+    assert all(task.done() for task in submitted)
+    assert [task.result() for task in submitted] == [
+        (0.1, False), (0.2, False), (0.6, True), (0.7, True), (0.9, True)
+    ]
+
+
+def test_histogram_buckets():
+    """Тест: значения попадают в бакет с ближайшей верхней границей"""
+    histogram = Histogram((1, 10))
+    for value in (0.5, 1, 5, 50):
+        histogram.observe(value)
+
+    snapshot = histogram.snapshot("h")
+
+    assert snapshot["h.le_1"] == 2
+    assert snapshot["h.le_10"] == 3
+    assert snapshot["h.le_inf"] == 4
+    assert snapshot["h.max"] == 50
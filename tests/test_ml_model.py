@@ -0,0 +1,121 @@
+import json
+import math
+import sys
+from pathlib import Path
+
+import lightgbm as lgb
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "ml_service"))
+
+from generated_proto import ml_pb2
+from ml_model import FeatureEncoder, FraudDetectionModel
+from model_config import ModelConfig
+
+FEATURES = ["velocity_score", "transaction_type", "amount", "hour", "day_of_week", "location"]
+CATEGORIES = {
+    "transaction_type": ["deposit", "transfer", "withdrawal"],
+    "location": ["Moscow, RU", "Paris, FR"],
+}
+
+
+def make_transaction(**overrides) -> dict:
+    transaction = {
+        "correlation_id": "corr-1",
+        # 2025-10-23 - четверг (weekday 3)
+        "timestamp": "2025-10-23T14:30:00+00:00",
+        "amount": 250.0,
+        "transaction_type": "transfer",
+        "location": "Paris, FR",
+        "velocity_score": 3.0,
+    }
+    transaction.update(overrides)
+    return transaction
+
+
+@pytest.fixture(scope="module")
+def model_files(tmp_path_factory):
+    """Фикстура: маленькая LightGBM модель и feature_names.json с категориями"""
+    rng = np.random.default_rng(0)
+    features = rng.random((200, len(FEATURES)))
+    labels = (features[:, 2] > 0.5).astype(int)
+
+    booster = lgb.train({"objective": "binary", "verbose": -1}, lgb.Dataset(features, labels), 5)
+    directory = tmp_path_factory.mktemp("model")
+    booster.save_model(str(directory / "model.txt"))
+    (directory / "feature_names.json").write_text(json.dumps({"features": FEATURES, "categories": CATEGORIES}))
+    return str(directory / "model.txt"), str(directory / "feature_names.json")
+
+
+def test_encoder_columns_follow_feature_list():
+    """Тест: столбцы матрицы идут в порядке списка признаков, категории кодируются по словарю"""
+    encoder = FeatureEncoder(FEATURES, CATEGORIES)
+
+    [row] = encoder.encode(make_transaction()).tolist()
+
+    assert row == [3.0, 1.0, 250.0, 14.0, 3.0, 1.0]
+
+
+def test_encoder_unknown_category_is_nan():
+    """Тест: неизвестная категория и нечитаемый timestamp становятся NaN"""
+    encoder = FeatureEncoder(FEATURES, CATEGORIES)
+
+    [row] = encoder.encode(make_transaction(transaction_type="crypto", timestamp="yesterday")).tolist()
+
+    assert math.isnan(row[1])
+    assert math.isnan(row[3]) and math.isnan(row[4])
+    assert row[5] == 1.0
+
+
+def test_encoder_requests_match_dicts():
+    """Тест: матрица из PredictRequest совпадает с матрицей из dict'ов"""
+    encoder = FeatureEncoder(FEATURES, CATEGORIES)
+    transactions = [make_transaction(), make_transaction(location="Berlin, DE", amount=10.0)]
+
+    from_requests = encoder.encode_requests([ml_pb2.PredictRequest(**tx) for tx in transactions])
+    from_dicts = encoder.encode_batch(transactions, dict.__getitem__)
+
+    assert from_requests.dtype == np.float32 and from_requests.flags.c_contiguous
+    np.testing.assert_array_equal(from_requests, from_dicts)
+
+
+@pytest.mark.parametrize("feature_names, categories, message", [
+    (["amount", "favourite_colour"], {}, "Unsupported features"),
+    (["amount", "location"], {}, "No category encoding"),
+])
+def test_encoder_rejects_bad_feature_list(feature_names, categories, message):
+    """Тест: неизвестный признак или категориальный без словаря - ValueError"""
+    with pytest.raises(ValueError, match=message):
+        FeatureEncoder(feature_names, categories)
+
+
+@pytest.mark.asyncio
+async def test_model_default_threshold(model_files):
+    """Тест: без порога версии действует порог ModelConfig по умолчанию (0.5)"""
+    model_path, feature_list_path = model_files
+    model = FraudDetectionModel(ModelConfig(), model_path=model_path, feature_list_path=feature_list_path)
+    requests = [ml_pb2.PredictRequest(**make_transaction(amount=amount)) for amount in (0.1, 0.9)]
+
+    try:
+        probabilities, is_fraud = await model.predict_batch(requests)
+    finally:
+        model.close()
+
+    assert model.threshold == 0.5
+    assert model.encoder.feature_names == FEATURES
+    expected = lgb.Booster(model_file=model_path).predict(model.encoder.encode_requests(requests))
+    np.testing.assert_allclose(probabilities, expected)
+    assert is_fraud.tolist() == [False, True]
+
+
+def test_model_version_threshold_overrides_config(model_files):
+    """Тест: порог версии модели важнее порога ModelConfig"""
+    model_path, feature_list_path = model_files
+    model = FraudDetectionModel(
+        ModelConfig(threshold=0.5), model_path=model_path, feature_list_path=feature_list_path,
+        threshold=0.8
+    )
+    model.close()
+
+    assert model.threshold == 0.8
@@ -0,0 +1,89 @@
+from types import SimpleNamespace
+
+from ml_service.routing import ConfigRouter, traffic_bucket
+
+
+def make_config(name, payment_channel="", transaction_type="", merchant_category="",
+                model_version="", threshold=0.5, traffic_weight=1.0, mode="live"):
+    return SimpleNamespace(
+        name=name,
+        payment_channel=payment_channel,
+        transaction_type=transaction_type,
+        merchant_category=merchant_category,
+        model_version=model_version,
+        threshold=threshold,
+        traffic_weight=traffic_weight,
+        mode=mode,
+    )
+
+
+def make_request(transaction_id="TXN1", payment_channel="online",
+                 transaction_type="transfer", merchant_category="retail"):
+    return SimpleNamespace(
+        transaction_id=transaction_id,
+        correlation_id=f"corr-{transaction_id}",
+        payment_channel=payment_channel,
+        transaction_type=transaction_type,
+        merchant_category=merchant_category,
+    )
+
+
+def test_most_specific_segment_wins():
+    """Тест: выбирается конфиг самого специфичного подходящего сегмента"""
+    router = ConfigRouter([
+        make_config("default", threshold=0.5),
+        make_config("online", payment_channel="online", threshold=0.6),
+        make_config("online-transfer", payment_channel="online",
+                    transaction_type="transfer", threshold=0.7),
+    ])
+
+    assert router.assign(make_request())[0].name == "online-transfer"
+    assert router.assign(make_request(transaction_type="payment"))[0].name == "online"
+    assert router.assign(make_request(payment_channel="card"))[0].name == "default"
+
+
+def test_no_matching_config():
+    """Тест: без подходящего live-конфига возвращается None"""
+    router = ConfigRouter([make_config("card", payment_channel="card")])
+
+    config, shadow = router.assign(make_request())
+
+    assert config is None
+    assert shadow == ()
+    assert not ConfigRouter()
+
+
+def test_traffic_split_is_deterministic_and_weighted():
+    """Тест: разбиение трафика по весам детерминировано по transaction_id"""
+    router = ConfigRouter([
+        make_config("control", model_version="v1", traffic_weight=9),
+        make_config("candidate", model_version="v2", traffic_weight=1),
+    ])
+    requests = [make_request(transaction_id=f"TXN{i}") for i in range(5000)]
+
+    first = [router.assign(r)[0].name for r in requests]
+    second = [router.assign(r)[0].name for r in requests]
+
+    assert first == second
+    assert 0.05 < first.count("candidate") / len(first) < 0.15
+    assert router.model_versions == {"v1", "v2"}
+
+
+def test_shadow_configs_do_not_replace_live():
+    """Тест: shadow-конфиг сегмента не перекрывает live-конфиг общего сегмента"""
+    router = ConfigRouter([
+        make_config("default", threshold=0.5),
+        make_config("shadow-online", payment_channel="online", model_version="v2", mode="shadow"),
+    ])
+
+    config, shadow = router.assign(make_request())
+
+    assert config.name == "default"
+    assert [c.name for c in shadow] == ["shadow-online"]
+    assert router.assign(make_request(payment_channel="card"))[1] == ()
+
+
+def test_traffic_bucket_range():
+    """Тест: точка разбиения лежит в [0, 1) и стабильна"""
+    assert 0 <= traffic_bucket("TXN1") < 1
+    assert traffic_bucket("TXN1") == traffic_bucket("TXN1")
@@ -0,0 +1,220 @@
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import grpc
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "ml_service"))
+
+from generated_proto import ml_pb2
+from ml_model import FraudDetectionModel
+from ml_server import MLServiceServicer
+from model_manager import ModelManager
+from routing import SegmentConfig
+
+
+class FakeBatcher:
+    async def submit(self, request):
+        await asyncio.sleep(0)
+        if request.amount < 0:
+            raise ValueError("bad amount")
+        return 0.9, True
+
+
+class FakeModel:
+    lease = FraudDetectionModel.lease
+
+    def __init__(self, version, delay=0.05):
+        self.version = version
+        self.threshold = 0.5
+        self.delay = delay
+        self.inflight = 0
+        self.closed = False
+        self.scored = 0
+
+    async def score_requests(self, requests):
+        await asyncio.sleep(self.delay)
+        assert not self.closed, f"model {self.version} scored after close"
+        self.scored += len(requests)
+        return np.full(len(requests), 0.9)
+
+    def close(self):
+        self.closed = True
+
+
+class FakeRouter:
+    def __init__(self, live_version, shadow_version):
+        self.live = SegmentConfig("live", (None, None, None), live_version, 0.5, 1.0, "live")
+        self.shadow = SegmentConfig("shadow", (None, None, None), shadow_version, 0.5, 1.0, "shadow")
+
+    def assign(self, request):
+        return self.live, [self.shadow]
+
+
+class FakeContext:
+    def __init__(self):
+        self.code = None
+        self.details = None
+
+    def set_code(self, code):
+        self.code = code
+
+    def set_details(self, details):
+        self.details = details
+
+
+def make_servicer():
+    servicer = MLServiceServicer.__new__(MLServiceServicer)
+    servicer.batcher = FakeBatcher()
+    return servicer
+
+
+def make_routed_servicer(models: ModelManager, router: FakeRouter):
+    servicer = make_servicer()
+    servicer.models = models
+    servicer.model_config = SimpleNamespace(router=router)
+    servicer._shadow_tasks = set()
+    return servicer
+
+
+async def requests(*amounts, fail_after=None):
+    for i, amount in enumerate(amounts):
+        if fail_after is not None and i == fail_after:
+            raise RuntimeError("client stream broken")
+        yield ml_pb2.PredictRequest(correlation_id=f"corr-{i}", amount=amount)
+
+
+async def collect(servicer, request_iterator, context):
+    return [
+        response async for response in servicer.PredictStream(request_iterator, context)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_stream_item_failure_does_not_abort_stream():
+    """Тест: ошибка одного запроса стрима приходит ответом с error, остальные скорятся"""
+    context = FakeContext()
+
+    responses = await asyncio.wait_for(
+        collect(make_servicer(), requests(10.0, -1.0, 20.0), context), timeout=1
+    )
+
+    by_id = {response.correlation_id: response for response in responses}
+    assert set(by_id) == {"corr-0", "corr-1", "corr-2"}
+    assert "bad amount" in by_id["corr-1"].error
+    assert by_id["corr-0"].is_fraud and not by_id["corr-0"].error
+    assert context.code is None
+
+
+@pytest.mark.asyncio
+async def test_stream_reader_error_ends_stream():
+    """Тест: ошибка входящего стрима завершает обработчик с INTERNAL, а не вешает его"""
+    context = FakeContext()
+
+    await asyncio.wait_for(
+        collect(make_servicer(), requests(10.0, 20.0, fail_after=1), context), timeout=1
+    )
+
+    assert context.code == grpc.StatusCode.INTERNAL
+    assert "client stream broken" in context.details
+
+
+@pytest.mark.asyncio
+async def test_hot_swap_during_predict_keeps_routed_models_open():
+    """Тест: выведенные при горячей замене модели закрываются только после запросов, выбравших их"""
+    active, segment, shadow = FakeModel("1.0"), FakeModel("2.0"), FakeModel("3.0")
+    models = ModelManager(active, model_factory=None, required_versions=lambda: {"2.0", "3.0"})
+    models.versions = {"2.0": segment, "3.0": shadow}
+    servicer = make_routed_servicer(models, FakeRouter("2.0", "3.0"))
+
+    request = ml_pb2.PredictRequest(correlation_id="corr-0")
+    predict = asyncio.create_task(servicer._predict_batch([request]))
+    await asyncio.sleep(0)
+
+    # Реестр перестал ссылаться на версии, а активная модель заменена
+    models.required_versions = set
+    for version in ("2.0", "3.0"):
+        models._retire_later(models.versions.pop(version))
+    models.swap(FakeModel("4.0"))
+
+    probabilities, is_fraud = await predict
+    await asyncio.gather(*servicer._shadow_tasks)
+    await asyncio.gather(*models._retiring)
+
+    assert probabilities.tolist() == [0.9] and is_fraud.tolist() == [True]
+    assert segment.scored == 1 and shadow.scored == 1
+    assert segment.closed and shadow.closed and active.closed
+
+
+class AmountModel(FakeModel):
+    """Модель с вероятностью amount / 100; fail - ошибка скоринга"""
+
+    def __init__(self, version, delay=0.0, fail=False):
+        super().__init__(version, delay)
+        self.fail = fail
+        self.calls = []
+
+    async def score_requests(self, requests):
+        self.calls.append([request.correlation_id for request in requests])
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError(f"model {self.version} failed")
+        return np.array([request.amount / 100 for request in requests])
+
+
+class AmountRouter:
+    """Крупные суммы - в сегмент версии 3.0 с порогом 0.6, остальные - 2.0 с порогом 0.3"""
+
+    def __init__(self):
+        self.small = SegmentConfig("small", (None, None, None), "2.0", 0.3, 1.0, "live")
+        self.large = SegmentConfig("large", (None, None, None), "3.0", 0.6, 1.0, "live")
+
+    def assign(self, request):
+        return (self.large if request.amount >= 50 else self.small), []
+
+
+def make_batch_servicer(small_model, large_model):
+    models = ModelManager(FakeModel("1.0"), model_factory=None)
+    models.versions = {"2.0": small_model, "3.0": large_model}
+    return make_routed_servicer(models, AmountRouter())
+
+
+def batch_request(*amounts):
+    return ml_pb2.PredictBatchRequest(requests=[
+        ml_pb2.PredictRequest(correlation_id=f"corr-{i}", amount=amount)
+        for i, amount in enumerate(amounts)
+    ])
+
+
+@pytest.mark.asyncio
+async def test_predict_batch_keeps_request_order_across_segments():
+    """Тест: ответы PredictBatch в порядке запросов, хотя сегменты вперемешку и готовы не по порядку"""
+    small, large = AmountModel("2.0", delay=0.05), AmountModel("3.0")
+    servicer = make_batch_servicer(small, large)
+    context = FakeContext()
+
+    response = await servicer.PredictBatch(batch_request(10, 70, 40, 90, 20, 55), context)
+
+    assert context.code is None
+    assert small.calls == [["corr-0", "corr-2", "corr-4"]]
+    assert large.calls == [["corr-1", "corr-3", "corr-5"]]
+    assert [item.correlation_id for item in response.responses] == [f"corr-{i}" for i in range(6)]
+    assert [item.probability for item in response.responses] == pytest.approx([0.1, 0.7, 0.4, 0.9, 0.2, 0.55])
+    # Порог сегмента: 0.3 для мелких сумм, 0.6 для крупных
+    assert [item.is_fraud for item in response.responses] == [False, True, True, True, False, False]
+
+
+@pytest.mark.asyncio
+async def test_predict_batch_error_sets_status_without_partial_response():
+    """Тест: ошибка одной группы - статус INTERNAL и пустой ответ, а не часть батча"""
+    servicer = make_batch_servicer(AmountModel("2.0"), AmountModel("3.0", fail=True))
+    context = FakeContext()
+
+    response = await servicer.PredictBatch(batch_request(10, 70, 40), context)
+
+    assert context.code == grpc.StatusCode.INTERNAL
+    assert "model 3.0 failed" in context.details
+    assert len(response.responses) == 0
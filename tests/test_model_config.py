@@ -0,0 +1,78 @@
+import asyncio
+import re
+import sys
+from pathlib import Path
+
+import grpc
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "ml_service"))
+
+import model_config
+from generated_proto import metadata_pb2
+
+
+def unavailable():
+    return grpc.aio.AioRpcError(grpc.StatusCode.UNAVAILABLE, grpc.aio.Metadata(), grpc.aio.Metadata())
+
+
+class FakeStub:
+    """
+    Стаб MetadataDB: каждое подключение к WatchMLConfig проигрывает
+    следующий сценарий - ответы, затем ошибка или бесконечное ожидание
+    """
+
+    scripts = []
+    connections = 0
+
+    def __init__(self, channel):
+        pass
+
+    def WatchMLConfig(self, request):
+        script = FakeStub.scripts[FakeStub.connections]
+        FakeStub.connections += 1
+        return self._play(script)
+
+    @staticmethod
+    async def _play(script):
+        for step in script:
+            if isinstance(step, Exception):
+                raise step
+            yield step
+        await asyncio.Event().wait()
+
+
+def config(version, threshold):
+    return metadata_pb2.MLConfigResponse(version=version, threshold=threshold)
+
+
+@pytest.mark.asyncio
+async def test_watch_reconnects_with_backoff(monkeypatch, caplog):
+    """Тест: обрыв стрима - переподключение с растущей паузой, после ответа пауза сбрасывается"""
+    monkeypatch.setattr(FakeStub, "scripts", [
+        [unavailable()],
+        [unavailable()],
+        [unavailable()],
+        [config(1, 0.7), unavailable()],
+        [config(2, 0.8)],
+    ])
+    monkeypatch.setattr(FakeStub, "connections", 0)
+    monkeypatch.setattr(model_config.metadata_pb2_grpc, "MetadataDBStub", FakeStub)
+    config_client = model_config.ModelConfig(reconnect_delay=0.01, max_reconnect_delay=0.03)
+
+    config_client.start_watching()
+    try:
+        for _ in range(100):
+            if config_client.version == 2:
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        await config_client.close()
+
+    assert FakeStub.connections == 5
+    assert (config_client.version, config_client.threshold) == (2, pytest.approx(0.8))
+    delays = [
+        float(match) for match in re.findall(r"reconnecting in ([\d.]+)s", caplog.text)
+    ]
+    # Удвоение до потолка max_reconnect_delay, после ответа снова reconnect_delay
+    assert delays == [0.01, 0.02, 0.03, 0.01]
@@ -0,0 +1,82 @@
+import pytest
+
+from redis_queue_service.codecs import (
+    JsonCodec,
+    MsgpackCodec,
+    ProtobufCodec,
+    PAYLOAD_MAGIC,
+    PayloadError,
+    decode_payload,
+    get_codec,
+)
+
+transaction = {
+    "transaction_id": "TXN001",
+    "timestamp": "2025-10-23T12:00:00+00:00",
+    "sender_account": "ACC12345",
+    "receiver_account": "ACC54321",
+    "amount": 100.5,
+    "transaction_type": "transfer",
+    "merchant_category": "retail",
+    "location": "Moscow, RU",
+    "device_used": "mobile",
+    "payment_channel": "online",
+    "ip_address": "127.0.0.1",
+    "device_hash": "abcdef12345678",
+    "correlation_id": "corr-1",
+}
+
+
+def test_json_codec_is_plain_json():
+    """Тест: JSON пишется без заголовка и читается старым форматом"""
+    payload = JsonCodec().encode(transaction)
+
+    assert payload.startswith(b"{")
+    assert decode_payload(payload) == transaction
+    assert decode_payload(payload.decode("utf-8")) == transaction
+
+
+def test_msgpack_codec_roundtrip():
+    """Тест: msgpack с версионированным заголовком"""
+    payload = MsgpackCodec().encode(transaction)
+
+    assert payload.startswith(PAYLOAD_MAGIC)
+    assert len(payload) < len(JsonCodec().encode(transaction))
+    assert decode_payload(payload) == transaction
+
+
+def test_protobuf_codec_roundtrip():
+    """Тест: protobuf по схеме PredictRequest"""
+    payload = ProtobufCodec().encode(transaction)
+
+    decoded = decode_payload(payload)
+
+    assert len(payload) < len(JsonCodec().encode(transaction))
+    assert {key: decoded[key] for key in transaction} == transaction
+
+
+def test_unsupported_payload_version():
+    """Тест: payload более новой версии формата не декодируется молча"""
+    with pytest.raises(PayloadError, match="version"):
+        decode_payload(PAYLOAD_MAGIC + bytes((99, 1)) + b"\x80")
+
+
+@pytest.mark.parametrize("payload", [
+    b"{not json",
+    b"\xff\xfe",
+    b"[1, 2]",
+    PAYLOAD_MAGIC + b"\x01",
+    PAYLOAD_MAGIC + bytes((1, 1)) + b"\xc1",
+    PAYLOAD_MAGIC + bytes((1, 2)) + b"\xff\xff\xff",
+    PAYLOAD_MAGIC + bytes((1, 42)) + b"{}",
+])
+def test_undecodable_payload(payload):
+    """Тест: любой нечитаемый payload - PayloadError, а не ошибка конкретного кодека"""
+    with pytest.raises(PayloadError):
+        decode_payload(payload)
+
+
+def test_unknown_codec():
+    """Тест: неизвестный кодек"""
+    with pytest.raises(ValueError):
+        get_codec("xml")
@@ -211,10 +211,234 @@ async def test_json_serialization_complex_data(redis_queue):
 
 @pytest.mark.asyncio
 async def test_error_handling_invalid_json(redis_queue):
-    """Тест: обработка ошибок при невалидном JSON"""
+    """Тест: невалидный JSON уходит в dead-letter список, pop возвращает None"""
     await redis_queue._redis.lpush(redis_queue.queue_name, "invalid-json-{{{")
-    
-    with pytest.raises(Exception):
-        await redis_queue.pop(timeout=1)
-    
-    await redis_queue.clear()
+
+    assert await redis_queue.pop(timeout=1) is None
+    assert await redis_queue._redis.lrange(redis_queue.dead_letter_key, 0, -1) == [b"invalid-json-{{{"]
+
+
+@pytest.mark.asyncio
+async def test_pop_many_skips_undecodable_item(redis_queue):
+    """Тест: нечитаемый элемент между двумя валидными не обрывает pop_many"""
+    await redis_queue.push({"id": "tx-1"})
+    await redis_queue._redis.lpush(redis_queue.queue_name, b"\xfd\x01\x2a garbage")
+    await redis_queue.push({"id": "tx-2"})
+
+    batch = await redis_queue.pop_many(3, timeout=1)
+
+    assert [tx["id"] for tx in batch] == ["tx-1", "tx-2"]
+    assert await redis_queue._redis.llen(redis_queue.dead_letter_key) == 1
+
+
+@pytest.mark.asyncio
+async def test_push_many_fifo_order(redis_queue):
+    """Тест: пакетное добавление сохраняет FIFO порядок"""
+    transactions = [{"id": f"tx-{i}", "amount": i} for i in range(25)]
+
+    length = await redis_queue.push_many(transactions)
+
+    assert length == 25
+    for expected_tx in transactions[:3]:
+        popped_tx = await redis_queue.pop(timeout=1)
+        assert popped_tx["id"] == expected_tx["id"]
+
+
+@pytest.mark.asyncio
+async def test_push_many_chunks(redis_queue):
+    """Тест: пачка больше push_chunk_size разбивается на несколько LPUSH"""
+    redis_queue.push_chunk_size = 4
+
+    length = await redis_queue.push_many([{"id": f"tx-{i}"} for i in range(10)])
+
+    assert length == 10
+    popped = await redis_queue.pop_many(10, timeout=1)
+    assert [tx["id"] for tx in popped] == [f"tx-{i}" for i in range(10)]
+
+
+@pytest.mark.asyncio
+async def test_push_many_empty(redis_queue):
+    """Тест: пустая пачка не меняет очередь"""
+    assert await redis_queue.push_many([]) == 0
+
+
+@pytest.mark.asyncio
+async def test_pop_many(redis_queue):
+    """Тест: пакетное извлечение не больше count элементов"""
+    await redis_queue.push_many([{"id": f"tx-{i}"} for i in range(5)])
+
+    popped = await redis_queue.pop_many(3, timeout=1)
+
+    assert [tx["id"] for tx in popped] == ["tx-0", "tx-1", "tx-2"]
+    assert await redis_queue.length() == 2
+
+
+@pytest.mark.asyncio
+async def test_pop_many_non_blocking(redis_queue):
+    """Тест: pop_many без блокировки на пустой и непустой очереди"""
+    assert await redis_queue.pop_many(3, timeout=None) == []
+
+    await redis_queue.push({"id": "tx-1"})
+    popped = await redis_queue.pop_many(3, timeout=None)
+
+    assert [tx["id"] for tx in popped] == ["tx-1"]
+
+
+@pytest.mark.asyncio
+async def test_pop_many_empty_queue_with_timeout(redis_queue):
+    """Тест: pop_many из пустой очереди с таймаутом"""
+    assert await redis_queue.pop_many(3, timeout=0.1) == []
+
+
+@pytest_asyncio.fixture
+async def reliable_queue():
+    """Фикстура: очередь в надёжном режиме"""
+    queue = RedisQueue(
+        REDIS_URL,
+        queue_name="test:reliable",
+        reliable=True,
+        consumer_id="consumer-1",
+        visibility_timeout=30
+    )
+    await queue.connect()
+    await queue.clear()
+
+    yield queue
+
+    await queue.clear()
+    await queue.close()
+
+
+@pytest.mark.asyncio
+async def test_reliable_pop_moves_to_processing(reliable_queue):
+    """Тест: в надёжном режиме pop переносит элемент в processing-список"""
+    await reliable_queue.push({"id": "tx-1"})
+
+    tx = await reliable_queue.pop(timeout=1)
+
+    assert tx["id"] == "tx-1"
+    assert await reliable_queue.length() == 0
+    assert await reliable_queue._redis.llen(reliable_queue.processing_key()) == 1
+
+
+@pytest.mark.asyncio
+async def test_reliable_ack_batch(reliable_queue):
+    """Тест: ack целого батча очищает processing-список"""
+    await reliable_queue.push_many([{"id": f"tx-{i}"} for i in range(5)])
+
+    batch = await reliable_queue.pop_many(5, timeout=1)
+    acked = await reliable_queue.ack(batch)
+
+    assert [tx["id"] for tx in batch] == [f"tx-{i}" for i in range(5)]
+    assert acked == 5
+    assert await reliable_queue._redis.llen(reliable_queue.processing_key()) == 0
+    assert await reliable_queue._redis.zcard(reliable_queue.deadlines_key()) == 0
+
+
+@pytest.mark.asyncio
+async def test_reliable_blocking_pop_many(reliable_queue):
+    """Тест: блокирующий pop_many дожидается элементов и добирает батч"""
+    async def producer():
+        await asyncio.sleep(0.1)
+        await reliable_queue.push_many([{"id": f"tx-{i}"} for i in range(3)])
+
+    producer_task = asyncio.create_task(producer())
+    batch = await reliable_queue.pop_many(3, timeout=2)
+    await producer_task
+
+    assert [tx["id"] for tx in batch] == ["tx-0", "tx-1", "tx-2"]
+    # каждый перенесённый элемент сразу получает дедлайн
+    assert await reliable_queue._redis.zcard(reliable_queue.deadlines_key()) == 3
+    assert await reliable_queue.ack(batch) == 3
+
+
+@pytest.mark.asyncio
+async def test_reliable_nack_requeues(reliable_queue):
+    """Тест: nack возвращает элементы в голову очереди"""
+    await reliable_queue.push_many([{"id": "tx-1"}, {"id": "tx-2"}])
+
+    batch = await reliable_queue.pop_many(1, timeout=1)
+    await reliable_queue.nack(batch)
+
+    tx = await reliable_queue.pop(timeout=1)
+    assert tx["id"] == "tx-1"
+
+
+@pytest.mark.asyncio
+async def test_reliable_undecodable_item_dead_lettered(reliable_queue):
+    """Тест: в надёжном режиме нечитаемый элемент уходит из processing-списка в dead-letter"""
+    await reliable_queue.push({"id": "tx-1"})
+    await reliable_queue._redis.lpush(reliable_queue.queue_name, b"invalid-json-{{{")
+    await reliable_queue.push({"id": "tx-2"})
+
+    batch = await reliable_queue.pop_many(3, timeout=1)
+    await reliable_queue.ack(batch)
+
+    assert [tx["id"] for tx in batch] == ["tx-1", "tx-2"]
+    assert await reliable_queue._redis.lrange(reliable_queue.dead_letter_key, 0, -1) == [b"invalid-json-{{{"]
+    assert await reliable_queue._redis.llen(reliable_queue.processing_key()) == 0
+    assert await reliable_queue._redis.zcard(reliable_queue.deadlines_key()) == 0
+    assert await reliable_queue.requeue_expired() == 0
+
+
+@pytest.mark.asyncio
+async def test_reliable_requeue_expired(reliable_queue):
+    """Тест: неподтверждённые после visibility timeout элементы возвращаются"""
+    reliable_queue.visibility_timeout = 0.1
+    await reliable_queue.push_many([{"id": "tx-1"}, {"id": "tx-2"}])
+
+    await reliable_queue.pop_many(2, timeout=1)
+    assert await reliable_queue.requeue_expired() == 0
+
+    await asyncio.sleep(0.2)
+
+    assert await reliable_queue.requeue_expired() == 2
+    assert await reliable_queue.length() == 2
+    assert not await reliable_queue._redis.sismember(reliable_queue.consumers_key, "consumer-1")
+
+    batch = await reliable_queue.pop_many(2, timeout=1)
+    assert [tx["id"] for tx in batch] == ["tx-1", "tx-2"]
+
+
+@pytest.mark.asyncio
+async def test_reliable_inflight_forgets_expired(reliable_queue):
+    """Тест: записи о давно неподтверждённых элементах не копятся в памяти"""
+    reliable_queue.visibility_timeout = 0.05
+    await reliable_queue.push_many([{"id": "tx-1"}, {"id": "tx-2"}])
+
+    stale = await reliable_queue.pop_many(1, timeout=1)
+    await asyncio.sleep(0.15)
+    fresh = await reliable_queue.pop_many(1, timeout=1)
+
+    assert len(reliable_queue._inflight) == 1
+    assert await reliable_queue.ack(stale) == 0
+    assert await reliable_queue.ack(fresh) == 1
+
+
+@pytest.mark.asyncio
+async def test_ack_noop_without_reliable_mode(redis_queue):
+    """Тест: ack без надёжного режима ничего не делает"""
+    await redis_queue.push({"id": "tx-1"})
+    tx = await redis_queue.pop(timeout=1)
+
+    assert await redis_queue.ack([tx]) == 0
+
+
+@pytest.mark.asyncio
+async def test_mixed_codecs_in_one_queue():
+    """Тест: воркер читает вперемешку JSON и msgpack из одной очереди"""
+    json_queue = RedisQueue(REDIS_URL, queue_name="test:codecs")
+    msgpack_queue = RedisQueue(REDIS_URL, queue_name="test:codecs", codec="msgpack")
+    await json_queue.connect()
+    await json_queue.clear()
+
+    await json_queue.push({"id": "tx-json"})
+    await msgpack_queue.push_many([{"id": "tx-msgpack", "amount": 1.5}])
+
+    popped = await json_queue.pop_many(2, timeout=1)
+
+    assert popped == [{"id": "tx-json"}, {"id": "tx-msgpack", "amount": 1.5}]
+
+    await json_queue.clear()
+    await json_queue.close()
+    await msgpack_queue.close()
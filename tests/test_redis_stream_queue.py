@@ -0,0 +1,182 @@
+import pytest
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest_asyncio
+
+from redis_queue_service import RedisQueue, RedisStreamQueue, create_queue
+from core.config import REDIS_URL
+
+
+@pytest_asyncio.fixture
+async def stream_queue():
+    """Фикстура: очередь на Redis Streams, очищается после теста"""
+    queue = RedisStreamQueue(REDIS_URL, queue_name="test:stream", consumer_id="consumer-1")
+    await queue.connect()
+    await queue.clear()
+
+    yield queue
+
+    await queue.clear()
+    await queue.close()
+
+
+@pytest.mark.asyncio
+async def test_stream_push_pop(stream_queue):
+    """Тест: добавление и извлечение через consumer group"""
+    length = await stream_queue.push({"id": "tx-1", "amount": 100})
+
+    assert length == 1
+    assert await stream_queue.length() == 1
+
+    tx = await stream_queue.pop(timeout=1)
+
+    assert tx["id"] == "tx-1"
+    assert await stream_queue.length() == 0
+
+
+@pytest.mark.asyncio
+async def test_stream_pop_empty_with_timeout(stream_queue):
+    """Тест: pop из пустого потока с таймаутом"""
+    assert await stream_queue.pop(timeout=0.1) is None
+
+
+@pytest.mark.asyncio
+async def test_stream_fifo_batch(stream_queue):
+    """Тест: пакетное извлечение в порядке добавления"""
+    await stream_queue.push_many([{"id": f"tx-{i}"} for i in range(5)])
+
+    batch = await stream_queue.pop_many(3, timeout=1)
+
+    assert [tx["id"] for tx in batch] == ["tx-0", "tx-1", "tx-2"]
+    assert await stream_queue.length() == 2
+
+
+@pytest.mark.asyncio
+async def test_stream_consumers_share_group(stream_queue):
+    """Тест: консьюмеры одной группы не получают одни и те же сообщения"""
+    other = RedisStreamQueue(REDIS_URL, queue_name="test:stream", consumer_id="consumer-2")
+    await other.connect()
+
+    await stream_queue.push_many([{"id": f"tx-{i}"} for i in range(4)])
+
+    first = await stream_queue.pop_many(2, timeout=1)
+    second = await other.pop_many(2, timeout=1)
+
+    ids = {tx["id"] for tx in first} | {tx["id"] for tx in second}
+    assert ids == {"tx-0", "tx-1", "tx-2", "tx-3"}
+
+    await other.close()
+
+
+@pytest.mark.asyncio
+async def test_stream_ack_clears_pending(stream_queue):
+    """Тест: ack убирает сообщения из pending-списка"""
+    await stream_queue.push_many([{"id": "tx-1"}, {"id": "tx-2"}])
+
+    batch = await stream_queue.pop_many(2, timeout=1)
+    acked = await stream_queue.ack(batch)
+
+    assert acked == 2
+    pending = await stream_queue._redis.xpending(stream_queue.queue_name, stream_queue.group_name)
+    assert pending["pending"] == 0
+
+
+@pytest.mark.asyncio
+async def test_stream_undecodable_message_dead_lettered(stream_queue):
+    """Тест: нечитаемое сообщение между двумя валидными подтверждается и уходит в dead-letter"""
+    await stream_queue.push({"id": "tx-1"})
+    await stream_queue._redis.xadd(stream_queue.queue_name, {"data": b"invalid-json-{{{"})
+    await stream_queue.push({"id": "tx-2"})
+
+    batch = await stream_queue.pop_many(3, timeout=1)
+
+    assert [tx["id"] for tx in batch] == ["tx-1", "tx-2"]
+    assert await stream_queue._redis.lrange(stream_queue.dead_letter_key, 0, -1) == [b"invalid-json-{{{"]
+    pending = await stream_queue._redis.xpending(stream_queue.queue_name, stream_queue.group_name)
+    assert pending["pending"] == 2
+
+
+@pytest.mark.asyncio
+async def test_stream_requeue_expired(stream_queue):
+    """Тест: неподтверждённые сообщения перехватываются и выдаются повторно"""
+    stream_queue.visibility_timeout = 0.05
+    await stream_queue.push({"id": "tx-1"})
+
+    await stream_queue.pop(timeout=1)
+    await asyncio.sleep(0.1)
+
+    assert await stream_queue.requeue_expired() == 1
+
+    tx = await stream_queue.pop(timeout=1)
+    assert tx["id"] == "tx-1"
+    assert await stream_queue.ack([tx]) == 1
+
+
+@pytest.mark.asyncio
+async def test_stream_trim_keeps_unacked(stream_queue):
+    """Тест: обрезка до maxlen не трогает pending и ещё не выданные сообщения"""
+    stream_queue.maxlen = 2
+    await stream_queue.push_many([{"id": f"tx-{i}"} for i in range(5)])
+
+    batch = await stream_queue.pop_many(3, timeout=1)
+    await stream_queue.ack(batch[:2])
+
+    assert await stream_queue.requeue_expired() == 0
+    assert await stream_queue._redis.xlen(stream_queue.queue_name) == 3
+
+    await stream_queue.ack(batch[2:])
+    rest = await stream_queue.pop_many(2, timeout=1)
+    assert [tx["id"] for tx in rest] == ["tx-3", "tx-4"]
+
+
+@pytest.mark.asyncio
+async def test_stream_reclaimed_bounded(stream_queue):
+    """Тест: requeue_expired перехватывает не больше push_chunk_size сообщений за раз"""
+    stream_queue.visibility_timeout = 0.05
+    stream_queue.push_chunk_size = 2
+    await stream_queue.push_many([{"id": f"tx-{i}"} for i in range(3)])
+
+    await stream_queue.pop_many(3, timeout=1)
+    await asyncio.sleep(0.1)
+
+    assert await stream_queue.requeue_expired() == 2
+    assert await stream_queue.requeue_expired() == 0
+
+    batch = await stream_queue.pop_many(2, timeout=None)
+    assert await stream_queue.ack(batch) == 2
+    await asyncio.sleep(0.1)
+    assert await stream_queue.requeue_expired() == 1
+
+
+@pytest.mark.asyncio
+async def test_stream_peek(stream_queue):
+    """Тест: peek показывает ещё не выданные сообщения"""
+    await stream_queue.push_many([{"id": "tx-1"}, {"id": "tx-2"}, {"id": "tx-3"}])
+    await stream_queue.pop(timeout=1)
+
+    peeked = await stream_queue.peek(count=1)
+
+    assert [tx["id"] for tx in peeked] == ["tx-2"]
+    assert await stream_queue.length() == 2
+
+
+@pytest.mark.asyncio
+async def test_stream_replay_by_time(stream_queue):
+    """Тест: replay возвращает сообщения за интервал времени, включая выданные"""
+    start = datetime.now(timezone.utc) - timedelta(seconds=1)
+    await stream_queue.push_many([{"id": "tx-1"}, {"id": "tx-2"}])
+    await stream_queue.pop_many(2, timeout=1)
+
+    replayed = await stream_queue.replay(start, datetime.now(timezone.utc) + timedelta(seconds=1))
+
+    assert [tx["id"] for _, tx in replayed] == ["tx-1", "tx-2"]
+
+
+def test_create_queue_backends():
+    """Тест: выбор бэкенда очереди"""
+    assert type(create_queue(REDIS_URL, backend="list")) is RedisQueue
+    assert type(create_queue(REDIS_URL, backend="stream")) is RedisStreamQueue
+
+    with pytest.raises(ValueError):
+        create_queue(REDIS_URL, backend="kafka")
@@ -0,0 +1,151 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from generated_proto import metadata_pb2
+from server.rule_engine import rule_engine
+from server.rule_engine.rule_engine import CompiledRules, RuleEngine, RuleHit
+
+
+def make_rule(name, rule_type, params, action="decline", priority=100):
+    return SimpleNamespace(
+        name=name,
+        rule_type=rule_type,
+        params=json.dumps(params),
+        action=action,
+        priority=priority,
+    )
+
+
+def make_transaction(**overrides) -> dict:
+    transaction = {
+        "amount": 100.0,
+        "transaction_type": "transfer",
+        "payment_channel": "online",
+        "merchant_category": "retail",
+        "ip_address": "8.8.8.8",
+        "device_hash": "abcdef12345678",
+        "velocity_score": 1.0,
+        "window_amount": 100.0,
+    }
+    transaction.update(overrides)
+    return transaction
+
+
+def test_each_rule_type_matches():
+    """Тест: каждое правило срабатывает только на своих транзакциях"""
+    rules = CompiledRules([
+        make_rule("big-online", "amount_limit", {"max_amount": 5000, "payment_channel": "online"}),
+        make_rule("bad-device", "blocked_device", {"device_hashes": ["deadbeef0000"]}),
+        make_rule("bad-net", "blocked_ip_range", {"cidrs": ["10.0.0.0/8", "2001:db8::/32"]}),
+        make_rule("atm-online", "type_channel", {"combinations": [["withdrawal", "online"]]}),
+        make_rule("burst", "velocity_cap", {"max_velocity": 10}),
+    ])
+
+    transactions = [
+        make_transaction(),
+        make_transaction(amount=6000.0),
+        make_transaction(amount=6000.0, payment_channel="card"),
+        make_transaction(device_hash="deadbeef0000"),
+        make_transaction(ip_address="10.20.30.40"),
+        make_transaction(ip_address="2001:db8::1"),
+        make_transaction(ip_address="11.0.0.1"),
+        make_transaction(transaction_type="withdrawal"),
+        make_transaction(velocity_score=11.0),
+    ]
+
+    hits = rules.evaluate(transactions)
+
+    assert [hit.rule if hit else None for hit in hits] == [
+        None, "big-online", None, "bad-device", "bad-net", "bad-net", None, "atm-online", "burst",
+    ]
+
+
+def test_decline_rules_win_over_review():
+    """Тест: decline-правило важнее review независимо от priority"""
+    rules = CompiledRules([
+        make_rule("review-transfers", "type_channel", {"combinations": [["transfer", "online"]]},
+                  action="review", priority=1),
+        make_rule("limit", "amount_limit", {"max_amount": 1000}, priority=50),
+    ])
+
+    hits = rules.evaluate([make_transaction(), make_transaction(amount=2000.0)])
+
+    assert hits == [RuleHit("review-transfers", "review"), RuleHit("limit", "decline")]
+
+
+def test_ip_ranges_are_merged():
+    """Тест: пересекающиеся и смежные CIDR объединяются в интервалы"""
+    rules = CompiledRules([
+        make_rule("nets", "blocked_ip_range", {
+            "cidrs": ["192.168.0.0/24", "192.168.1.0/24", "192.168.0.128/25", "172.16.0.0/12"]
+        }),
+    ])
+
+    hits = rules.evaluate([
+        make_transaction(ip_address=address)
+        for address in ("192.168.0.1", "192.168.1.255", "192.168.2.0", "172.31.255.255", "172.32.0.0", "bad")
+    ])
+
+    assert [hit is not None for hit in hits] == [True, True, False, True, False, False]
+
+
+def test_invalid_rules_are_skipped():
+    """Тест: некорректное правило пропускается, остальные работают"""
+    rules = CompiledRules([
+        make_rule("broken", "amount_limit", {}),
+        make_rule("unknown", "moon_phase", {}),
+        make_rule("limit", "amount_limit", {"max_amount": 1000}),
+    ], version=3)
+
+    assert len(rules) == 1
+    assert rules.version == 3
+    assert rules.evaluate([make_transaction(amount=5000.0)]) == [RuleHit("limit", "decline")]
+    assert CompiledRules().evaluate([make_transaction()]) == [None]
+
+
+class FakeChannel:
+    def __init__(self, url):
+        self.url = url
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeRulesStub:
+    """Стаб MetadataDB: версия 1 набора правил, not_modified для текущей версии"""
+
+    def __init__(self, channel):
+        self.channel = channel
+
+    async def GetRules(self, request, timeout=None):
+        if request.if_version == 1:
+            return metadata_pb2.RulesResponse(version=1, not_modified=True)
+        return metadata_pb2.RulesResponse(version=1, rules=[
+            metadata_pb2.FraudRule(**vars(make_rule("big", "amount_limit", {"max_amount": 1000})))
+        ])
+
+
+@pytest.mark.asyncio
+async def test_refresh_reuses_channel(monkeypatch):
+    """Тест: опросы GetRules идут по одному каналу, close его закрывает"""
+    channels = []
+
+    def insecure_channel(url):
+        channels.append(FakeChannel(url))
+        return channels[-1]
+
+    monkeypatch.setattr(rule_engine.grpc.aio, "insecure_channel", insecure_channel)
+    monkeypatch.setattr(rule_engine.metadata_pb2_grpc, "MetadataDBStub", FakeRulesStub)
+    engine = RuleEngine("metadata:50052")
+
+    assert await engine.refresh() is True
+    assert await engine.refresh() is False
+    assert await engine.refresh() is False
+    assert (engine.rules.version, len(engine.rules)) == (1, 1)
+    assert [channel.url for channel in channels] == ["metadata:50052"]
+
+    await engine.close()
+    assert channels[0].closed
@@ -0,0 +1,337 @@
+import pytest
+import asyncio
+
+import pytest_asyncio
+
+from feature_store import OnlineFeatureStore
+from redis_queue_service import RedisQueue
+from server.rule_engine.rule_engine import CompiledRules, RuleEngine
+from scoring_worker import ScoringWorker
+from core.config import REDIS_URL
+from generated_proto import ml_pb2, transactions_pb2
+
+
+class FakeMLStub:
+    def __init__(self, fail: bool = False):
+        self.requests = []
+        self.calls = 0
+        self.fail = fail
+
+    async def PredictBatch(self, request, timeout=None):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError("ml is down")
+        self.requests.extend(request.requests)
+        return ml_pb2.PredictBatchResponse(responses=[
+            ml_pb2.PredictResponse(
+                correlation_id=item.correlation_id,
+                is_fraud=item.amount > 1000,
+                probability=0.9 if item.amount > 1000 else 0.1
+            )
+            for item in request.requests
+        ])
+
+
+class FakeTransactionsStub:
+    def __init__(self, fail: bool = False, statuses: dict = None):
+        self.requests = []
+        self.fail = fail
+        self.statuses = statuses or {}
+
+    async def InsertTransactions(self, request, timeout=None):
+        if self.fail:
+            raise RuntimeError("db is down")
+        self.requests.extend(request.transactions)
+        return transactions_pb2.InsertTransactionsResponse(results=[
+            transactions_pb2.InsertResult(
+                transaction_id=item.transaction_id,
+                correlation_id=item.correlation_id,
+                status=self.statuses.get(item.transaction_id, "inserted"),
+            )
+            for item in request.transactions
+        ])
+
+
+def make_transaction(i: int, amount: float = 100.0) -> dict:
+    return {
+        "transaction_id": f"TXN{i}",
+        "timestamp": "2025-10-23T12:00:00+00:00",
+        "sender_account": "ACC12345",
+        "receiver_account": "ACC54321",
+        "amount": amount,
+        "transaction_type": "transfer",
+        "merchant_category": "retail",
+        "location": "Moscow, RU",
+        "device_used": "mobile",
+        "payment_channel": "online",
+        "ip_address": "127.0.0.1",
+        "device_hash": "abcdef12345678",
+        "correlation_id": f"corr-{i}",
+    }
+
+
+@pytest_asyncio.fixture
+async def worker():
+    """Фикстура: воркер на тестовой очереди с заглушками gRPC"""
+    queue = RedisQueue(REDIS_URL, queue_name="test:worker")
+    await queue.connect()
+    await queue.clear()
+
+    worker = ScoringWorker(queue, batch_size=5, linger_ms=50)
+    worker._ml_stub = FakeMLStub()
+    worker._transactions_stub = FakeTransactionsStub()
+
+    yield worker
+
+    await queue.clear()
+    await queue.close()
+
+
+@pytest.mark.asyncio
+async def test_collect_batch_respects_batch_size(worker):
+    """Тест: батч не превышает batch_size"""
+    for i in range(12):
+        await worker.queue.push(make_transaction(i))
+
+    batch = await worker.collect_batch(timeout=1)
+
+    assert len(batch) == 5
+    assert [tx["transaction_id"] for tx in batch] == [f"TXN{i}" for i in range(5)]
+    assert await worker.queue.length() == 7
+
+
+@pytest.mark.asyncio
+async def test_collect_batch_stops_after_linger(worker):
+    """Тест: неполный батч отдаётся по истечении linger"""
+    for i in range(2):
+        await worker.queue.push(make_transaction(i))
+
+    batch = await asyncio.wait_for(worker.collect_batch(timeout=1), timeout=2)
+
+    assert len(batch) == 2
+
+
+@pytest.mark.asyncio
+async def test_collect_batch_empty_queue(worker):
+    """Тест: пустая очередь даёт пустой батч"""
+    assert await worker.collect_batch(timeout=1) == []
+
+
+@pytest.mark.asyncio
+async def test_process_batch_scores_and_persists(worker):
+    """Тест: каждая транзакция батча уходит и в ML, и в историю"""
+    batch = [make_transaction(1, amount=50.0), make_transaction(2, amount=5000.0)]
+
+    results = await worker.process_batch(batch)
+
+    assert [r["is_fraud"] for r in results] == [False, True]
+    assert all(r["error"] is None for r in results)
+    assert worker._ml_stub.calls == 1
+    assert len(worker._ml_stub.requests) == 2
+    assert len(worker._transactions_stub.requests) == 2
+    assert worker._transactions_stub.requests[0].timestamp == "2025-10-23T12:00:00.000000"
+
+
+@pytest.mark.asyncio
+async def test_process_batch_adds_online_features(worker):
+    """Тест: в ML уходят онлайн-признаки счёта, в историю - только поля транзакции"""
+    store = OnlineFeatureStore(REDIS_URL, key_prefix="test:worker:features")
+    await store.connect()
+    await store._redis.delete(store.state_key("ACC12345"))
+    worker.feature_store = store
+
+    batch = [make_transaction(1), make_transaction(2)]
+    batch[1]["timestamp"] = "2025-10-23T12:01:00+00:00"
+
+    try:
+        await worker.process_batch(batch)
+    finally:
+        await store._redis.delete(store.state_key("ACC12345"))
+        await store.close()
+
+    first, second = worker._ml_stub.requests
+    assert first.velocity_score == 1
+    assert second.velocity_score == 2
+    assert second.time_since_last_transaction == 60
+    assert len(worker._transactions_stub.requests) == 2
+
+
+@pytest.mark.asyncio
+async def test_process_batch_declined_by_rules_skip_model(worker):
+    """Тест: транзакции под decline-правилом не идут в модель, но сохраняются"""
+    from tests.test_rule_engine import make_rule
+
+    worker.rule_engine = RuleEngine("metadata-service:50052")
+    worker.rule_engine.rules = CompiledRules([
+        make_rule("limit", "amount_limit", {"max_amount": 10000}),
+        make_rule("review-retail", "amount_limit", {"max_amount": 0, "merchant_category": "retail"},
+                  action="review"),
+    ])
+
+    results = await worker.process_batch([
+        make_transaction(1, amount=50.0),
+        make_transaction(2, amount=50000.0),
+    ])
+
+    assert [r["rule"] for r in results] == ["review-retail", "limit"]
+    assert results[1]["is_fraud"] is True
+    assert results[1]["probability"] is None
+    assert [r.transaction_id for r in worker._ml_stub.requests] == ["TXN1"]
+    assert len(worker._transactions_stub.requests) == 2
+    assert worker.rule_engine.metrics()["rules.declined"] == 1
+
+
+@pytest.mark.asyncio
+async def test_process_batch_reports_failures(worker):
+    """Тест: ошибка сохранения не прерывает скоринг батча"""
+    worker._transactions_stub = FakeTransactionsStub(fail=True)
+
+    results = await worker.process_batch([make_transaction(1)])
+
+    assert results[0]["is_fraud"] is False
+    assert results[0]["error"].startswith("insert")
+
+
+@pytest.mark.asyncio
+async def test_process_batch_predict_failure_still_persists(worker):
+    """Тест: ошибка PredictBatch не мешает сохранению батча"""
+    worker._ml_stub = FakeMLStub(fail=True)
+
+    results = await worker.process_batch([make_transaction(1), make_transaction(2)])
+
+    assert all(r["is_fraud"] is None for r in results)
+    assert all(r["persisted"] for r in results)
+    assert all(r["error"].startswith("predict") for r in results)
+
+
+@pytest.mark.asyncio
+async def test_process_batch_reports_both_failures(worker):
+    """Тест: при сбое и модели, и сохранения ошибка модели не затирается ошибкой вставки"""
+    worker._ml_stub = FakeMLStub(fail=True)
+    worker._transactions_stub = FakeTransactionsStub(fail=True)
+
+    [result] = await worker.process_batch([make_transaction(1)])
+
+    assert result["error"] == "predict: ml is down; insert: db is down"
+    assert result["persisted"] is False
+
+
+@pytest.mark.asyncio
+async def test_process_batch_acks_persisted_only():
+    """Тест: в надёжном режиме подтверждаются только сохранённые транзакции"""
+    queue = RedisQueue(REDIS_URL, queue_name="test:worker:reliable", reliable=True, consumer_id="w1")
+    await queue.connect()
+    await queue.clear()
+
+    worker = ScoringWorker(queue, batch_size=5, linger_ms=10)
+    worker._ml_stub = FakeMLStub()
+    worker._transactions_stub = FakeTransactionsStub(fail=True)
+
+    await queue.push_many([make_transaction(1)])
+    batch = await worker.collect_batch(timeout=1)
+    await worker.process_batch(batch)
+
+    assert await queue._redis.llen(queue.processing_key()) == 1
+
+    worker._transactions_stub = FakeTransactionsStub()
+    await worker.process_batch(batch)
+
+    assert await queue._redis.llen(queue.processing_key()) == 0
+
+    await queue.clear()
+    await queue.close()
+
+
+@pytest.mark.asyncio
+async def test_process_batch_unscored_not_acked():
+    """Тест: сохранённая, но не оценённая моделью транзакция не подтверждается"""
+    queue = RedisQueue(REDIS_URL, queue_name="test:worker:unscored", reliable=True, consumer_id="w1")
+    await queue.connect()
+    await queue.clear()
+
+    worker = ScoringWorker(queue, batch_size=5, linger_ms=10)
+    worker._ml_stub = FakeMLStub(fail=True)
+    worker._transactions_stub = FakeTransactionsStub()
+
+    await queue.push_many([make_transaction(1)])
+    batch = await worker.collect_batch(timeout=1)
+    results = await worker.process_batch(batch)
+
+    assert results[0]["persisted"] is True
+    assert await queue._redis.llen(queue.processing_key()) == 1
+
+    worker._ml_stub = FakeMLStub()
+    await worker.process_batch(batch)
+
+    assert await queue._redis.llen(queue.processing_key()) == 0
+
+    await queue.clear()
+    await queue.close()
+
+
+@pytest.mark.asyncio
+async def test_process_batch_acks_by_insert_status():
+    """Тест: дубликаты и некорректные транзакции подтверждаются, failed - нет"""
+    queue = RedisQueue(REDIS_URL, queue_name="test:worker:statuses", reliable=True, consumer_id="w1")
+    await queue.connect()
+    await queue.clear()
+
+    worker = ScoringWorker(queue, batch_size=5, linger_ms=10)
+    worker._ml_stub = FakeMLStub()
+    worker._transactions_stub = FakeTransactionsStub(statuses={
+        "TXN2": "duplicate", "TXN3": "invalid", "TXN4": "failed",
+    })
+
+    await queue.push_many([make_transaction(i) for i in range(1, 5)])
+    batch = await worker.collect_batch(timeout=1)
+    results = await worker.process_batch(batch)
+
+    assert [r["persisted"] for r in results] == [True, True, False, False]
+    assert results[1]["error"] is None
+    assert results[2]["error"].startswith("insert: invalid")
+    assert await queue._redis.llen(queue.processing_key()) == 1
+
+    await queue.clear()
+    await queue.close()
+
+
+@pytest.mark.asyncio
+async def test_process_batch_invalid_timestamp_is_settled_alone(worker):
+    """Тест: транзакция с неразбираемым timestamp отклоняется, не ломая батч"""
+    broken = {**make_transaction(2), "timestamp": "not-a-date"}
+
+    results = await worker.process_batch([make_transaction(1), broken])
+
+    assert results[0]["error"] is None
+    assert results[1]["error"].startswith("invalid")
+    assert results[1]["persisted"] is False
+    assert [r.transaction_id for r in worker._ml_stub.requests] == ["TXN1"]
+    assert [r.transaction_id for r in worker._transactions_stub.requests] == ["TXN1"]
+
+
+@pytest.mark.asyncio
+async def test_run_survives_batch_failure(worker, monkeypatch):
+    """Тест: ошибка обработки батча не останавливает цикл воркера"""
+    import scoring_worker.worker as worker_module
+
+    monkeypatch.setattr(worker_module, "ERROR_BACKOFF_SECONDS", 0)
+    calls = []
+
+    async def noop():
+        pass
+
+    async def process_batch(batch):
+        calls.append(batch)
+        if len(calls) == 1:
+            raise RuntimeError("redis is down")
+        worker.stop()
+
+    worker.start = noop
+    worker.close = noop
+    worker.process_batch = process_batch
+    await worker.queue.push_many([make_transaction(1), make_transaction(2)])
+    worker.batch_size = 1
+
+    await asyncio.wait_for(worker.run(), timeout=5)
+
+    assert len(calls) == 2
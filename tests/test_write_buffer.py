@@ -0,0 +1,135 @@
+import asyncio
+
+import pytest
+
+from requests_history_service.write_buffer import FlushResult, WriteBuffer
+
+
+class RowError(Exception):
+    pass
+
+
+class FakeWriter:
+    def __init__(self, existing=(), fail: bool = False, delay: float = 0.0, bad=()):
+        self.batches = []
+        self.existing = set(existing)
+        self.fail = fail
+        self.delay = delay
+        self.bad = set(bad)
+
+    async def __call__(self, rows):
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("db is down")
+        if self.bad & {row[0] for row in rows}:
+            raise RowError("value too long")
+        self.batches.append([row[0] for row in rows])
+        inserted = {row[0] for row in rows} - self.existing
+        self.existing |= inserted
+        return inserted
+
+
+def rows(*ids):
+    return [(transaction_id, "payload") for transaction_id in ids]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_submits_share_one_flush():
+    """Тест: мелкие пачки конкурентных RPC пишутся одной вставкой"""
+    writer = FakeWriter(existing={"T0"})
+    buffer = WriteBuffer(writer, flush_rows=100, flush_interval=0.05)
+    buffer.start()
+
+    results = await asyncio.gather(
+        buffer.submit(rows("T0", "T1")),
+        buffer.submit(rows("T2")),
+        buffer.submit(rows("T1", "T3")),
+    )
+    await buffer.close()
+
+    assert writer.batches == [["T0", "T1", "T2", "T3"]]
+    assert [result.inserted for result in results] == [{"T1"}, {"T2"}, {"T3"}]
+
+
+@pytest.mark.asyncio
+async def test_flush_by_size_before_interval():
+    """Тест: при наборе flush_rows пачка пишется, не дожидаясь таймера"""
+    writer = FakeWriter()
+    buffer = WriteBuffer(writer, flush_rows=4, flush_interval=60)
+    buffer.start()
+
+    results = await asyncio.wait_for(
+        asyncio.gather(buffer.submit(rows("T1", "T2")), buffer.submit(rows("T3", "T4"))),
+        timeout=1
+    )
+    await buffer.close()
+
+    assert results == [FlushResult({"T1", "T2"}, {}), FlushResult({"T3", "T4"}, {})]
+    assert writer.batches == [["T1", "T2", "T3", "T4"]]
+
+
+@pytest.mark.asyncio
+async def test_flush_failure_propagates_in_durable_mode():
+    """Тест: ошибка записи возвращается всем ожидающим submit"""
+    buffer = WriteBuffer(FakeWriter(fail=True), flush_interval=0.01)
+    buffer.start()
+
+    with pytest.raises(RuntimeError):
+        await buffer.submit(rows("T1"))
+    await buffer.close()
+
+    assert buffer.metrics()["write_buffer.failed_rows"] == 1
+
+
+@pytest.mark.asyncio
+async def test_row_error_fails_only_bad_rows():
+    """Тест: при ошибке данных пачка делится, и failed получает только плохая строка"""
+    writer = FakeWriter(bad={"T3"})
+    buffer = WriteBuffer(
+        writer, flush_rows=100, flush_interval=0.01,
+        is_row_error=lambda e: isinstance(e, RowError)
+    )
+    buffer.start()
+
+    first, second = await asyncio.gather(
+        buffer.submit(rows("T1", "T2")), buffer.submit(rows("T3", "T4", "T5"))
+    )
+    await buffer.close()
+
+    assert first == FlushResult({"T1", "T2"}, {})
+    assert second.inserted == {"T4", "T5"}
+    assert list(second.failed) == ["T3"]
+    assert buffer.metrics()["write_buffer.failed_rows"] == 1
+    assert buffer.metrics()["write_buffer.flushed_rows"] == 4
+
+
+@pytest.mark.asyncio
+async def test_connection_error_is_not_split():
+    """Тест: ошибку, не связанную с данными строк, пачка получает целиком"""
+    writer = FakeWriter(fail=True)
+    buffer = WriteBuffer(writer, flush_interval=0.01, is_row_error=lambda e: isinstance(e, RowError))
+    buffer.start()
+
+    with pytest.raises(RuntimeError):
+        await buffer.submit(rows("T1", "T2"))
+    await buffer.close()
+
+    assert buffer.metrics()["write_buffer.failed_rows"] == 2
+
+
+@pytest.mark.asyncio
+async def test_fast_mode_acks_on_enqueue_and_flushes_on_close():
+    """Тест: быстрый режим отвечает сразу, close дописывает буфер"""
+    writer = FakeWriter(delay=0.01)
+    buffer = WriteBuffer(writer, flush_rows=1000, flush_interval=60, durable=False)
+    buffer.start()
+
+    assert await buffer.submit(rows("T1")) is None
+    assert await buffer.submit(rows("T2")) is None
+    assert writer.batches == []
+
+    await buffer.close()
+
+    assert writer.batches == [["T1", "T2"]]
+    with pytest.raises(RuntimeError):
+        await buffer.submit(rows("T3"))